@@ -3,11 +3,167 @@ import os
 # IBM WatsonX Granite API Configuration
 # Environment variables take precedence over hardcoded values
 IBM_WX_URL = os.getenv("IBM_WX_URL", "https://au-syd.ml.cloud.ibm.com")
-IBM_WX_API_KEY = os.getenv("IBM_WX_API_KEY", "tO3VKD0y4vjEa0_8lGdyP81jHbJNuwfuphEqL6SMEnJo")
-IBM_WX_PROJECT_ID = os.getenv("IBM_WX_PROJECT_ID", "57bf082e-c759-4b7f-803f-1d92ea56dd3a")
+IBM_WX_API_KEY = os.getenv(
+    "IBM_WX_API_KEY", "tO3VKD0y4vjEa0_8lGdyP81jHbJNuwfuphEqL6SMEnJo"
+)
+IBM_WX_PROJECT_ID = os.getenv(
+    "IBM_WX_PROJECT_ID", "57bf082e-c759-4b7f-803f-1d92ea56dd3a"
+)
 IBM_WX_MODEL_ID = os.getenv("IBM_WX_MODEL_ID", "ibm/granite-13b-instruct")
 
 # Note: If you're still getting 401 errors, you may need to:
 # 1. Get a fresh API key from IBM Cloud Console
 # 2. Ensure the API key has WatsonX permissions
 # 3. Check if the project ID is correct and accessible
+
+# Granite HTTP client pool (shared across requests, created on app startup)
+GRANITE_POOL_SIZE = int(os.getenv("GRANITE_POOL_SIZE", "20"))
+GRANITE_KEEPALIVE_CONNECTIONS = int(os.getenv("GRANITE_KEEPALIVE_CONNECTIONS", "10"))
+GRANITE_KEEPALIVE_EXPIRY = float(os.getenv("GRANITE_KEEPALIVE_EXPIRY", "30"))
+GRANITE_CONNECT_TIMEOUT = float(os.getenv("GRANITE_CONNECT_TIMEOUT", "3"))
+GRANITE_READ_TIMEOUT = float(os.getenv("GRANITE_READ_TIMEOUT", "15"))
+GRANITE_HTTP2 = os.getenv("GRANITE_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# Granite rewrite cache (in-memory LRU/TTL, optional SQLite tier that survives restarts)
+REWRITE_CACHE_MAX_ENTRIES = int(os.getenv("REWRITE_CACHE_MAX_ENTRIES", "2048"))
+REWRITE_CACHE_TTL_SECONDS = float(os.getenv("REWRITE_CACHE_TTL_SECONDS", "86400"))
+REWRITE_CACHE_DISK_PATH = os.getenv("REWRITE_CACHE_DISK_PATH", "")
+
+# Materialized tips artifact (built with materialize_tips.py); empty = disabled
+MATERIALIZED_TIPS_PATH = os.getenv("MATERIALIZED_TIPS_PATH", "")
+
+# Batch scoring (/risk/submit/batch)
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", "32"))
+BATCH_MAX_ROW_BYTES = int(os.getenv("BATCH_MAX_ROW_BYTES", "65536"))
+BATCH_MAX_DISTINCT_REWRITES = int(os.getenv("BATCH_MAX_DISTINCT_REWRITES", "1024"))
+
+# Granite latency budget and circuit breaker
+# Requests wait at most this long for a rewrite before returning the deterministic
+# tips; the rewrite keeps running in the background and fills the cache. 0 = wait.
+GRANITE_LATENCY_BUDGET_MS = float(os.getenv("GRANITE_LATENCY_BUDGET_MS", "300"))
+GRANITE_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("GRANITE_BREAKER_FAILURE_THRESHOLD", "5")
+)
+GRANITE_BREAKER_RESET_SECONDS = float(os.getenv("GRANITE_BREAKER_RESET_SECONDS", "30"))
+GRANITE_BREAKER_HALF_OPEN_PROBES = int(
+    os.getenv("GRANITE_BREAKER_HALF_OPEN_PROBES", "1")
+)
+
+# Granite admission control: at most GRANITE_MAX_CONCURRENCY calls run at once,
+# up to GRANITE_QUEUE_SIZE more wait (High risk first) and the rest get the
+# deterministic tips straight away. GRANITE_MAX_CONCURRENCY=0 = unlimited.
+GRANITE_MAX_CONCURRENCY = int(os.getenv("GRANITE_MAX_CONCURRENCY", "10"))
+GRANITE_QUEUE_SIZE = int(os.getenv("GRANITE_QUEUE_SIZE", "100"))
+
+# Granite micro-batching: collect concurrent rewrites for a short window and send
+# them together ("combined" = one multi-item generation, "parallel" = bounded
+# parallel requests). A window of 0 disables batching.
+GRANITE_BATCH_WINDOW_MS = float(os.getenv("GRANITE_BATCH_WINDOW_MS", "0"))
+GRANITE_BATCH_MAX_SIZE = int(os.getenv("GRANITE_BATCH_MAX_SIZE", "8"))
+GRANITE_BATCH_MODE = os.getenv("GRANITE_BATCH_MODE", "combined")
+GRANITE_BATCH_MAX_PARALLEL = int(os.getenv("GRANITE_BATCH_MAX_PARALLEL", "4"))
+
+# Guideline snippets hot reload: how often to check guideline_snippets.json for
+# changes (seconds, 0 = only via POST /admin/guidelines/reload)
+GUIDELINES_RELOAD_INTERVAL_SECONDS = float(
+    os.getenv("GUIDELINES_RELOAD_INTERVAL_SECONDS", "5")
+)
+
+# Admin endpoints and /risk/history need "X-Admin-Token: <ADMIN_TOKEN>" and
+# answer 404 while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+# Used by serve.py and rescore.py when no worker count is given
+def available_cpus() -> int:
+    """CPUs this process may run on (respects container CPU sets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Production launcher (serve.py): 0 workers = one per available CPU
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+
+# Fast codec: decode request bodies with msgspec and encode with orjson when
+# installed ("auto"), or force the pydantic/json path ("off")
+FAST_CODEC = os.getenv("FAST_CODEC", "auto")
+
+# Logging: records go through a bounded queue to a background writer thread.
+# LOG_SAMPLE_RATES keeps a fraction of INFO records per endpoint, e.g.
+# "/risk/submit=0.1,/recommendations/generate=0.05"; warnings are always kept.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_SAMPLE_DEFAULT = float(os.getenv("LOG_SAMPLE_DEFAULT", "1.0"))
+LOG_REDACT_FIELDS = [
+    f.strip() for f in os.getenv("LOG_REDACT_FIELDS", "name").split(",") if f.strip()
+]
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Skip the stdlib's per-record caller lookup (process-wide; blanks funcName/lineno everywhere)
+LOG_SKIP_SOURCE_LOCATION = os.getenv("LOG_SKIP_SOURCE_LOCATION", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Assessment history: results with a user_id are group-committed to this store
+# by a background writer (empty path = disabled)
+ASSESSMENT_STORE_BACKEND = os.getenv("ASSESSMENT_STORE_BACKEND", "sqlite")
+ASSESSMENT_STORE_PATH = os.getenv("ASSESSMENT_STORE_PATH", "")
+ASSESSMENT_WRITE_BATCH_SIZE = int(os.getenv("ASSESSMENT_WRITE_BATCH_SIZE", "256"))
+ASSESSMENT_WRITE_MAX_DELAY_MS = float(os.getenv("ASSESSMENT_WRITE_MAX_DELAY_MS", "50"))
+ASSESSMENT_WRITE_QUEUE_SIZE = int(os.getenv("ASSESSMENT_WRITE_QUEUE_SIZE", "50000"))
+ASSESSMENT_HISTORY_MAX_LIMIT = int(os.getenv("ASSESSMENT_HISTORY_MAX_LIMIT", "100"))
+
+# GET /recommendations caching: max-age for documents (revalidated by ETag after
+# that) and for redirects to the canonical URL
+RECOMMENDATIONS_CACHE_MAX_AGE_SECONDS = int(
+    os.getenv("RECOMMENDATIONS_CACHE_MAX_AGE_SECONDS", "300")
+)
+RECOMMENDATIONS_STALE_WHILE_REVALIDATE_SECONDS = int(
+    os.getenv("RECOMMENDATIONS_STALE_WHILE_REVALIDATE_SECONDS", "60")
+)
+RECOMMENDATIONS_REDIRECT_MAX_AGE_SECONDS = int(
+    os.getenv("RECOMMENDATIONS_REDIRECT_MAX_AGE_SECONDS", "86400")
+)
+
+# Population analytics: counters are flushed to this SQLite file every
+# ANALYTICS_FLUSH_INTERVAL_SECONDS (empty path = in-memory, per process)
+ANALYTICS_SNAPSHOT_PATH = os.getenv("ANALYTICS_SNAPSHOT_PATH", "")
+ANALYTICS_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("ANALYTICS_FLUSH_INTERVAL_SECONDS", "5")
+)
+
+# On-demand profiling: requests to PROFILING_PATHS sent with
+# "X-Profile-Token: <PROFILING_TOKEN>" run under a sampling or deterministic
+# profiler (off unless enabled and a token is set). Profiles are kept in memory
+# for /admin/profiles and written as collapsed stacks to PROFILING_OUTPUT_DIR if set.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_PATHS = [
+    p.strip()
+    for p in os.getenv(
+        "PROFILING_PATHS", "/risk/submit,/recommendations/generate"
+    ).split(",")
+    if p.strip()
+]
+PROFILING_MODE = os.getenv(
+    "PROFILING_MODE", "sampling"
+)  # or "deterministic"; X-Profile-Mode overrides per request
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "2"))
+PROFILING_MAX_PER_MINUTE = float(os.getenv("PROFILING_MAX_PER_MINUTE", "6"))
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "30"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "20"))
+PROFILING_OUTPUT_DIR = os.getenv("PROFILING_OUTPUT_DIR", "")
@@ -1,24 +1,148 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from .models import RiskInput, RiskResponse, RecoInput
-from .services.risk_scoring import calculate_risk
-from .services.recommendations import generate_health_recommendations
-from .services.granite import rewrite_tips_with_granite
+import asyncio
 import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+
+from . import config
+from .models import RecoInput, RiskInput, RiskResponse
+from .services import codec, granite, structured_logging
+from .services.admission import risk_priority
+from .services.analytics import population, run_flusher
+from .services.assessment_store import (
+    AssessmentRecord,
+    assessment_writer,
+    decode_cursor,
+    open_store,
+    page,
+)
+from .services.auth import require_admin_token
+from .services.batch import NDJSONStreamingResponse, RowError, iter_json_rows
+from .services.codec import FastCodecRoute, validate_risk_row
+from .services.fragments import dumps, recommendations_fragment, risk_response_fragment
+from .services.granite import (
+    close_granite_client,
+    parse_bullets,
+    start_granite_client,
+    stream_tips_with_granite,
+)
+from .services.granite_batcher import micro_batcher
+from .services.http_cache import (
+    cache_control,
+    canonical_flags,
+    canonical_query,
+    if_none_match,
+    strong_etag,
+)
+from .services.materialized import materialized_tips, warm_tip_space
+from .services.metrics import (
+    REGISTRY,
+    REWRITE_SOURCE,
+    Gauge,
+    MetricsMiddleware,
+    observe_stage,
+)
+from .services.profiling import ProfilingMiddleware, profiler, span
+from .services.recommendations import (
+    current_index,
+    describe_guidelines,
+    is_localized,
+    normalize_lang,
+    pick_tips_for_mask,
+    reload_guidelines,
+)
+from .services.rewrite_cache import rewrite_cache, rewrite_tips_cached
+from .services.risk_scoring import score_risk
+from .services.structured_logging import log_request, parse_sample_rates, setup_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queued structured records, written off the event loop)
+setup_logging(
+    level=config.LOG_LEVEL,
+    fmt=config.LOG_FORMAT,
+    redact=config.LOG_REDACT_FIELDS,
+    sample_rates=parse_sample_rates(config.LOG_SAMPLE_RATES),
+    default_sample_rate=config.LOG_SAMPLE_DEFAULT,
+    queue_size=config.LOG_QUEUE_SIZE,
+    skip_source_location=config.LOG_SKIP_SOURCE_LOCATION,
+)
 logger = logging.getLogger(__name__)
 
+
+async def _watch_guidelines(interval: float):
+    """Swap in a recompiled guideline index whenever the snippets file changes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Compiling the snippets and enumerating the tip space are CPU-bound; keep them off the loop
+            if await asyncio.to_thread(reload_guidelines):
+                await asyncio.to_thread(warm_tip_space)
+        except Exception as e:
+            logger.warning(
+                "Guideline reload failed, still serving version %s: %s",
+                current_index().version,
+                e,
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources (Granite connection pool, rewrite cache, tips artifact) on startup and close them on shutdown."""
+    await start_granite_client()
+    if not materialized_tips.loaded:
+        materialized_tips.load(config.MATERIALIZED_TIPS_PATH)
+    await asyncio.to_thread(warm_tip_space)  # used by /ready coverage
+    rewrite_cache.open_disk_tier(config.REWRITE_CACHE_DISK_PATH)
+    if config.ASSESSMENT_STORE_PATH:
+        assessment_writer.open(
+            open_store(config.ASSESSMENT_STORE_BACKEND, config.ASSESSMENT_STORE_PATH)
+        )
+    population.open(config.ANALYTICS_SNAPSHOT_PATH)
+    flusher = asyncio.create_task(
+        run_flusher(population, max(0.1, config.ANALYTICS_FLUSH_INTERVAL_SECONDS))
+    )
+    watcher = None
+    if config.GUIDELINES_RELOAD_INTERVAL_SECONDS > 0:
+        watcher = asyncio.create_task(
+            _watch_guidelines(config.GUIDELINES_RELOAD_INTERVAL_SECONDS)
+        )
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        flusher.cancel()
+        await close_granite_client()
+        rewrite_cache.close_disk_tier()
+        await asyncio.to_thread(assessment_writer.close)  # flushes queued assessments
+        try:
+            await population.flush()
+        except Exception as e:
+            logger.warning(
+                "Final analytics flush failed, unflushed counts are lost: %s", e
+            )
+        population.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="DiaWell - Diabetes Risk Assessment API",
     description="AI-powered diabetes risk assessment with personalized health recommendations",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Decode RiskInput/RecoInput bodies with msgspec when available (see services/codec.py)
+app.router.route_class = FastCodecRoute
+
 # Add CORS middleware for Flutter integration
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +152,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request profiling (X-Profile-Token), inside metrics so profiled requests still count
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so request counts and durations include CORS handling
+app.add_middleware(
+    MetricsMiddleware, paths=lambda: [route.path for route in app.routes]
+)
+
+REGISTRY.register(
+    Gauge(
+        "diawell_rewrite_cache",
+        "Rewrite cache size and counters",
+        ["stat"],
+        callback=lambda: {
+            (k,): float(v)
+            for k, v in rewrite_cache.stats().items()
+            if not isinstance(v, bool)
+        },
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "diawell_assessment_store",
+        "Assessment history writer queue and counters",
+        ["stat"],
+        callback=lambda: {
+            (k,): float(v)
+            for k, v in assessment_writer.stats().items()
+            if not isinstance(v, bool)
+        },
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "diawell_granite_admission",
+        "Granite calls running and waiting for an admission slot",
+        ["stat"],
+        callback=lambda: {
+            (k,): float(granite.admission.stats()[k])
+            for k in ("active", "queue_depth", "max_concurrent", "queue_size")
+        },
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "diawell_log_queue",
+        "Log records queued for the writer thread and dropped because the queue was full",
+        ["stat"],
+        callback=lambda: {
+            (k,): float(v) for k, v in structured_logging.stats().items()
+        },
+    )
+)
+
 
 @app.get("/")
 async def health_check():
@@ -38,47 +216,189 @@ async def health_check():
         "version": "1.0.0",
         "endpoints": {
             "risk_assessment": "/risk/submit",
+            "risk_assessment_batch": "/risk/submit/batch",
+            "risk_assessment_stream": "/risk/submit/stream",
             "recommendations": "/recommendations/generate",
-            "docs": "/docs"
-        }
+            "recommendations_cacheable": "/recommendations",
+            "readiness": "/ready",
+            "metrics": "/metrics",
+            "guidelines_reload": "/admin/guidelines/reload",
+            "risk_history": "/risk/history/{user_id}",
+            "population_analytics": "/analytics/population",
+            "profiles": "/admin/profiles",
+            "docs": "/docs",
+        },
+        "granite": {**granite.status(), "micro_batching": micro_batcher.stats()},
+        "rewrite_cache": rewrite_cache.stats(),
+        "assessment_store": assessment_writer.stats(),
+        "codec": codec.status(),
+        "profiling": profiler.stats(),
     }
 
 
-def pick_tips(level: str, flags: list[str]) -> dict:
-    """Pick appropriate tips based on risk level and flags."""
-    # Get base recommendations
-    health_recommendations = generate_health_recommendations(
-        risk_level=level,
-        flags=flags,
-        risk_score=0  # We don't need the score for tips selection
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, stage and Granite metrics."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
     )
-    
-    # Build tips_block with flat structure
-    tips_block = {
-        "headline": health_recommendations["headline"],
-        "actions": health_recommendations["recommendations"]["lifestyle"] + health_recommendations["recommendations"]["specific_actions"],
-        "disclaimer": health_recommendations["disclaimer"]
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe reporting how much of the tip space the materialized artifact covers."""
+    return {
+        "status": "ready",
+        "guidelines": describe_guidelines(),
+        "materialized_tips": materialized_tips.coverage(),
     }
-    
-    # Add red_flags only for High risk
-    if level == "High":
-        tips_block["red_flags"] = health_recommendations["red_flags"]
-    
-    return tips_block
+
+
+@app.post("/admin/guidelines/reload", dependencies=[Depends(require_admin_token)])
+async def reload_guideline_snippets():
+    """
+    Recompile guideline_snippets.json and swap it in without a restart (needs X-Admin-Token).
+
+    In-flight requests finish with the index they started with; cached
+    response fragments are keyed by guideline version and rebuild lazily.
+    """
+    try:
+        reloaded = await asyncio.to_thread(reload_guidelines, force=True)
+        if reloaded:
+            await asyncio.to_thread(warm_tip_space)
+    except Exception as e:
+        logger.error("Guideline reload failed: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Guideline reload failed; still serving version {current_index().version}",
+        )
+    return {"reloaded": reloaded, "guidelines": describe_guidelines()}
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Summaries of the request profiles kept by this worker, newest first (needs X-Profile-Token)."""
+    if not profiler.authorized(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {"profiles": profiler.recent(), "profiling": profiler.stats()}
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, request: Request):
+    """
+    One request profile as collapsed stacks (needs X-Profile-Token).
+
+    Feed the output to flamegraph.pl, inferno-flamegraph or speedscope. Profiles
+    live in the worker that served the request; see PROFILING_OUTPUT_DIR for
+    collecting them across workers.
+    """
+    profile = (
+        profiler.get(profile_id)
+        if profiler.authorized(request.headers.get("x-profile-token"))
+        else None
+    )
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(profile.collapsed())
+
+
+async def _rewrite_actions(actions: list[str], lang: str) -> Optional[list[str]]:
+    """
+    Rewrite tips with Granite, served from the materialized artifact or cache when possible.
+
+    Waits at most GRANITE_LATENCY_BUDGET_MS for the rewrite. If it misses the
+    budget the deterministic tips are used; the upstream call keeps running
+    in the background and fills the rewrite cache for later requests.
+    Languages with a local catalog skip Granite: their tips are already translated.
+    """
+    if is_localized(lang):
+        REWRITE_SOURCE.inc("localized")
+        return None
+    rewritten = materialized_tips.lookup(actions, lang)
+    if rewritten is not None:
+        REWRITE_SOURCE.inc("materialized")
+        return rewritten
+    budget = config.GRANITE_LATENCY_BUDGET_MS / 1000
+    try:
+        if budget <= 0:
+            rewritten = await rewrite_tips_cached(actions, lang=lang)
+        else:
+            # The cache shields its upstream task, so the timeout only abandons our wait
+            rewritten = await asyncio.wait_for(
+                rewrite_tips_cached(actions, lang=lang), timeout=budget
+            )
+    except asyncio.TimeoutError:
+        rewritten = None
+    REWRITE_SOURCE.inc("rewritten" if rewritten else "fallback")
+    return rewritten
+
+
+def _record_assessment(
+    patient_data: RiskInput, risk_score: int, risk_level: str, flag_mask: int
+) -> None:
+    """Count the result in population analytics and queue it for the history store if the caller sent a user_id (never blocks)."""
+    population.record(
+        patient_data.age, patient_data.gender, risk_score, risk_level, flag_mask
+    )
+    if patient_data.user_id and assessment_writer.enabled:
+        assessment_writer.submit(
+            AssessmentRecord(
+                patient_data.user_id,
+                time.time(),
+                risk_score,
+                risk_level,
+                flag_mask,
+                patient_data.lang or "en",
+                patient_data,
+            )
+        )
+
+
+async def _assess(patient_data: RiskInput, rewrite) -> tuple[int, str, bytes]:
+    """
+    Score one questionnaire, using `rewrite` for the Granite step.
+
+    Returns (risk_score, risk_level, body) where body is the serialized
+    RiskResponse built from a cached fragment.
+    """
+    started = time.perf_counter()
+
+    # Calculate risk score, level, and flags (as a bitmask)
+    risk_score, risk_level, flag_mask = score_risk(patient_data)
+    lang = patient_data.lang or "en"
+    _record_assessment(patient_data, risk_score, risk_level, flag_mask)
+    started = observe_stage("score", started)
+
+    # Pick tips based on risk level and flags
+    actions = pick_tips_for_mask(risk_level, flag_mask)["actions"]
+    started = observe_stage("tips", started)
+
+    # 🔹 AI rewrite step (Granite), queued by risk level if Granite is saturated
+    with risk_priority(risk_level), span("granite"):
+        rewritten = await rewrite(actions, lang)
+    started = observe_stage("granite", started)
+
+    # Render the cached response fragment with this request's score
+    fragment = risk_response_fragment(
+        risk_level, flag_mask, lang, tuple(rewritten) if rewritten else None
+    )
+    body = fragment.render(risk_score)
+    observe_stage("serialize", started)
+    return risk_score, risk_level, body
 
 
 @app.post("/risk/submit", response_model=RiskResponse)
-async def submit_risk_assessment(patient_data: RiskInput):
+async def submit_risk_assessment(patient_data: RiskInput, request: Request):
     """
     Submit patient questionnaire data for comprehensive diabetes risk assessment.
-    
+
     This endpoint calculates a risk score based on various health factors including:
     - Age, height, weight (BMI auto-calculated)
     - Blood pressure
     - Medical history (high glucose)
     - Lifestyle factors (physical activity, smoking, alcohol)
     - Family history of diabetes
-    
+
     Returns comprehensive assessment including:
     - Risk score and level classification
     - Identified risk factors
@@ -86,67 +406,376 @@ async def submit_risk_assessment(patient_data: RiskInput):
     - Priority actions and lifestyle tips
     - Medical guidance based on WHO, CDC, and ICMR guidelines
     """
+    started_at = getattr(request.state, "started_at", None)
+    if started_at is not None:
+        # Body read + RiskInput validation happen before the handler runs
+        observe_stage("parse_validate", started_at)
     try:
-        logger.info(f"Processing risk assessment for patient: {patient_data.name}")
-        
-        # Calculate risk score, level, and flags
-        risk_score, risk_level, flags = calculate_risk(patient_data)
-        
-        # Pick tips based on risk level and flags
-        tips_block = pick_tips(risk_level, flags)
-        
-        # 🔹 AI rewrite step (Granite)
-        rewritten = rewrite_tips_with_granite(tips_block["actions"], lang=patient_data.lang or "en")
-        if rewritten:
-            tips_block["actions"] = rewritten
-        
-        # Create comprehensive response with risk assessment and recommendations
-        response = RiskResponse(
-            risk_score=risk_score,
-            risk_level=risk_level,
-            flags=flags,
-            guideline=tips_block["headline"],
-            tips=tips_block
-        )
-        
-        logger.info(f"Risk assessment completed for {patient_data.name}: Score={risk_score}, Level={risk_level}")
-        return response
-        
+        risk_score, risk_level, body = await _assess(patient_data, _rewrite_actions)
+
+        log_request(
+            logger,
+            "/risk/submit",
+            "Risk assessment completed",
+            {
+                "name": patient_data.name,
+                "risk_score": risk_score,
+                "risk_level": risk_level,
+            },
+        )
+        return Response(content=body, media_type="application/json")
+
     except Exception as e:
-        logger.error(f"Error processing risk assessment: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error during risk assessment")
+        logger.error(
+            "Error processing risk assessment: %s",
+            e,
+            extra={"endpoint": "/risk/submit"},
+        )
+        raise HTTPException(
+            status_code=500, detail="Internal server error during risk assessment"
+        )
+
+
+@app.get("/risk/history/{user_id}", dependencies=[Depends(require_admin_token)])
+async def risk_history(
+    user_id: str,
+    limit: int = Query(
+        20,
+        ge=1,
+        le=config.ASSESSMENT_HISTORY_MAX_LIMIT,
+        description="Assessments per page",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
+):
+    """
+    Stored assessments for a user, newest first.
+
+    Returns stored health inputs, so it needs X-Admin-Token and is meant for
+    trusted backends (or a proxy that authenticates the user and adds the
+    token), never for direct calls from the app. Only submissions that included a `user_id` are stored. Results are
+    written in small batches, so an assessment can take up to
+    ASSESSMENT_WRITE_MAX_DELAY_MS to appear. Pass `next_cursor` back as
+    `cursor` to get the next page; it is null on the last page.
+    """
+    store = assessment_writer.store
+    if store is None:
+        raise HTTPException(status_code=503, detail="Assessment history is not enabled")
+    try:
+        before_id = decode_cursor(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    items = await asyncio.to_thread(store.history, user_id, limit + 1, before_id)
+    items, next_cursor = page(items, limit)
+    return {"user_id": user_id, "items": items, "next_cursor": next_cursor}
+
+
+@app.get("/analytics/population")
+async def population_analytics():
+    """
+    Population aggregates for dashboards.
+
+    Counts by risk level, flag prevalence, a 10-point score histogram,
+    breakdowns by age band and gender, and rollups for the last hour,
+    24 hours and 7 days. Counters are updated as assessments are scored, so
+    this costs the same regardless of how many exist. With
+    ANALYTICS_SNAPSHOT_PATH set, totals cover every worker sharing the file
+    and survive restarts; other workers' latest counts appear after their
+    next flush (ANALYTICS_FLUSH_INTERVAL_SECONDS).
+    """
+    return await population.snapshot()
+
+
+def _sse_event(event: str, data: bytes) -> bytes:
+    return b"event: %b\ndata: %b\n\n" % (event.encode(), data)
+
+
+@app.post(
+    "/risk/submit/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def submit_risk_assessment_stream(patient_data: RiskInput):
+    """
+    Streaming variant of /risk/submit using Server-Sent Events.
+
+    Events, in order:
+    - `assessment`: the full RiskResponse with deterministic tips, sent immediately
+    - `rewrite_delta`: Granite output chunks as they are generated (optional)
+    - `rewrite`: `{"actions": [...]}` with the AI-rewritten tips, if available
+    - `done`: `{"rewritten": true|false}`
+    """
+    risk_score, risk_level, flag_mask = score_risk(patient_data)
+    lang = patient_data.lang or "en"
+    _record_assessment(patient_data, risk_score, risk_level, flag_mask)
+    actions = pick_tips_for_mask(risk_level, flag_mask)["actions"]
+    first = risk_response_fragment(risk_level, flag_mask, lang).render(risk_score)
+
+    async def events():
+        yield _sse_event("assessment", first)
+        if is_localized(lang):
+            # Tips come from the local language catalog; nothing to translate
+            yield _sse_event("done", dumps({"rewritten": False}))
+            return
+
+        rewritten = materialized_tips.lookup(actions, lang)
+        if rewritten is None:
+            deltas: asyncio.Queue = asyncio.Queue()
+
+            async def stream_rewrite(
+                actions: list[str], lang: str
+            ) -> Optional[list[str]]:
+                # Runs as the cache's shared load task, so it outlives a disconnected client
+                chunks = []
+                with risk_priority(risk_level):
+                    async for chunk in stream_tips_with_granite(actions, lang):
+                        chunks.append(chunk)
+                        deltas.put_nowait(chunk)
+                return parse_bullets("".join(chunks)) if chunks else None
+
+            # Cache and disk hits (or joining another request's load) produce no deltas
+            load = asyncio.ensure_future(
+                rewrite_cache.get_or_load(actions, lang, stream_rewrite)
+            )
+            try:
+                while not load.done():
+                    delta = asyncio.ensure_future(deltas.get())
+                    await asyncio.wait(
+                        (delta, load), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not delta.done():
+                        delta.cancel()
+                        break
+                    yield _sse_event("rewrite_delta", dumps({"text": delta.result()}))
+                while not deltas.empty():
+                    yield _sse_event(
+                        "rewrite_delta", dumps({"text": deltas.get_nowait()})
+                    )
+                rewritten = load.result()
+            finally:
+                load.cancel()  # only abandons our wait; the load itself is shielded
+
+        if rewritten:
+            yield _sse_event("rewrite", dumps({"actions": rewritten}))
+        yield _sse_event("done", dumps({"rewritten": bool(rewritten)}))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+_BATCH_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {
+            "schema": {
+                "type": "array",
+                "items": {"$ref": "#/components/schemas/RiskInput"},
+            }
+        },
+        "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/RiskInput"}},
+    },
+}
+
+
+@app.post("/risk/submit/batch", openapi_extra={"requestBody": _BATCH_REQUEST_BODY})
+async def submit_risk_assessment_batch(request: Request):
+    """
+    Score many questionnaires in one request.
+
+    Accepts a JSON array of RiskInput objects or an NDJSON stream (one object
+    per line). Rows are scored as they arrive and results are streamed back
+    as NDJSON, in input order:
+    - `{"index": 0, "result": {...RiskResponse...}}` for scored rows
+    - `{"index": 1, "error": {"status": 422, "detail": [...]}}` for rejected rows
+    - a final `{"summary": {"rows": ..., "ok": ..., "errors": ...}}` line
+
+    Granite rewrites are shared across all rows with the same tips and language.
+    """
+    max_in_flight = max(1, config.BATCH_MAX_IN_FLIGHT)
+    rewrites: dict = {}
+
+    async def rewrite_once(actions: list[str], lang: str) -> Optional[list[str]]:
+        key = (lang, tuple(actions))
+        task = rewrites.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_rewrite_actions(actions, lang))
+            if len(rewrites) < config.BATCH_MAX_DISTINCT_REWRITES:
+                rewrites[key] = task
+        return await asyncio.shield(task)
+
+    def error_line(index: int, status: int, detail) -> tuple[bool, bytes]:
+        return (
+            False,
+            dumps({"index": index, "error": {"status": status, "detail": detail}})
+            + b"\n",
+        )
+
+    async def score_row(index: int, row) -> tuple[bool, bytes]:
+        if isinstance(row, RowError):
+            return error_line(index, 400, str(row))
+        try:
+            patient_data = validate_risk_row(row)
+        except ValidationError as e:
+            return error_line(index, 422, jsonable_encoder(e.errors(include_url=False)))
+        try:
+            _, _, body = await _assess(patient_data, rewrite_once)
+        except Exception as e:
+            logger.error(
+                "Error processing batch row %d: %s",
+                index,
+                e,
+                extra={"endpoint": "/risk/submit/batch"},
+            )
+            return error_line(
+                index, 500, "Internal server error during risk assessment"
+            )
+        return True, b'{"index":%d,"result":%b}\n' % (index, body)
+
+    async def results():
+        pending: deque = deque()
+        rows = ok = 0
+        try:
+            async for row in iter_json_rows(
+                request.stream(), config.BATCH_MAX_ROW_BYTES
+            ):
+                pending.append(asyncio.ensure_future(score_row(rows, row)))
+                rows += 1
+                # Bounded window: emit the oldest result before reading further ahead
+                while len(pending) >= max_in_flight:
+                    row_ok, line = await pending.popleft()
+                    ok += row_ok
+                    yield line
+            while pending:
+                row_ok, line = await pending.popleft()
+                ok += row_ok
+                yield line
+            yield dumps(
+                {"summary": {"rows": rows, "ok": ok, "errors": rows - ok}}
+            ) + b"\n"
+        finally:
+            # Client went away mid-stream: don't leave scoring tasks behind
+            for task in pending:
+                task.cancel()
+
+    return NDJSONStreamingResponse(results())
 
 
 @app.post("/recommendations/generate")
 async def generate_recommendations(reco_input: RecoInput):
     """
     Generate health recommendations based on risk assessment data.
-    
+
     This endpoint provides personalized health recommendations based on:
     - Risk level (Low, Medium, High)
     - Risk score (0-100)
     - Risk factor flags
-    
+    - Language (`lang`; es, fr and pt are served from local catalogs, others in English)
+
     Returns comprehensive health recommendations including lifestyle tips,
     priority actions, and medical guidance based on WHO, CDC, and ICMR guidelines.
     """
     try:
-        logger.info(f"Generating recommendations for risk level: {reco_input.risk_level}, score: {reco_input.risk_score}")
-        
-        recommendations = generate_health_recommendations(
-            risk_level=reco_input.risk_level,
-            flags=reco_input.flags,
-            risk_score=reco_input.risk_score
-        )
-        
-        logger.info(f"Recommendations generated successfully for {reco_input.risk_level} risk level")
-        return recommendations
-        
+        fragment = recommendations_fragment(
+            reco_input.risk_level, tuple(reco_input.flags), reco_input.lang or "en"
+        )
+
+        log_request(
+            logger,
+            "/recommendations/generate",
+            "Recommendations generated",
+            {"risk_level": reco_input.risk_level, "risk_score": reco_input.risk_score},
+        )
+        return Response(
+            content=fragment.render(reco_input.risk_score),
+            media_type="application/json",
+        )
+
+    except Exception as e:
+        logger.error(
+            "Error generating recommendations: %s",
+            e,
+            extra={"endpoint": "/recommendations/generate"},
+        )
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during recommendation generation",
+        )
+
+
+@app.get(
+    "/recommendations",
+    responses={
+        304: {"description": "Not modified"},
+        308: {"description": "Redirect to the canonical URL"},
+    },
+)
+async def get_recommendations(
+    request: Request,
+    risk_level: str = Query(..., description="Risk level (Low, Medium, High)"),
+    risk_score: int = Query(..., ge=0, le=100, description="Risk score (0-100)"),
+    flags: List[str] = Query(
+        [], description="Risk factor flags, repeated or comma-separated"
+    ),
+    lang: str = Query("en", description="Language preference"),
+):
+    """
+    Cacheable GET variant of /recommendations/generate.
+
+    Each distinct request has one canonical URL (fixed parameter order, flags
+    sorted and comma-joined, default lang omitted); other spellings get a 308
+    redirect to it. Responses carry a strong ETag derived from the guideline
+    version and `Cache-Control: public`, and If-None-Match revalidation
+    returns 304 Not Modified.
+    """
+    flag_tuple = canonical_flags(flags)
+    query = canonical_query(risk_level, risk_score, flag_tuple, lang)
+    if request.url.query != query:
+        return Response(
+            status_code=308,
+            headers={
+                "Location": f"{request.url.path}?{query}",
+                "Cache-Control": cache_control(
+                    config.RECOMMENDATIONS_REDIRECT_MAX_AGE_SECONDS
+                ),
+            },
+        )
+
+    index = current_index()
+    headers = {
+        "ETag": strong_etag(index.version, query),
+        "Cache-Control": cache_control(
+            config.RECOMMENDATIONS_CACHE_MAX_AGE_SECONDS,
+            config.RECOMMENDATIONS_STALE_WHILE_REVALIDATE_SECONDS,
+        ),
+    }
+    if if_none_match(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    try:
+        fragment = recommendations_fragment(
+            risk_level, flag_tuple, normalize_lang(lang)
+        )
+        return Response(
+            content=fragment.render(risk_score),
+            media_type="application/json",
+            headers=headers,
+        )
     except Exception as e:
-        logger.error(f"Error generating recommendations: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error during recommendation generation")
+        logger.error(
+            "Error generating recommendations: %s",
+            e,
+            extra={"endpoint": "/recommendations"},
+        )
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during recommendation generation",
+        )
 
 
 if __name__ == "__main__":
     import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,144 @@
+"""
+Admission control for upstream calls.
+
+At most `max_concurrent` calls run at once; the rest wait in a bounded
+queue ordered by priority (High risk first, then Medium, then Low, FIFO
+within a level). A caller that arrives to a full queue is shed straight
+away unless it outranks the lowest-priority waiter, which is shed in its
+place. Shed callers get False from acquire() and fall back instead of
+piling more load onto the upstream.
+
+The priority comes from a context variable so it follows a request into
+the tasks it spawns (rewrite cache loads, micro-batches) without being
+passed through every layer.
+"""
+
+import asyncio
+import heapq
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .risk_scoring import RISK_LEVELS
+
+# Lower value = served first; RISK_LEVELS runs from lowest to highest risk
+PRIORITIES: Dict[str, int] = {
+    level: len(RISK_LEVELS) - 1 - i for i, level in enumerate(RISK_LEVELS)
+}
+LOWEST_PRIORITY = len(RISK_LEVELS) - 1
+
+# Unlabelled work (scripts, background refreshes) queues behind every request
+current_priority: ContextVar[int] = ContextVar(
+    "upstream_priority", default=LOWEST_PRIORITY
+)
+
+
+def priority_for(risk_level: str) -> int:
+    return PRIORITIES.get(risk_level, LOWEST_PRIORITY)
+
+
+def priority_label(priority: int) -> str:
+    for level, value in PRIORITIES.items():
+        if value == priority:
+            return level
+    return str(priority)
+
+
+@contextmanager
+def risk_priority(risk_level: str) -> Iterator[None]:
+    """Run the enclosed upstream calls (and tasks started inside) at `risk_level`'s priority."""
+    token = current_priority.set(priority_for(risk_level))
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+Waiter = Tuple[int, int, "asyncio.Future"]
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 10, queue_size: int = 100):
+        self.max_concurrent = max(0, max_concurrent)
+        self.queue_size = max(0, queue_size)
+        self.active = 0
+        self._waiters: List[Waiter] = []
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {
+            priority_label(p): 0 for p in sorted(PRIORITIES.values())
+        }
+        self.displaced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    def _shed(self, priority: int) -> None:
+        label = priority_label(priority)
+        self.shed[label] = self.shed.get(label, 0) + 1
+
+    async def acquire(self, priority: Optional[int] = None) -> bool:
+        """
+        Wait for a slot. Returns True once admitted (call release() when done)
+        or False if the call was shed.
+        """
+        if not self.enabled:
+            return True
+        if priority is None:
+            priority = current_priority.get()
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.queue_size:
+            worst = max(self._waiters) if self._waiters else None
+            if worst is None or worst[0] <= priority:
+                self._shed(priority)
+                return False
+            # Make room by shedding the newest waiter of the lowest priority
+            self._waiters.remove(worst)
+            heapq.heapify(self._waiters)
+            worst[2].set_result(False)
+            self._shed(worst[0])
+            self.displaced += 1
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, waiter)
+        self.queued += 1
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.result():
+                self.release()  # granted a slot just as we were cancelled: hand it on
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        """Give the slot to the highest-priority waiter, or free it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                self.admitted += 1
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "displaced": self.displaced,
+        }
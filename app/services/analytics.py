@@ -0,0 +1,325 @@
+"""
+Incrementally maintained population analytics.
+
+Every scored assessment bumps a fixed set of counters: totals and risk
+levels, per-flag counts, a score histogram, age band and gender breakdowns,
+and per-minute / per-hour rollups for time windows. Reading the aggregates
+costs the same however many assessments have been scored.
+
+Counters accumulate in a pending dict on the event loop and are merged into
+the totals by flush(). With ANALYTICS_SNAPSHOT_PATH set, flush() adds them to
+a SQLite table instead (WAL, additive upserts), so aggregates survive
+restarts and are shared by all workers writing to the same file.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from .risk_scoring import FLAG_NAMES, RISK_LEVELS
+
+logger = logging.getLogger(__name__)
+
+# (scope, bucket, name): scope "all" uses bucket 0, "minute"/"hour" use epoch minutes/hours
+Key = Tuple[str, int, str]
+
+SCORE_BUCKET_WIDTH = 10
+SCORE_BUCKETS = tuple(
+    f"{low}-{low + SCORE_BUCKET_WIDTH - 1}" for low in range(0, 90, SCORE_BUCKET_WIDTH)
+) + ("90-100",)
+
+# (label, lowest age) in ascending order
+AGE_BANDS = (("10-29", 10), ("30-44", 30), ("45-59", 45), ("60-74", 60), ("75+", 75))
+GENDERS = ("female", "male", "other")
+
+# name -> (time scope, buckets covered)
+WINDOWS = {
+    "last_hour": ("minute", 60),
+    "last_24h": ("hour", 24),
+    "last_7d": ("hour", 24 * 7),
+}
+_RETENTION = {"minute": 120, "hour": 24 * 7 + 1}
+
+
+def age_band(age: int) -> str:
+    label = AGE_BANDS[0][0]
+    for band, lowest in AGE_BANDS:
+        if age >= lowest:
+            label = band
+    return label
+
+
+def gender_group(gender: str) -> str:
+    """Free-text gender folded into a fixed set so breakdowns stay bounded."""
+    value = (gender or "").strip().lower()
+    return value if value in GENDERS else "other"
+
+
+def _group_keys(prefix: str) -> Dict[str, Key]:
+    keys = {
+        "n": ("all", 0, f"{prefix}n"),
+        "score_sum": ("all", 0, f"{prefix}score_sum"),
+    }
+    keys.update({level: ("all", 0, f"{prefix}level:{level}") for level in RISK_LEVELS})
+    return keys
+
+
+class _AnalyticsDB:
+    """Additive counter table in SQLite."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analytics_counters ("
+            " scope TEXT NOT NULL, bucket INTEGER NOT NULL, name TEXT NOT NULL, value INTEGER NOT NULL,"
+            " PRIMARY KEY (scope, bucket, name))"
+        )
+
+    def merge(self, delta: Dict[Key, int], cutoffs: Dict[str, int]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO analytics_counters (scope, bucket, name, value) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (scope, bucket, name) DO UPDATE SET value = value + excluded.value",
+                    [
+                        (scope, bucket, name, value)
+                        for (scope, bucket, name), value in delta.items()
+                    ],
+                )
+                for scope, cutoff in cutoffs.items():
+                    self._conn.execute(
+                        "DELETE FROM analytics_counters WHERE scope = ? AND bucket < ?",
+                        (scope, cutoff),
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def read(self) -> Dict[Key, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT scope, bucket, name, value FROM analytics_counters"
+            ).fetchall()
+        return {(scope, bucket, name): value for scope, bucket, name, value in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PopulationAnalytics:
+    def __init__(self):
+        self._pending: Dict[Key, int] = defaultdict(int)
+        self._totals: Dict[Key, int] = {}
+        self._db: Optional[_AnalyticsDB] = None
+        self.path: Optional[str] = None
+        self.last_flush: Optional[float] = None
+        # Precomputed keys so record() only does dict increments
+        self._total_keys = _group_keys("")
+        self._flag_keys = tuple(("all", 0, f"flag:{flag}") for flag in FLAG_NAMES)
+        self._score_keys = tuple(
+            ("all", 0, f"score_bucket:{label}") for label in SCORE_BUCKETS
+        )
+        self._age_keys = {band: _group_keys(f"age:{band}:") for band, _ in AGE_BANDS}
+        self._gender_keys = {
+            gender: _group_keys(f"gender:{gender}:") for gender in GENDERS
+        }
+        self._window_keys: Dict[str, Tuple[int, Dict[str, Key]]] = {}
+
+    def open(self, path: Optional[str]) -> None:
+        """Persist counters to a SQLite snapshot file (shared by every worker using it)."""
+        if path:
+            self._db = _AnalyticsDB(path)
+            self.path = path
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _window(self, scope: str, bucket: int) -> Dict[str, Key]:
+        cached = self._window_keys.get(scope)
+        if cached is None or cached[0] != bucket:
+            keys = {
+                "n": (scope, bucket, "n"),
+                "score_sum": (scope, bucket, "score_sum"),
+            }
+            keys.update(
+                {level: (scope, bucket, f"level:{level}") for level in RISK_LEVELS}
+            )
+            cached = self._window_keys[scope] = (bucket, keys)
+        return cached[1]
+
+    def record(
+        self,
+        age: int,
+        gender: str,
+        risk_score: int,
+        risk_level: str,
+        flag_mask: int,
+        now: Optional[float] = None,
+    ) -> None:
+        """Count one scored assessment (event loop only; a handful of dict increments)."""
+        pending = self._pending
+        minute = int((now or time.time()) // 60)
+        groups = (
+            self._total_keys,
+            self._age_keys[age_band(age)],
+            self._gender_keys[gender_group(gender)],
+            self._window("minute", minute),
+            self._window("hour", minute // 60),
+        )
+        for keys in groups:
+            pending[keys["n"]] += 1
+            pending[keys["score_sum"]] += risk_score
+            level_key = keys.get(risk_level)
+            if level_key is not None:
+                pending[level_key] += 1
+
+        pending[
+            self._score_keys[
+                min(max(risk_score, 0) // SCORE_BUCKET_WIDTH, len(SCORE_BUCKETS) - 1)
+            ]
+        ] += 1
+        flag_keys = self._flag_keys
+        while flag_mask:
+            low = flag_mask & -flag_mask
+            pending[flag_keys[low.bit_length() - 1]] += 1
+            flag_mask ^= low
+
+    @staticmethod
+    def _cutoffs(now: float) -> Dict[str, int]:
+        minute = int(now // 60)
+        return {
+            "minute": minute - _RETENTION["minute"],
+            "hour": minute // 60 - _RETENTION["hour"],
+        }
+
+    async def flush(self) -> None:
+        """Merge pending counters into the totals (or the snapshot file) and prune old windows."""
+        delta, self._pending = self._pending, defaultdict(int)
+        now = time.time()
+        cutoffs = self._cutoffs(now)
+        if self._db is not None:
+            if delta or self.last_flush is None:
+                try:
+                    await asyncio.to_thread(self._db.merge, delta, cutoffs)
+                except Exception:
+                    # merge() rolls back as a whole, so keep the counts for the next flush
+                    pending = self._pending
+                    for key, value in delta.items():
+                        pending[key] += value
+                    raise
+        else:
+            totals = self._totals
+            for key, value in delta.items():
+                totals[key] = totals.get(key, 0) + value
+            for key in [k for k in totals if k[0] in cutoffs and k[1] < cutoffs[k[0]]]:
+                del totals[key]
+        self.last_flush = now
+
+    async def snapshot(self) -> Dict[str, object]:
+        """Current aggregates, including counts not yet flushed by this process."""
+        pending = dict(self._pending)
+        if self._db is not None:
+            counters = await asyncio.to_thread(self._db.read)
+        else:
+            counters = dict(self._totals)
+        for key, value in pending.items():
+            counters[key] = counters.get(key, 0) + value
+        return self.render(counters, time.time())
+
+    @staticmethod
+    def _group(counters: Dict[Key, int], keys: Dict[str, Key]) -> Dict[str, object]:
+        n = counters.get(keys["n"], 0)
+        return {
+            "total": n,
+            "mean_score": (
+                round(counters.get(keys["score_sum"], 0) / n, 2) if n else None
+            ),
+            "risk_levels": {
+                level: counters.get(keys[level], 0) for level in RISK_LEVELS
+            },
+        }
+
+    def _window_sum(
+        self, counters: Dict[Key, int], scope: str, first: int, last: int
+    ) -> Dict[str, object]:
+        sums: Dict[str, int] = {}
+        for bucket in range(first, last + 1):
+            for name in (
+                "n",
+                "score_sum",
+                *(f"level:{level}" for level in RISK_LEVELS),
+            ):
+                value = counters.get((scope, bucket, name))
+                if value:
+                    sums[name] = sums.get(name, 0) + value
+        keys = {
+            "n": "n",
+            "score_sum": "score_sum",
+            **{level: f"level:{level}" for level in RISK_LEVELS},
+        }
+        return self._group(sums, keys)
+
+    def render(self, counters: Dict[Key, int], now: float) -> Dict[str, object]:
+        total = counters.get(self._total_keys["n"], 0)
+        minute = int(now // 60)
+        current = {"minute": minute, "hour": minute // 60}
+        return {
+            **self._group(counters, self._total_keys),
+            "flags": {
+                flag: {
+                    "count": counters.get(key, 0),
+                    "prevalence": (
+                        round(counters.get(key, 0) / total, 4) if total else 0.0
+                    ),
+                }
+                for flag, key in zip(FLAG_NAMES, self._flag_keys)
+            },
+            "score_histogram": {
+                "buckets": list(SCORE_BUCKETS),
+                "counts": [counters.get(key, 0) for key in self._score_keys],
+            },
+            "by_age_band": {
+                band: self._group(counters, keys)
+                for band, keys in self._age_keys.items()
+            },
+            "by_gender": {
+                gender: self._group(counters, keys)
+                for gender, keys in self._gender_keys.items()
+            },
+            "windows": {
+                name: self._window_sum(
+                    counters, scope, current[scope] - span + 1, current[scope]
+                )
+                for name, (scope, span) in WINDOWS.items()
+            },
+            "as_of": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)),
+            "source": "sqlite" if self._db is not None else "memory",
+        }
+
+
+async def run_flusher(analytics: PopulationAnalytics, interval: float) -> None:
+    """Flush pending counters every `interval` seconds until cancelled; failed flushes are retried."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await analytics.flush()
+        except Exception as e:
+            logger.warning("Analytics flush failed, retrying in %.1fs: %s", interval, e)
+
+
+population = PopulationAnalytics()
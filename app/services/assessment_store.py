@@ -0,0 +1,315 @@
+"""
+Persistent assessment history.
+
+Scored assessments that carry a ``user_id`` are handed to a background
+writer thread that group-commits them to a pluggable store (SQLite in WAL
+mode by default), so the request path only enqueues. History is read back
+per user, newest first, with cursor pagination on the row id.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from enum import Enum
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from .risk_scoring import decode_flag_mask
+
+try:
+    from .. import config  # our local config file
+except ImportError:
+    config = None
+
+logger = logging.getLogger(__name__)
+
+# Questionnaire fields kept with each assessment (the patient name is not stored)
+INPUT_FIELDS = (
+    "age",
+    "gender",
+    "height",
+    "weight",
+    "bmi",
+    "bp_sys",
+    "bp_dia",
+    "history_high_glucose",
+    "physical_activity_hours_per_week",
+    "family_history_diabetes",
+    "smoking_status",
+    "alcohol_status",
+)
+
+
+class AssessmentRecord(NamedTuple):
+    """One scored assessment as queued by the request path."""
+
+    user_id: str
+    created_at: float
+    risk_score: int
+    risk_level: str
+    flag_mask: int
+    lang: str
+    patient: object  # RiskInput or RiskInputStruct; read on the writer thread
+
+
+def inputs_json(patient) -> str:
+    inputs = {}
+    for field in INPUT_FIELDS:
+        value = getattr(patient, field)
+        inputs[field] = value.value if isinstance(value, Enum) else value
+    return json.dumps(inputs, ensure_ascii=False, separators=(",", ":"))
+
+
+class AssessmentStore:
+    """Storage backend interface. Implementations are used from the writer thread and via asyncio.to_thread."""
+
+    def write_many(self, records: Sequence[AssessmentRecord]) -> None:
+        """Persist a batch of records in one transaction."""
+        raise NotImplementedError
+
+    def history(
+        self, user_id: str, limit: int, before_id: Optional[int] = None
+    ) -> List[Dict[str, object]]:
+        """Up to `limit` assessments for `user_id` with id < before_id, newest first."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteAssessmentStore(AssessmentStore):
+    """SQLite in WAL mode: one writer connection, one reader connection."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._write_conn = self._connect()
+        self._write_conn.executescript(
+            "CREATE TABLE IF NOT EXISTS assessments ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " user_id TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " risk_score INTEGER NOT NULL,"
+            " risk_level TEXT NOT NULL,"
+            " flag_mask INTEGER NOT NULL,"
+            " lang TEXT NOT NULL,"
+            " inputs TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS assessments_user_id ON assessments (user_id, id);"
+        )
+        self._read_lock = threading.Lock()
+        self._read_conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "PRAGMA synchronous=NORMAL"
+        )  # durable at checkpoints; commits don't fsync
+        conn.execute(
+            "PRAGMA busy_timeout=5000"
+        )  # other workers may hold the write lock briefly
+        return conn
+
+    def write_many(self, records: Sequence[AssessmentRecord]) -> None:
+        rows = [
+            (
+                r.user_id,
+                r.created_at,
+                r.risk_score,
+                r.risk_level,
+                r.flag_mask,
+                r.lang,
+                inputs_json(r.patient),
+            )
+            for r in records
+        ]
+        conn = self._write_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO assessments (user_id, created_at, risk_score, risk_level, flag_mask, lang, inputs)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def history(
+        self, user_id: str, limit: int, before_id: Optional[int] = None
+    ) -> List[Dict[str, object]]:
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT id, created_at, risk_score, risk_level, flag_mask, lang, inputs FROM assessments"
+                " WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (user_id, before_id if before_id is not None else 2**63 - 1, limit),
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(row[1])),
+                "risk_score": row[2],
+                "risk_level": row[3],
+                "flags": decode_flag_mask(row[4]),
+                "lang": row[5],
+                "inputs": json.loads(row[6]),
+            }
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        self._write_conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+
+STORE_BACKENDS: Dict[str, Type[AssessmentStore]] = {
+    "sqlite": SQLiteAssessmentStore,
+}
+
+
+def open_store(backend: str, path: str) -> AssessmentStore:
+    try:
+        store_cls = STORE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown assessment store backend {backend!r} (known: {', '.join(STORE_BACKENDS)})"
+        )
+    return store_cls(path)
+
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Background thread that batches queued records into one transaction.
+
+    submit() never blocks: a full queue drops the record and counts it. The
+    writer commits when it has `batch_size` records or `max_delay_ms` after
+    the first record of a batch arrived, whichever comes first.
+    """
+
+    def __init__(
+        self, batch_size: int = 256, max_delay_ms: float = 50.0, queue_size: int = 50000
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max(0.0, max_delay_ms) / 1000
+        self.queue_size = max(1, queue_size)
+        self.store: Optional[AssessmentStore] = None
+        self._queue: "queue.Queue" = queue.Queue(self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def open(self, store: AssessmentStore) -> None:
+        self.store = store
+        self._queue = queue.Queue(self.queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="assessment-writer", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Flush everything queued so far, then stop the thread and close the store."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def submit(self, record: AssessmentRecord) -> bool:
+        if self.store is None:
+            return False
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[AssessmentRecord] = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List[AssessmentRecord]) -> None:
+        try:
+            self.store.write_many(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error("Failed to store %d assessments: %s", len(batch), e)
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": (
+                round(self.written / self.batches, 2) if self.batches else 0.0
+            ),
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def encode_cursor(row_id: int) -> str:
+    return str(row_id)
+
+
+def decode_cursor(cursor: str) -> int:
+    """Parse a cursor from a previous page. Raises ValueError if it isn't one."""
+    row_id = int(cursor)
+    if row_id <= 0:
+        raise ValueError("cursor must be positive")
+    return row_id
+
+
+def page(
+    items: List[Dict[str, object]], limit: int
+) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    """Trim a limit+1 query result to `limit` items and the cursor for the next page."""
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1]["id"])
+    return items, None
+
+
+assessment_writer = GroupCommitWriter(
+    batch_size=getattr(config, "ASSESSMENT_WRITE_BATCH_SIZE", 256),
+    max_delay_ms=getattr(config, "ASSESSMENT_WRITE_MAX_DELAY_MS", 50.0),
+    queue_size=getattr(config, "ASSESSMENT_WRITE_QUEUE_SIZE", 50000),
+)
@@ -0,0 +1,31 @@
+"""
+Token check for admin and internal endpoints.
+
+The API has no user accounts, so endpoints that change server state or
+return stored health data stay closed unless ADMIN_TOKEN is set. Callers
+must then send `X-Admin-Token: <ADMIN_TOKEN>`. Any other caller gets a 404,
+as if the endpoint did not exist.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+try:
+    from .. import config  # our local config file
+except ImportError:
+    config = None
+
+
+def token_matches(supplied: Optional[str], expected: str) -> bool:
+    """Constant-time token comparison; an empty expected token never matches."""
+    if not expected or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode("utf-8"), expected.encode("utf-8"))
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """FastAPI dependency rejecting requests without the configured admin token."""
+    if not token_matches(x_admin_token, getattr(config, "ADMIN_TOKEN", "")):
+        raise HTTPException(status_code=404, detail="Not Found")
@@ -0,0 +1,145 @@
+"""
+Incremental JSON row reader and NDJSON response for bulk risk submission.
+
+Rows are parsed from the request body as it arrives, either as a JSON array
+or as newline-delimited JSON, so memory stays bounded by the largest row
+rather than by the size of the upload.
+"""
+
+import codecs
+import json
+from typing import AsyncIterator, Union
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+_WHITESPACE = " \t\r\n"
+
+
+class RowError(Exception):
+    """A row that could not be parsed; reported per row instead of failing the batch."""
+
+
+async def iter_json_rows(
+    chunks: AsyncIterator[bytes], max_row_bytes: int = 65536
+) -> AsyncIterator[Union[object, RowError]]:
+    """
+    Yield parsed rows from a JSON array or NDJSON byte stream.
+
+    The format is detected from the first non-whitespace character: ``[``
+    starts a JSON array, anything else is treated as NDJSON. Malformed rows
+    are yielded as RowError instances. An unrecoverable array syntax error
+    yields one RowError and stops.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    json_decoder = json.JSONDecoder()
+    buf = ""
+    mode = None  # "array" or "ndjson"
+    finished = False
+
+    async def more() -> bool:
+        nonlocal buf
+        async for chunk in chunk_iter:
+            if chunk:
+                buf += decoder.decode(chunk)
+                return True
+        buf += decoder.decode(b"", final=True)
+        return False
+
+    chunk_iter = chunks.__aiter__()
+    has_more = True
+
+    while mode is None:
+        stripped = buf.lstrip(_WHITESPACE)
+        if stripped:
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            buf = stripped[1:] if mode == "array" else stripped
+        elif not has_more:
+            return
+        else:
+            has_more = await more()
+
+    if mode == "ndjson":
+        while True:
+            newline = buf.find("\n")
+            if newline == -1:
+                if len(buf) > max_row_bytes:
+                    yield RowError(f"Row exceeds {max_row_bytes} bytes")
+                    return
+                if has_more:
+                    has_more = await more()
+                    continue
+                line, buf = buf, ""
+            else:
+                line, buf = buf[:newline], buf[newline + 1 :]
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield RowError(f"Invalid JSON: {e}")
+            if not buf and not has_more:
+                return
+
+    # JSON array: decode one element at a time with raw_decode
+    expect_value = True
+    while not finished:
+        pos = 0
+        while pos < len(buf) and (
+            buf[pos] in _WHITESPACE or (buf[pos] == "," and not expect_value)
+        ):
+            if buf[pos] == ",":
+                expect_value = True
+            pos += 1
+        buf = buf[pos:]
+
+        if not buf:
+            if not has_more:
+                yield RowError("Unexpected end of JSON array")
+                return
+            has_more = await more()
+            continue
+
+        if buf[0] == "]":
+            finished = True
+            break
+        if not expect_value:
+            yield RowError("Invalid JSON: expected ',' or ']' after a row")
+            return
+
+        try:
+            row, end = json_decoder.raw_decode(buf)
+        except ValueError as e:
+            if has_more and len(buf) <= max_row_bytes:
+                has_more = await more()
+                continue
+            if len(buf) > max_row_bytes:
+                yield RowError(f"Row exceeds {max_row_bytes} bytes")
+            else:
+                yield RowError(f"Invalid JSON: {e}")
+            return
+        if has_more and not buf[end:].lstrip(_WHITESPACE):
+            # A number or literal cut at the chunk boundary still decodes
+            # ("12" of "123"): only accept it once the next ',' or ']' is here
+            has_more = await more()
+            continue
+        buf = buf[end:]
+        expect_value = False
+        yield row
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming NDJSON response that leaves ``receive`` to the endpoint.
+
+    StreamingResponse normally listens for client disconnects on ``receive``,
+    which would race the endpoint for request body messages while it is still
+    reading rows. Here the body iterator owns ``receive`` for the whole call.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,202 @@
+"""
+Optional fast codec for the JSON hot path.
+
+With msgspec installed (and FAST_CODEC not "off"), request bodies for the
+single-questionnaire endpoints are decoded straight into compact structs
+that mirror app.models (same ranges, enums and BMI default), skipping
+FastAPI's body parsing and pydantic validation. Anything msgspec rejects is
+handed to the regular pydantic path, so 422 responses keep FastAPI's exact
+shape, and the OpenAPI schema still comes from the unchanged route
+definitions. orjson, when installed, encodes response fragments and
+streamed rows.
+"""
+
+import inspect
+import json
+import logging
+from typing import Annotated, Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+from ..models import (
+    AlcoholStatus,
+    FamilyHistoryDiabetes,
+    RecoInput,
+    RiskInput,
+    SmokingStatus,
+)
+
+try:
+    import msgspec
+    from msgspec import Meta
+except ImportError:  # msgspec is only needed for the fast codec
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from .. import config  # our local config file
+except ImportError:
+    config = None
+
+logger = logging.getLogger(__name__)
+
+_MODE = str(getattr(config, "FAST_CODEC", "auto")).lower()
+if _MODE in ("1", "true", "yes", "on") and msgspec is None:
+    logger.warning("FAST_CODEC is on but msgspec is not installed; using pydantic")
+
+FAST_CODEC = msgspec is not None and _MODE not in ("0", "false", "no", "off")
+ORJSON = orjson is not None and _MODE not in ("0", "false", "no", "off")
+
+
+def dumps(obj) -> bytes:
+    """Serialize like Starlette's JSONResponse (compact, UTF-8)."""
+    if ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+if msgspec is not None:
+
+    class RiskInputStruct(msgspec.Struct, kw_only=True, gc=False):
+        """RiskInput as a msgspec struct. Keep in sync with app.models.RiskInput."""
+
+        name: str
+        age: Annotated[int, Meta(ge=10, le=120)]
+        gender: str
+        height: Annotated[float, Meta(ge=50, le=250)]
+        weight: Annotated[float, Meta(ge=10, le=300)]
+        bmi: Optional[Annotated[float, Meta(ge=10, le=100)]] = None
+        bp_sys: Annotated[int, Meta(ge=60, le=250)]
+        bp_dia: Annotated[int, Meta(ge=40, le=150)]
+        history_high_glucose: bool
+        physical_activity_hours_per_week: Annotated[float, Meta(ge=0, le=168)]
+        family_history_diabetes: FamilyHistoryDiabetes
+        smoking_status: SmokingStatus
+        alcohol_status: AlcoholStatus
+        lang: str = "en"
+        user_id: Optional[Annotated[str, Meta(min_length=1, max_length=128)]] = None
+
+        def __post_init__(self):
+            if self.bmi is None:
+                height_m = self.height / 100  # Convert cm to meters
+                self.bmi = round(self.weight / (height_m**2), 1)
+
+    class RecoInputStruct(msgspec.Struct, gc=False):
+        """RecoInput as a msgspec struct. Keep in sync with app.models.RecoInput."""
+
+        risk_level: str
+        risk_score: Annotated[int, Meta(ge=0, le=100)]
+        flags: List[str]
+        lang: str = "en"
+
+    _STRUCTS: Dict[type, type] = {
+        RiskInput: RiskInputStruct,
+        RecoInput: RecoInputStruct,
+    }
+    _DECODERS = {
+        model: msgspec.json.Decoder(struct) for model, struct in _STRUCTS.items()
+    }
+    _INVALID = (msgspec.ValidationError, msgspec.DecodeError)
+else:
+    _STRUCTS = {}
+    _DECODERS = {}
+    _INVALID = ()
+
+
+def validate_risk_row(row, strict: bool = True):
+    """
+    Validate one already-parsed RiskInput row.
+
+    Returns a RiskInputStruct on the fast path, or a RiskInput; raises
+    pydantic's ValidationError for invalid rows either way. Pass
+    strict=False for rows of strings (e.g. CSV) so "45" or "true" convert
+    on the fast path too.
+    """
+    if FAST_CODEC:
+        try:
+            return msgspec.convert(row, RiskInputStruct, strict=strict)
+        except _INVALID:
+            pass  # let pydantic coerce it or produce the usual error details
+    return RiskInput.model_validate(row)
+
+
+def _is_json(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or (
+        media_type.startswith("application/") and media_type.endswith("+json")
+    )
+
+
+class FastCodecRoute(APIRoute):
+    """
+    APIRoute that decodes the request body with msgspec when it can.
+
+    Applies to routes whose only inputs are one RiskInput/RecoInput body
+    (plus, optionally, the Request) and whose endpoint returns a Response.
+    Other routes, and bodies msgspec rejects, use FastAPI's normal handler.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        decoder = self._fast_decoder()
+        if decoder is None:
+            return handler
+
+        endpoint = self.endpoint
+        body_name = self.dependant.body_params[0].name
+        request_name = self.dependant.request_param_name
+
+        async def fast_handler(request: Request) -> Response:
+            if not _is_json(request.headers.get("content-type", "")):
+                return await handler(request)
+            try:
+                value = decoder.decode(await request.body())
+            except _INVALID:
+                return await handler(request)  # body is cached on the request
+            kwargs = {body_name: value}
+            if request_name:
+                kwargs[request_name] = request
+            response = await endpoint(**kwargs)
+            if not isinstance(response, Response):
+                raise TypeError(
+                    f"{self.path} must return a Response to use the fast codec"
+                )
+            return response
+
+        return fast_handler
+
+    def _fast_decoder(self):
+        if not FAST_CODEC or not inspect.iscoroutinefunction(self.endpoint):
+            return None
+        dependant = self.dependant
+        if len(dependant.body_params) != 1 or getattr(
+            dependant.body_params[0].field_info, "embed", False
+        ):
+            return None
+        if (
+            dependant.path_params
+            or dependant.query_params
+            or dependant.header_params
+            or dependant.cookie_params
+            or dependant.dependencies
+            or dependant.background_tasks_param_name
+            or dependant.response_param_name
+        ):
+            return None
+        return _DECODERS.get(dependant.body_params[0].field_info.annotation)
+
+
+def status() -> Dict[str, object]:
+    return {
+        "fast_codec": FAST_CODEC,
+        "msgspec": getattr(msgspec, "__version__", None),
+        "orjson": ORJSON,
+    }
@@ -0,0 +1,109 @@
+"""
+Pre-serialized response fragments.
+
+For a given risk level, flag mask and language the tips/recommendations
+payload never changes, so it is rendered to JSON bytes once and cached.
+Only the per-request risk score is spliced in at response time. Cache
+entries are keyed by the guideline index version, so a snippets reload
+never serves fragments rendered from the previous file.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from .codec import dumps
+from .recommendations import (
+    DEFAULT_LANG,
+    current_index,
+    generate_health_recommendations,
+    pick_tips_for_mask,
+)
+from .risk_scoring import decode_flag_mask, encode_flags
+
+# Placeholder score used to find the splice point in a rendered payload
+_SCORE_MARKER = -7340033
+
+
+class Fragment(NamedTuple):
+    """A JSON document split around its risk score."""
+
+    prefix: bytes
+    suffix: bytes
+
+    def render(self, risk_score: int) -> bytes:
+        return b"%b%d%b" % (self.prefix, risk_score, self.suffix)
+
+    @classmethod
+    def split(cls, payload: bytes, key: bytes) -> "Fragment":
+        marker = b'"%b":%d' % (key, _SCORE_MARKER)
+        prefix, found, suffix = payload.partition(marker)
+        if not found:
+            raise ValueError(f"score marker not found for {key!r}")
+        return cls(prefix + b'"%b":' % key, suffix)
+
+
+def risk_response_fragment(
+    risk_level: str,
+    flag_mask: int,
+    lang: str,
+    actions: Optional[Tuple[str, ...]] = None,
+) -> Fragment:
+    """
+    RiskResponse body for (risk_level, flag_mask, lang), optionally with rewritten actions.
+
+    Field order matches RiskResponse so the bytes equal what FastAPI would send.
+    """
+    return _risk_response_fragment(
+        current_index().version, risk_level, flag_mask, lang, actions
+    )
+
+
+@lru_cache(maxsize=4096)
+def _risk_response_fragment(
+    version: str,
+    risk_level: str,
+    flag_mask: int,
+    lang: str,
+    actions: Optional[Tuple[str, ...]],
+) -> Fragment:
+    tips_block = pick_tips_for_mask(risk_level, flag_mask, lang)
+    if actions:
+        tips_block["actions"] = list(actions)
+    payload = dumps(
+        {
+            "risk_score": _SCORE_MARKER,
+            "risk_level": risk_level,
+            "flags": decode_flag_mask(flag_mask),
+            "guideline": tips_block["headline"],
+            "tips": tips_block,
+        }
+    )
+    return Fragment.split(payload, b"risk_score")
+
+
+def recommendations_fragment(
+    risk_level: str, flags: Tuple[str, ...], lang: str = DEFAULT_LANG
+) -> Fragment:
+    """generate_health_recommendations output for (risk_level, flags, lang), split at risk_summary.score."""
+    return _recommendations_fragment(current_index().version, risk_level, flags, lang)
+
+
+@lru_cache(maxsize=4096)
+def _recommendations_fragment(
+    version: str, risk_level: str, flags: Tuple[str, ...], lang: str
+) -> Fragment:
+    payload = dumps(
+        generate_health_recommendations(
+            risk_level=risk_level,
+            flags=list(flags),
+            risk_score=_SCORE_MARKER,
+            flag_mask=encode_flags(flags),
+            lang=lang,
+        )
+    )
+    return Fragment.split(payload, b"score")
+
+
+def clear_fragment_caches() -> None:
+    _risk_response_fragment.cache_clear()
+    _recommendations_fragment.cache_clear()
@@ -1,46 +1,336 @@
-import requests, json
+# Granite (IBM WatsonX) tip rewriting service
+from __future__ import annotations  # `X | None` annotations on Python 3.9
+
+import asyncio
+import json
+import logging
+import re
+from typing import AsyncIterator
+
+import httpx
+
+from .admission import AdmissionController, current_priority, priority_label
+from .circuit_breaker import CircuitBreaker
+from .metrics import GRANITE_CALLS, GRANITE_SHED
 
 try:
     from .. import config  # our local config file
 except ImportError:
     config = None
 
-def rewrite_tips_with_granite(actions: list[str], lang: str = "en") -> list[str] | None:
-    url       = getattr(config, "IBM_WX_URL", None)
-    api_key   = getattr(config, "IBM_WX_API_KEY", None)
-    project_id = getattr(config, "IBM_WX_PROJECT_ID", None)
-    model_id   = getattr(config, "IBM_WX_MODEL_ID", "ibm/granite-13b-instruct")
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx when installed)
+
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SYS_PROMPT = (
+    "You are a health coach. Rewrite the given action tips to be empathetic and "
+    "simple for a 15-year-old. Keep the same meaning, do not add new medical claims. "
+    "If a language code is provided, translate. Return ONLY 3–5 bullet points, total ≤ 80 words."
+)
+MULTI_ITEM_PROMPT = (
+    " You will receive several numbered items, each starting with a '### <number>' line. "
+    "Answer every item separately: repeat its '### <number>' line, then its bullet points."
+)
+
+# Shared keep-alive client, created by start_granite_client() on app startup
+_client: httpx.AsyncClient | None = None
+
+# Stops calling WatsonX during an outage instead of paying the timeout on every request
+breaker = CircuitBreaker(
+    failure_threshold=getattr(config, "GRANITE_BREAKER_FAILURE_THRESHOLD", 5),
+    reset_timeout=getattr(config, "GRANITE_BREAKER_RESET_SECONDS", 30.0),
+    half_open_probes=getattr(config, "GRANITE_BREAKER_HALF_OPEN_PROBES", 1),
+)
+
+# Caps concurrent WatsonX calls; bursts queue by risk priority and overflow is shed
+admission = AdmissionController(
+    max_concurrent=getattr(config, "GRANITE_MAX_CONCURRENCY", 10),
+    queue_size=getattr(config, "GRANITE_QUEUE_SIZE", 100),
+)
+
+
+def is_configured() -> bool:
+    settings = _settings()
+    return bool(settings["url"] and settings["api_key"] and settings["project_id"])
+
+
+def status() -> dict:
+    """Granite client state for the health endpoint."""
+    return {
+        "configured": is_configured(),
+        "pool_open": _client is not None,
+        "http2": _HTTP2_AVAILABLE and getattr(config, "GRANITE_HTTP2", True),
+        "circuit_breaker": breaker.snapshot(),
+        "admission": admission.stats(),
+    }
 
-    if not (url and api_key and project_id):
-        return None  # fallback if not configured
 
-    sys_prompt = (
-        "You are a health coach. Rewrite the given action tips to be empathetic and "
-        "simple for a 15-year-old. Keep the same meaning, do not add new medical claims. "
-        "If a language code is provided, translate. Return ONLY 3–5 bullet points, total ≤ 80 words."
+def _settings() -> dict:
+    """Read Granite settings from config, falling back to safe defaults."""
+    return {
+        "url": getattr(config, "IBM_WX_URL", None),
+        "api_key": getattr(config, "IBM_WX_API_KEY", None),
+        "project_id": getattr(config, "IBM_WX_PROJECT_ID", None),
+        "model_id": getattr(config, "IBM_WX_MODEL_ID", "ibm/granite-13b-instruct"),
+    }
+
+
+def _build_client() -> httpx.AsyncClient:
+    pool_size = getattr(config, "GRANITE_POOL_SIZE", 20)
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=min(
+            getattr(config, "GRANITE_KEEPALIVE_CONNECTIONS", 10), pool_size
+        ),
+        keepalive_expiry=getattr(config, "GRANITE_KEEPALIVE_EXPIRY", 30.0),
+    )
+    read_timeout = getattr(config, "GRANITE_READ_TIMEOUT", 15.0)
+    timeout = httpx.Timeout(
+        read_timeout,
+        connect=getattr(config, "GRANITE_CONNECT_TIMEOUT", 3.0),
+        pool=read_timeout,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=_HTTP2_AVAILABLE and getattr(config, "GRANITE_HTTP2", True),
     )
+
+
+async def start_granite_client() -> None:
+    """Create the shared connection pool. Called once on app startup."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def close_granite_client() -> None:
+    """Close the shared connection pool. Called once on app shutdown."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def build_payload(actions: list[str], lang: str, settings: dict) -> dict:
+    """Build the WatsonX text generation payload for a list of tips."""
     user_prompt = f"Language: {lang}\nTips:\n- " + "\n- ".join(actions)
+    return {
+        "model_id": settings["model_id"],
+        "input": [
+            {"role": "system", "content": SYS_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        "project_id": settings["project_id"],
+        "parameters": {"decoding_method": "greedy", "max_new_tokens": 120},
+    }
+
+
+def parse_bullets(text: str) -> list[str] | None:
+    """Turn Granite's bullet-point output into at most 5 tips."""
+    out = [line.strip("-• ").strip() for line in text.splitlines() if line.strip()]
+    return out[:5] or None
+
+
+async def _admit() -> bool:
+    """Wait for an admission slot; False means the call was shed and the caller should fall back."""
+    if await admission.acquire():
+        return True
+    GRANITE_CALLS.inc("shed")
+    GRANITE_SHED.inc(priority_label(current_priority.get()))
+    return False
+
+
+async def _generate(payload: dict, settings: dict) -> str | None:
+    """POST one text generation request. Returns the generated text, or None on failure (or if shed)."""
+    if not await _admit():
+        return None
+    try:
+        return await _generate_admitted(payload, settings)
+    finally:
+        admission.release()
+
+
+async def _generate_admitted(payload: dict, settings: dict) -> str | None:
+    if not breaker.allow():
+        GRANITE_CALLS.inc("circuit_open")
+        return None  # circuit open: fall back without waiting on WatsonX
+
+    # Lazily create the pool if the app lifespan hasn't (e.g. scripts, tests)
+    if _client is None:
+        await start_granite_client()
 
     try:
         headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model_id": model_id,
-            "input": [
-                {"role": "system", "content": sys_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "project_id": project_id,
-            "parameters": {"decoding_method": "greedy", "max_new_tokens": 120}
+            "Authorization": f"Bearer {settings['api_key']}",
+            "Content-Type": "application/json",
         }
-        r = requests.post(f"{url}/ml/v1/text/generation?version=2023-05-29",
-                          headers=headers, data=json.dumps(payload), timeout=15)
+        r = await _client.post(
+            f"{settings['url']}/ml/v1/text/generation?version=2023-05-29",
+            headers=headers,
+            content=json.dumps(payload),
+        )
         r.raise_for_status()
         text = r.json().get("results", [{}])[0].get("generated_text", "")
-        out = [line.strip("-• ").strip() for line in text.splitlines() if line.strip()]
-        return out[:5] or None
+    except asyncio.CancelledError:
+        breaker.record_cancelled()
+        raise
     except Exception as e:
-        print("Granite error:", e)
+        breaker.record_failure()
+        GRANITE_CALLS.inc(_failure_outcome(e))
+        logger.warning("Granite error: %s", e)
+        return None
+    breaker.record_success()
+    return text
+
+
+def _failure_outcome(error: Exception) -> str:
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.HTTPStatusError):
+        return "http_error"
+    return "error"
+
+
+async def rewrite_tips_with_granite(
+    actions: list[str], lang: str = "en"
+) -> list[str] | None:
+    settings = _settings()
+    if not (settings["url"] and settings["api_key"] and settings["project_id"]):
+        GRANITE_CALLS.inc("not_configured")
+        return None  # fallback if not configured
+
+    text = await _generate(build_payload(actions, lang, settings), settings)
+    if text is None:
         return None
+    tips = parse_bullets(text)
+    GRANITE_CALLS.inc("success" if tips else "parse_empty")
+    return tips
+
+
+_ITEM_HEADER = re.compile(
+    r"^\s*#{1,3}\s*(?:item\s*)?(\d+)\s*:?\s*$", re.IGNORECASE | re.MULTILINE
+)
+
+
+def build_multi_payload(items: list[tuple[list[str], str]], settings: dict) -> dict:
+    """Build one generation request that rewrites several tip lists at once."""
+    sections = [
+        f"### {i}\nLanguage: {lang}\nTips:\n- " + "\n- ".join(actions)
+        for i, (actions, lang) in enumerate(items, start=1)
+    ]
+    return {
+        "model_id": settings["model_id"],
+        "input": [
+            {"role": "system", "content": SYS_PROMPT + MULTI_ITEM_PROMPT},
+            {"role": "user", "content": "\n\n".join(sections)},
+        ],
+        "project_id": settings["project_id"],
+        "parameters": {"decoding_method": "greedy", "max_new_tokens": 120 * len(items)},
+    }
+
+
+def parse_multi_bullets(text: str, count: int) -> list[list[str] | None]:
+    """Split a multi-item answer on its '### n' headers. Missing or empty items are None."""
+    results: list[list[str] | None] = [None] * count
+    headers = list(_ITEM_HEADER.finditer(text))
+    for header, following in zip(headers, headers[1:] + [None]):
+        index = int(header.group(1)) - 1
+        if 0 <= index < count and results[index] is None:
+            body = text[header.end() : following.start() if following else len(text)]
+            results[index] = parse_bullets(body)
+    return results
+
+
+async def rewrite_many_with_granite(
+    items: list[tuple[list[str], str]],
+) -> list[list[str] | None]:
+    """Rewrite several (actions, lang) items with a single WatsonX generation."""
+    settings = _settings()
+    if not (settings["url"] and settings["api_key"] and settings["project_id"]):
+        GRANITE_CALLS.inc("not_configured")
+        return [None] * len(items)
+
+    text = await _generate(build_multi_payload(items, settings), settings)
+    if text is None:
+        return [None] * len(items)
+    results = parse_multi_bullets(text, len(items))
+    GRANITE_CALLS.inc("success" if any(results) else "parse_empty")
+    return results
+
+
+async def stream_tips_with_granite(
+    actions: list[str], lang: str = "en"
+) -> AsyncIterator[str]:
+    """
+    Stream a tips rewrite from WatsonX's generation_stream endpoint.
+
+    Yields generated text chunks as they arrive. Errors end the stream early
+    (and count against the circuit breaker); callers should treat whatever
+    was received as incomplete unless the stream ran to the end.
+    """
+    settings = _settings()
+    if not (settings["url"] and settings["api_key"] and settings["project_id"]):
+        GRANITE_CALLS.inc("not_configured")
+        return
+    if not await _admit():
+        return
+    stream = _stream_admitted(actions, lang, settings)
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()  # runs its cancellation bookkeeping before the slot is reused
+        admission.release()
+
+
+async def _stream_admitted(
+    actions: list[str], lang: str, settings: dict
+) -> AsyncIterator[str]:
+    if not breaker.allow():
+        GRANITE_CALLS.inc("circuit_open")
+        return
+
+    if _client is None:
+        await start_granite_client()
+
+    headers = {
+        "Authorization": f"Bearer {settings['api_key']}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+    payload = build_payload(actions, lang, settings)
+    try:
+        async with _client.stream(
+            "POST",
+            f"{settings['url']}/ml/v1/text/generation_stream?version=2023-05-29",
+            headers=headers,
+            content=json.dumps(payload),
+        ) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if not data or data == "[DONE]":
+                    continue
+                chunk = (
+                    json.loads(data).get("results", [{}])[0].get("generated_text", "")
+                )
+                if chunk:
+                    yield chunk
+    except (asyncio.CancelledError, GeneratorExit):
+        breaker.record_cancelled()
+        raise
+    except Exception as e:
+        breaker.record_failure()
+        GRANITE_CALLS.inc(_failure_outcome(e))
+        logger.warning("Granite stream error: %s", e)
+        return
+    breaker.record_success()
+    GRANITE_CALLS.inc("success")
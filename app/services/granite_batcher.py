@@ -0,0 +1,131 @@
+"""
+Micro-batching of concurrent Granite rewrites.
+
+Rewrite jobs are collected for a short window (or until the batch is full)
+and sent to WatsonX together, either as one multi-item generation
+("combined") or as a bounded number of parallel requests ("parallel").
+Each caller gets its own item back; items that can't be parsed resolve to
+None so the caller falls back to the deterministic tips as before.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from .admission import current_priority
+from .granite import is_configured, rewrite_many_with_granite, rewrite_tips_with_granite
+
+try:
+    from .. import config  # our local config file
+except ImportError:
+    config = None
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[
+    List[str], str, "asyncio.Future", int
+]  # actions, lang, result, admission priority
+
+
+class GraniteMicroBatcher:
+    def __init__(
+        self,
+        window_ms: float = 0.0,
+        max_batch: int = 8,
+        mode: str = "combined",
+        max_parallel: int = 4,
+    ):
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self.mode = mode if mode in ("combined", "parallel") else "combined"
+        self.max_parallel = max(1, max_parallel)
+        self._pending: List[Job] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.unparsed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    async def rewrite(
+        self, actions: List[str], lang: str = "en"
+    ) -> Optional[List[str]]:
+        """Queue one rewrite and wait for its share of the next batch."""
+        if not self.enabled or not is_configured():
+            return await rewrite_tips_with_granite(actions, lang)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((actions, lang, future, current_priority.get()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Job]) -> None:
+        items = [(actions, lang) for actions, lang, _, _ in batch]
+        # The batch is admitted at the priority of its most urgent item
+        current_priority.set(min(priority for _, _, _, priority in batch))
+        self.batches += 1
+        self.items += len(items)
+        try:
+            if len(items) == 1:
+                results = [await rewrite_tips_with_granite(*items[0])]
+            elif self.mode == "combined":
+                results = await rewrite_many_with_granite(items)
+            else:
+                semaphore = asyncio.Semaphore(self.max_parallel)
+
+                async def one(actions: List[str], lang: str) -> Optional[List[str]]:
+                    async with semaphore:
+                        return await rewrite_tips_with_granite(actions, lang)
+
+                results = await asyncio.gather(
+                    *(one(actions, lang) for actions, lang in items)
+                )
+        except Exception as e:
+            logger.warning("Granite batch error: %s", e)
+            results = [None] * len(items)
+
+        for (_, _, future, _), result in zip(batch, results):
+            if result is None:
+                self.unparsed += 1
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (
+                round(self.items / self.batches, 2) if self.batches else 0.0
+            ),
+            "fallbacks": self.unparsed,
+            "queued": len(self._pending),
+        }
+
+
+micro_batcher = GraniteMicroBatcher(
+    window_ms=getattr(config, "GRANITE_BATCH_WINDOW_MS", 0.0),
+    max_batch=getattr(config, "GRANITE_BATCH_MAX_SIZE", 8),
+    mode=getattr(config, "GRANITE_BATCH_MODE", "combined"),
+    max_parallel=getattr(config, "GRANITE_BATCH_MAX_PARALLEL", 4),
+)
@@ -0,0 +1,70 @@
+"""
+HTTP caching helpers for the GET recommendations endpoint.
+
+A recommendations document depends only on its query parameters and the
+guideline catalog, so each canonical URL gets a strong ETag built from the
+guideline version and a digest of the parameters. Shared caches (CDN, the
+Flutter HTTP cache) can store it and revalidate with If-None-Match.
+"""
+
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from .recommendations import DEFAULT_LANG, normalize_lang
+
+# Bump when the document layout changes without a guideline change
+DOCUMENT_REVISION = "1"
+
+
+def canonical_flags(values: Iterable[str]) -> Tuple[str, ...]:
+    """Flags from repeated and/or comma-separated query values, de-duplicated and sorted."""
+    flags = {flag.strip() for value in values for flag in value.split(",")}
+    flags.discard("")
+    return tuple(sorted(flags))
+
+
+def canonical_query(
+    risk_level: str, risk_score: int, flags: Tuple[str, ...], lang: str
+) -> str:
+    """
+    The one query string each distinct request maps to.
+
+    Fixed parameter order, flags comma-joined in sorted order, and lang
+    omitted when it is the default.
+    """
+    params: List[Tuple[str, object]] = [
+        ("risk_level", risk_level),
+        ("risk_score", risk_score),
+    ]
+    if flags:
+        params.append(("flags", ",".join(flags)))
+    lang = normalize_lang(lang)
+    if lang != DEFAULT_LANG:
+        params.append(("lang", lang))
+    return urlencode(params, safe=",")
+
+
+def strong_etag(version: str, query: str) -> str:
+    digest = hashlib.blake2b(
+        f"{DOCUMENT_REVISION}\n{query}".encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches `etag` (weak comparison, as RFC 9110 requires here)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def cache_control(max_age: int, stale_while_revalidate: int = 0) -> str:
+    if max_age <= 0:
+        return "no-cache"
+    value = f"public, max-age={max_age}"
+    if stale_while_revalidate > 0:
+        value += f", stale-while-revalidate={stale_while_revalidate}"
+    return value
@@ -0,0 +1,249 @@
+"""
+Materialized (pre-rewritten) tip sets.
+
+Every action list that pick_tips can produce is determined by the risk level
+and flags from calculate_risk, so the whole space can be enumerated offline,
+rewritten once per language and shipped as a versioned artifact file. The API
+loads the artifact on startup and only calls Granite for combinations the
+artifact lacks.
+"""
+
+import itertools
+import json
+import logging
+import os
+import time
+from enum import Enum
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models import RiskInput
+from .recommendations import current_index, pick_tips_for_mask
+from .risk_scoring import RULE_TABLE, Condition, score_risk
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = "diawell-materialized-tips"
+ARTIFACT_VERSION = 1
+
+
+def guidelines_sha256() -> str:
+    """Content hash of the guideline snippets currently being served."""
+    return current_index().sha256
+
+
+def _sample_values(field: str, conditions: List[Condition]) -> Tuple[object, ...]:
+    """
+    Values of `field` that land on every side of the scoring rules testing it.
+
+    Enum and bool fields yield all their values; numeric fields yield each
+    threshold and one step either side of it.
+    """
+    annotation = RiskInput.model_fields[field].annotation
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return tuple(member.value for member in annotation)
+    if annotation is bool:
+        return (False, True)
+    values: Dict[object, None] = {}
+    for condition in conditions:
+        if condition.op == "in":
+            values.update(dict.fromkeys(condition.value))
+            values[None] = None
+        elif condition.op == "eq":
+            values[condition.value] = None
+            values[None] = None
+        else:
+            step = 1 if annotation is int else 0.1
+            values.update(
+                dict.fromkeys(
+                    (condition.value - step, condition.value, condition.value + step)
+                )
+            )
+    return tuple(values)
+
+
+def _reachable_masks() -> Dict[int, str]:
+    """Every (flag mask -> risk level) the rule table can produce, in first-seen order."""
+    conditions: Dict[str, List[Condition]] = {}
+    for rule in RULE_TABLE:
+        for condition in rule.conditions:
+            conditions.setdefault(condition.field, []).append(condition)
+    fields = list(conditions)
+    samples = [_sample_values(field, conditions[field]) for field in fields]
+    masks: Dict[int, str] = {}
+    for values in itertools.product(*samples):
+        _, level, mask = score_risk(SimpleNamespace(**dict(zip(fields, values))))
+        masks.setdefault(mask, level)
+    return masks
+
+
+def enumerate_tip_space() -> List[Tuple[str, Tuple[str, ...]]]:
+    """
+    Enumerate every distinct (risk_level, actions) pair pick_tips can produce.
+
+    The inputs are sampled from the thresholds in the scoring rules
+    (data/scoring_rules.json), so editing a rule never leaves flag
+    combinations out of the space. Unique results are kept in first-seen order.
+    """
+    seen: Dict[Tuple[str, ...], str] = {}
+    for mask, level in _reachable_masks().items():
+        actions = tuple(pick_tips_for_mask(level, mask)["actions"])
+        seen.setdefault(actions, level)
+    return [(level, actions) for actions, level in seen.items()]
+
+
+# (guideline version, action lists) of the last enumerated tip space
+_tip_space: Tuple[Optional[str], frozenset] = (None, frozenset())
+
+
+def warm_tip_space() -> frozenset:
+    """
+    Enumerate the tip space for the current guidelines unless already done.
+
+    Takes a noticeable amount of CPU, so callers on the event loop run it in
+    a thread (on startup and after a guideline reload); coverage() only
+    reads the result.
+    """
+    global _tip_space
+    version = current_index().version
+    if _tip_space[0] != version:
+        _tip_space = (
+            version,
+            frozenset(actions for _, actions in enumerate_tip_space()),
+        )
+    return _tip_space[1]
+
+
+class MaterializedTips:
+    """In-memory view of a materialized tips artifact."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.meta: Dict[str, object] = {}
+        self._entries: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.path is not None
+
+    def load(self, path: Optional[str]) -> bool:
+        """Load an artifact from disk. Missing or invalid files leave the store empty."""
+        if not path:
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning("Materialized tips artifact not found: %s", path)
+            return False
+        except ValueError as e:
+            logger.warning("Invalid materialized tips artifact %s: %s", path, e)
+            return False
+
+        if (
+            data.get("format") != ARTIFACT_FORMAT
+            or data.get("version") != ARTIFACT_VERSION
+        ):
+            logger.warning(
+                "Unsupported materialized tips artifact %s (format=%s, version=%s)",
+                path,
+                data.get("format"),
+                data.get("version"),
+            )
+            return False
+
+        self._entries = {
+            (entry["lang"], tuple(entry["actions"])): entry["rewritten"]
+            for entry in data.get("entries", [])
+        }
+        self.meta = {k: v for k, v in data.items() if k != "entries"}
+        self.path = path
+        if self.meta.get("guidelines_sha256") != guidelines_sha256():
+            logger.warning(
+                "Materialized tips artifact %s was built from different guidelines; "
+                "coverage will be partial",
+                path,
+            )
+        logger.info("Loaded %d materialized tip sets from %s", len(self._entries), path)
+        return True
+
+    def lookup(self, actions: List[str], lang: str) -> Optional[List[str]]:
+        """Return the pre-rewritten actions for (actions, lang), or None."""
+        if not self._entries:
+            return None
+        value = self._entries.get((lang, tuple(actions)))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def coverage(self) -> Dict[str, object]:
+        """
+        Report how much of the tip space the artifact covers, per language.
+
+        Uses the space from the last warm_tip_space(); right after a guideline
+        reload that can still be the previous version's until the rewarm is
+        done (see space_version).
+        """
+        space_version, space = _tip_space
+        if space_version is None:
+            space_version, space = current_index().version, warm_tip_space()
+        langs = sorted({lang for lang, _ in self._entries})
+        per_lang = {}
+        for lang in langs:
+            covered = sum(1 for actions in space if (lang, actions) in self._entries)
+            per_lang[lang] = {
+                "covered": covered,
+                "total": len(space),
+                "ratio": round(covered / len(space), 4) if space else 0.0,
+            }
+        return {
+            "loaded": self.loaded,
+            "path": self.path,
+            "created_at": self.meta.get("created_at"),
+            "generator": self.meta.get("generator"),
+            "guidelines_current": self.meta.get("guidelines_sha256")
+            == guidelines_sha256(),
+            "space_size": len(space),
+            "space_version": space_version,
+            "languages": per_lang,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def build_artifact(
+    entries: Iterable[Tuple[str, Tuple[str, ...], List[str]]],
+    langs: List[str],
+    generator: str,
+    model_id: Optional[str],
+) -> Dict[str, object]:
+    """Assemble the artifact document from (lang, actions, rewritten) triples."""
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "generator": generator,
+        "model_id": model_id,
+        "guidelines_sha256": guidelines_sha256(),
+        "langs": langs,
+        "space_size": len(warm_tip_space()),
+        "entries": [
+            {"lang": lang, "actions": list(actions), "rewritten": rewritten}
+            for lang, actions, rewritten in entries
+        ],
+    }
+
+
+def write_artifact(document: Dict[str, object], path: str) -> None:
+    """Write the artifact atomically so a running server never reads a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+materialized_tips = MaterializedTips()
@@ -0,0 +1,297 @@
+"""
+Low-overhead in-process metrics with Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms are plain Python objects updated
+on the event loop thread; recording is a dict lookup and an integer/float
+add, cheap enough to leave on in production. render() produces the
+Prometheus text format served on /metrics.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers sub-millisecond scoring up to the Granite read timeout
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    15.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def samples(self) -> List[str]:
+        values = self._callback() if self._callback else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels in sorted(self._counts):
+            cumulative = 0
+            for bound, count in zip(
+                self.buckets + (float("inf"),), self._counts[labels]
+            ):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_format_labels(self.labelnames, labels)} {self._sums[labels]}"
+            )
+            lines.append(
+                f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+            )
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "diawell_stage_seconds",
+        "Time spent in each request-processing stage",
+        ["stage"],
+    )
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "diawell_http_request_duration_seconds",
+        "HTTP request duration until the response completes",
+        ["path"],
+    )
+)
+REQUESTS_TOTAL = REGISTRY.register(
+    Counter(
+        "diawell_http_requests_total",
+        "HTTP requests by path and status",
+        ["path", "status"],
+    )
+)
+IN_FLIGHT = REGISTRY.register(
+    Gauge(
+        "diawell_http_requests_in_flight",
+        "HTTP requests currently being processed",
+        ["path"],
+    )
+)
+GRANITE_CALLS = REGISTRY.register(
+    Counter(
+        "diawell_granite_calls_total",
+        "Granite calls by outcome "
+        "(success, timeout, http_error, error, parse_empty, circuit_open, shed, not_configured)",
+        ["outcome"],
+    )
+)
+GRANITE_SHED = REGISTRY.register(
+    Counter(
+        "diawell_granite_shed_total",
+        "Granite calls shed by admission control, by risk-level priority",
+        ["priority"],
+    )
+)
+REWRITE_SOURCE = REGISTRY.register(
+    Counter(
+        "diawell_tip_rewrites_total",
+        "Where each assessment's tips came from "
+        "(materialized, rewritten = rewrite cache or Granite, localized = local language catalog, "
+        "fallback = deterministic tips)",
+        ["source"],
+    )
+)
+
+
+def observe_stage(stage: str, started: float) -> float:
+    """Record time since `started` for a stage and return the current perf_counter()."""
+    now = time.perf_counter()
+    STAGE_SECONDS.observe(now - started, stage)
+    return now
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts, durations and in-flight gauges.
+
+    Requests are labelled by the route template the router matched (e.g.
+    "/risk/history/{user_id}"), so path parameters don't add label values;
+    paths matching none of `paths` are grouped under "other".
+    The request start time is stored in scope["state"]["started_at"] so handlers
+    can attribute parsing/validation time.
+    """
+
+    def __init__(
+        self, app: ASGIApp, paths: Optional[Callable[[], Iterable[str]]] = None
+    ):
+        self.app = app
+        self._paths_source = paths
+        self._paths: Optional[frozenset] = None
+        self._templates: List[Tuple[Pattern[str], str]] = []
+
+    def _label(self, path: str) -> str:
+        # The router only sets scope["route"] once it dispatches, but the
+        # in-flight gauge needs a label before that: match the templates here
+        if self._paths is None:
+            paths = list(self._paths_source()) if self._paths_source else []
+            self._templates = [compile_path(p)[:2] for p in paths if "{" in p]
+            self._paths = frozenset(paths)
+        if path in self._paths:
+            return path
+        for regex, template in self._templates:
+            if regex.match(path):
+                return template
+        return "other"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = self._label(scope["path"])
+        started = time.perf_counter()
+        scope.setdefault("state", {})["started_at"] = started
+        status = "500"
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        IN_FLIGHT.inc(path)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec(path)
+            route = scope.get("route")
+            label = getattr(route, "path", None) or path
+            REQUESTS_TOTAL.inc(label, status)
+            REQUEST_SECONDS.observe(time.perf_counter() - started, label)
@@ -0,0 +1,510 @@
+"""
+On-demand profiling of single requests.
+
+Off unless PROFILING_ENABLED is set and PROFILING_TOKEN is non-empty. A
+request to one of PROFILING_PATHS carrying `X-Profile-Token: <token>` then
+runs under one of two profilers (PROFILING_MODE, or `X-Profile-Mode` per
+request):
+
+- sampling: a background thread looks at the event loop thread every
+  PROFILING_SAMPLE_INTERVAL_MS. Cheap, suited to requests that are slow;
+  counts are samples.
+- deterministic: sys.setprofile on the loop thread times every call and
+  C call while the request runs. Catches sub-millisecond requests at the
+  cost of slowing the loop for their duration; counts are microseconds.
+
+Either way only this request's task is attributed: time where it is
+running is charged to its executing stack, and time where it is suspended
+to the coroutine chain it is awaiting in, ending in a `[wait: <span>]` frame
+for the innermost active span() (the Granite rewrite in /risk/submit) or
+`[wait]` otherwise. Other requests sharing the loop never show up.
+
+Profiles are kept in memory for GET /admin/profiles/{id} and, with
+PROFILING_OUTPUT_DIR set, written there as `<id>.collapsed` ("frame;frame
+count" lines, readable by flamegraph.pl, inferno and speedscope).
+
+At most PROFILING_MAX_PER_MINUTE requests per process are profiled, one at
+a time; others carrying the header are served normally with an
+`X-Profile-Skipped` header, so the hook is safe to leave deployed.
+"""
+
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+import types
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from .. import config  # our local config file
+except ImportError:
+    config = None
+
+TOKEN_HEADER = b"x-profile-token"
+MODE_HEADER = b"x-profile-mode"
+
+# The profile of the request running in this context, if any
+_active: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Label time spent in the enclosed block as `name` in the current request's profile.
+
+    Costs one context variable lookup when the request isn't being profiled.
+    """
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    profile.spans.append(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.span_seconds[name] += time.perf_counter() - started
+        profile.spans.remove(name)
+
+
+def _frame_label(frame: object, cache: Dict[object, str]) -> str:
+    """Label for a code object or builtin as "name (dir/file.py:line)"; strings pass through."""
+    if isinstance(frame, str):
+        return frame
+    label = cache.get(frame)
+    if label is None:
+        if isinstance(frame, types.CodeType):
+            path = frame.co_filename.replace(os.sep, "/").rsplit("/", 2)[-2:]
+            label = f"{getattr(frame, 'co_qualname', frame.co_name)} ({'/'.join(path)}:{frame.co_firstlineno})"
+        else:
+            label = f"{getattr(frame, '__qualname__', repr(frame))} (builtin)"
+        cache[frame] = label
+    return label
+
+
+def _running_codes(frame, root) -> List[object]:
+    """Code objects of an executing stack, outermost first, starting below `root`."""
+    codes = []
+    while frame is not None and frame.f_code is not root:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return codes
+
+
+def _awaiting_codes(coro, root) -> List[object]:
+    """Code objects along a suspended coroutine's await chain, starting below `root`."""
+    codes = []
+    while coro is not None:
+        frame = (
+            getattr(coro, "cr_frame", None)
+            or getattr(coro, "ag_frame", None)
+            or getattr(coro, "gi_frame", None)
+        )
+        if frame is None:
+            break
+        codes.append(frame.f_code)
+        coro = (
+            getattr(coro, "cr_await", None)
+            or getattr(coro, "ag_await", None)
+            or getattr(coro, "gi_yieldfrom", None)
+        )
+    if root in codes:
+        codes = codes[codes.index(root) + 1 :]
+    return codes
+
+
+MODES = ("sampling", "deterministic")
+
+Stack = Tuple[object, ...]
+
+
+class Profile:
+    """Collapsed stacks of one request, collected while it runs."""
+
+    def __init__(
+        self,
+        profile_id: str,
+        method: str,
+        path: str,
+        mode: str,
+        interval: float,
+        max_seconds: float,
+        root,
+    ):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.mode = mode
+        self.created_at = time.time()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.on_cpu = 0
+        self.off_cpu = 0
+        self.spans: List[str] = []
+        self.span_seconds: Dict[str, float] = defaultdict(float)
+        # Sample counts (sampling) or nanoseconds (deterministic) per stack
+        self._weights: Counter = Counter()
+        self._interval = interval
+        self._max_seconds = max_seconds
+        self._root = root
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._started = 0.0
+        self._previous_profile = None
+        self._last_stack: Optional[Stack] = None
+        self._last_ns = 0
+        self._deadline_ns = 0
+        self._waiting = False
+
+    def start(self) -> None:
+        """Start profiling the calling task (must run on the event loop thread)."""
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._started = time.perf_counter()
+        if self.mode == "deterministic":
+            self._previous_profile = sys.getprofile()
+            self._last_ns = time.perf_counter_ns()
+            self._deadline_ns = self._last_ns + int(self._max_seconds * 1e9)
+            sys.setprofile(self._trace)
+        else:
+            self._thread = threading.Thread(
+                target=self._run, name=f"profiler-{self.id}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop collecting (on the event loop thread; never blocks). Call join() before reading results."""
+        self.duration = time.perf_counter() - self._started
+        if self.mode == "deterministic":
+            if self._task is not None:
+                sys.setprofile(self._previous_profile)
+                self._charge(time.perf_counter_ns())
+        else:
+            self._stop.set()
+        self._task = None
+
+    def join(self) -> None:
+        """Wait for the sampler thread to exit (blocking; run off the event loop)."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _waiting_stack(self) -> Stack:
+        spans = self.spans[-1:]
+        tail = f"[wait: {spans[0]}]" if spans else "[wait]"
+        return (*_awaiting_codes(self._task.get_coro(), self._root), tail)
+
+    # Sampling mode: runs on the profiler thread
+
+    def _run(self) -> None:
+        deadline = self._started + self._max_seconds
+        while not self._stop.wait(self._interval):
+            if time.perf_counter() > deadline:
+                return
+            self._sample()
+
+    def _sample(self) -> None:
+        if self._task is None:
+            return
+        if asyncio.current_task(self._loop) is self._task:
+            stack = tuple(
+                _running_codes(sys._current_frames().get(self._loop_thread), self._root)
+            )
+            self.on_cpu += 1
+        else:
+            stack = self._waiting_stack()
+            self.off_cpu += 1
+        self._weights[stack] += 1
+
+    # Deterministic mode: runs on the loop thread for every call/return event
+
+    def _charge(self, now: int) -> None:
+        if self._last_stack is not None:
+            self._weights[self._last_stack] += now - self._last_ns
+        self._last_ns = now
+
+    def _trace(self, frame, event: str, arg) -> None:
+        now = time.perf_counter_ns()
+        self._charge(now)
+        if now > self._deadline_ns:
+            sys.setprofile(self._previous_profile)
+            self._last_stack = None
+            return
+        if asyncio.current_task(self._loop) is self._task:
+            codes = _running_codes(frame, self._root)
+            if event == "c_call":
+                codes.append(arg)
+            self._last_stack = tuple(codes)
+            self._waiting = False
+            self.on_cpu += 1
+        elif not self._waiting:
+            # Suspended: the await chain can't change until the task runs again
+            self._last_stack = self._waiting_stack()
+            self._waiting = True
+            self.off_cpu += 1
+
+    def collapsed(self) -> str:
+        scale = 1000 if self.mode == "deterministic" else 1
+        prefix = f"{self.method} {self.path}"
+        lines = []
+        for stack, weight in self._weights.items():
+            count = weight // scale
+            if count:
+                frames = ";".join(_frame_label(frame, self._labels) for frame in stack)
+                lines.append(
+                    f"{prefix};{frames} {count}\n" if frames else f"{prefix} {count}\n"
+                )
+        return "".join(sorted(lines))
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "mode": self.mode,
+            "status": self.status,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            (
+                "on_cpu_events" if self.mode == "deterministic" else "on_cpu_samples"
+            ): self.on_cpu,
+            (
+                "off_cpu_events" if self.mode == "deterministic" else "off_cpu_samples"
+            ): self.off_cpu,
+            "span_ms": {
+                name: round(seconds * 1000, 3)
+                for name, seconds in self.span_seconds.items()
+            },
+        }
+
+
+class Profiler:
+    """Authorizes, rate-limits and keeps request profiles for this process."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        token: str = "",
+        paths: Iterable[str] = (),
+        mode: str = "sampling",
+        interval_ms: float = 2.0,
+        max_per_minute: float = 6,
+        max_seconds: float = 30.0,
+        keep: int = 20,
+        output_dir: str = "",
+    ):
+        self.enabled = bool(enabled and token)
+        self._token = token.encode("utf-8")
+        self.paths = frozenset(paths)
+        self.mode = mode if mode in MODES else "sampling"
+        self.interval = max(0.0005, interval_ms / 1000)
+        self.max_per_minute = max(0.0, max_per_minute)
+        # Room for at least one token, so rates below one per minute still profile
+        self._capacity = (
+            max(1.0, self.max_per_minute) if self.max_per_minute > 0 else 0.0
+        )
+        self.max_seconds = max_seconds
+        self.keep = max(1, keep)
+        self.output_dir = output_dir
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._tokens = self._capacity
+        self._refilled = time.monotonic()
+        self._running = False
+        self.profiled = 0
+        self.rate_limited = 0
+        self.busy = 0
+        self.unauthorized = 0
+        self.write_errors = 0
+
+    def authorized(self, token: Optional[Union[str, bytes]]) -> bool:
+        if not self.enabled or not token:
+            return False
+        if isinstance(token, str):
+            token = token.encode("utf-8")
+        return hmac.compare_digest(token, self._token)
+
+    def _take(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._refilled) * self.max_per_minute / 60,
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def begin(
+        self, method: str, path: str, root, mode: Optional[str] = None
+    ) -> Tuple[Optional[Profile], Optional[str]]:
+        """
+        A new Profile for an authorized request, or (None, reason) if it must run unprofiled.
+
+        `mode` overrides the configured mode when it names one of MODES.
+        """
+        if self._running:
+            self.busy += 1
+            return None, "busy"
+        if not self._take():
+            self.rate_limited += 1
+            return None, "rate_limited"
+        self._running = True
+        self.profiled += 1
+        slug = path.strip("/").replace("/", "-") or "root"
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{slug}-{uuid.uuid4().hex[:8]}"
+        mode = mode if mode in MODES else self.mode
+        return (
+            Profile(
+                profile_id, method, path, mode, self.interval, self.max_seconds, root
+            ),
+            None,
+        )
+
+    def end(self, profile: Profile) -> None:
+        self._running = False
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.keep:
+            self._profiles.popitem(last=False)
+
+    def write(self, profile: Profile) -> None:
+        """Write the profile's collapsed stacks to output_dir (blocking; run off the event loop)."""
+        if not self.output_dir:
+            return
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(
+                os.path.join(self.output_dir, f"{profile.id}.collapsed"),
+                "w",
+                encoding="utf-8",
+            ) as f:
+                f.write(profile.collapsed())
+        except OSError:
+            self.write_errors += 1
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def recent(self) -> List[Dict[str, object]]:
+        """Summaries of the kept profiles, newest first."""
+        return [profile.summary() for profile in reversed(self._profiles.values())]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "paths": sorted(self.paths),
+            "max_per_minute": self.max_per_minute,
+            "profiled": self.profiled,
+            "rate_limited": self.rate_limited,
+            "busy": self.busy,
+            "unauthorized": self.unauthorized,
+            "write_errors": self.write_errors,
+            "kept": len(self._profiles),
+        }
+
+
+profiler = Profiler(
+    enabled=getattr(config, "PROFILING_ENABLED", False),
+    token=getattr(config, "PROFILING_TOKEN", ""),
+    paths=getattr(
+        config, "PROFILING_PATHS", ["/risk/submit", "/recommendations/generate"]
+    ),
+    mode=getattr(config, "PROFILING_MODE", "sampling"),
+    interval_ms=getattr(config, "PROFILING_SAMPLE_INTERVAL_MS", 2.0),
+    max_per_minute=getattr(config, "PROFILING_MAX_PER_MINUTE", 6),
+    max_seconds=getattr(config, "PROFILING_MAX_SECONDS", 30.0),
+    keep=getattr(config, "PROFILING_KEEP", 20),
+    output_dir=getattr(config, "PROFILING_OUTPUT_DIR", ""),
+)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running authorized requests under `profiler`.
+
+    Profiled responses carry `X-Profile-Id`; authorized requests that could
+    not be profiled carry `X-Profile-Skipped` with the reason. Requests
+    without the header (or with a wrong token) pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.profiler.enabled
+            or scope["path"] not in self.profiler.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        token = _header(scope, TOKEN_HEADER)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+        if not self.profiler.authorized(token):
+            self.profiler.unauthorized += 1
+            await self.app(scope, receive, send)
+            return
+
+        mode = _header(scope, MODE_HEADER)
+        profile, skipped = self.profiler.begin(
+            scope["method"],
+            scope["path"],
+            ProfilingMiddleware.__call__.__code__,
+            mode.decode("latin-1").strip().lower() if mode else None,
+        )
+        extra = (
+            (b"x-profile-id", profile.id.encode("ascii"))
+            if profile
+            else (b"x-profile-skipped", skipped.encode("ascii"))
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), extra]
+                if profile is not None:
+                    profile.status = message["status"]
+            await send(message)
+
+        if profile is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        context_token = _active.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            _active.reset(context_token)
+            try:
+                # The sampler exits within one interval; wait for it without blocking the loop
+                await asyncio.to_thread(profile.join)
+            finally:
+                self.profiler.end(profile)
+        if self.profiler.output_dir:
+            await asyncio.to_thread(self.profiler.write, profile)
@@ -4,134 +4,464 @@ Health recommendations service for the Diabetes Risk Assessment API.
 This service generates personalized health recommendations based on risk assessment data.
 """
 
+import hashlib
 import json
+import logging
 import os
-from typing import List, Dict, Optional
+import time
 from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
-# Load tips data once at module level
-def _load_tips_data() -> Dict:
-    """Load the guideline snippets data from JSON file."""
-    try:
-        # Get the directory where this file is located
-        current_dir = Path(__file__).parent
-        data_file = current_dir.parent / "data" / "guideline_snippets.json"
-        
-        with open(data_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Fallback for development/testing
+from .risk_scoring import FLAG_BITS, FLAG_NAMES, encode_flags
+
+logger = logging.getLogger(__name__)
+
+GUIDELINES_FILE = Path(__file__).parent.parent / "data" / "guideline_snippets.json"
+
+# Fallback for development/testing when the snippets file is missing
+_DEFAULT_TIPS_DATA = {
+    "base_tips": {
+        "Low": ["Maintain a healthy lifestyle."],
+        "Medium": ["Monitor your health regularly."],
+        "High": ["Consult a healthcare professional."],
+    },
+    "factor_tips": {},
+    "disclaimer": "Educational only, not medical advice.",
+    "red_flags": "If chest pain, severe breathlessness, confusion, or weakness → seek urgent care.",
+}
+
+DEFAULT_LANG = "en"
+
+# English text for keys guideline_snippets.json doesn't carry; language
+# catalogs may override any of them
+_DEFAULT_TEXT = {
+    "headline": "Personalized recommendations for {level} risk level",
+    "level_names": {},
+    "priority_actions": {
+        "High": [
+            "Schedule medical consultation within 1 week",
+            "Start blood glucose monitoring",
+            "Begin lifestyle modifications immediately",
+        ],
+        "Medium": [
+            "Schedule check-up within 1 month",
+            "Start diet and exercise plan",
+            "Monitor blood pressure regularly",
+        ],
+        "Low": [
+            "Continue healthy lifestyle habits",
+            "Annual health check-up",
+            "Stay informed about diabetes prevention",
+        ],
+    },
+    # Keyed by flag name, or by a word that matches every flag containing it
+    "flag_priority_actions": {
+        "bmi_high": "Focus on weight management",
+        "bp_high": "Monitor blood pressure closely",
+        "low_physical_activity": "Increase physical activity to 150+ minutes/week",
+        "smoking": "Consider smoking cessation programs",
+        "alcohol": "Reduce alcohol consumption",
+    },
+    "urgent_actions": [
+        "Schedule an appointment with your healthcare provider",
+        "Begin monitoring blood glucose levels",
+        "Start lifestyle modifications immediately",
+    ],
+}
+
+
+def normalize_lang(lang: Optional[str]) -> str:
+    """Lower-case BCP 47-style tag with '-' separators ("pt_BR" -> "pt-br")."""
+    return (lang or DEFAULT_LANG).strip().replace("_", "-").lower() or DEFAULT_LANG
+
+
+def lang_chain(lang: Optional[str]) -> Tuple[str, ...]:
+    """Fallback order for a language tag, e.g. "pt-br" -> ("pt-br", "pt", "en")."""
+    parts = normalize_lang(lang).split("-")
+    chain = tuple("-".join(parts[:i]) for i in range(len(parts), 0, -1))
+    return chain if chain[-1] == DEFAULT_LANG else chain + (DEFAULT_LANG,)
+
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    """Overlay a catalog on its fallback; nested dicts (tips per level or flag) merge per key."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = {**base[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def _flag_mask_for(key: str) -> int:
+    """Bits for a flag_priority_actions key: an exact flag name, or every flag containing the word."""
+    return FLAG_BITS.get(key) or _flags_matching(key)
+
+
+class GuidelineIndex:
+    """
+    Immutable, precompiled view of the guideline snippets.
+
+    Base tips are pre-sliced per level and factor tips are laid out per flag
+    bit, so building a response is tuple concatenation. Factor tip selections
+    are memoized per index; a reload builds a new index (and new memo) and
+    swaps it in, so requests already holding the old one finish unaffected.
+    """
+
+    __slots__ = (
+        "data",
+        "lang",
+        "sha256",
+        "version",
+        "mtime",
+        "loaded_at",
+        "headline",
+        "level_names",
+        "base_tips",
+        "factor_tips_by_bit",
+        "priority_actions",
+        "flag_priority_actions",
+        "urgent_actions",
+        "disclaimer",
+        "red_flags",
+        "credits",
+        "_factor_memo",
+        "_priority_memo",
+    )
+
+    def __init__(
+        self,
+        data: Dict,
+        sha256: str = "",
+        mtime: Optional[float] = None,
+        lang: str = DEFAULT_LANG,
+        version: Optional[str] = None,
+    ):
+        self.data = data
+        self.lang = lang
+        self.sha256 = sha256
+        # Short content hash; identifies derived caches and HTTP validators. Every
+        # language in a catalog shares the catalog's version.
+        self.version = version or (sha256[:16] if sha256 else "builtin")
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        text = _merge(_DEFAULT_TEXT, data)
+        self.headline: str = text["headline"]
+        self.level_names: Mapping[str, str] = MappingProxyType(
+            dict(text["level_names"])
+        )
+        self.base_tips: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {
+                level: tuple(tips[:3])
+                for level, tips in text.get("base_tips", {}).items()
+            }
+        )
+        factor_tips = text.get("factor_tips", {})
+        self.factor_tips_by_bit: Tuple[Optional[str], ...] = tuple(
+            factor_tips.get(flag) or None for flag in FLAG_NAMES
+        )
+        self.priority_actions: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {
+                level: tuple(actions)
+                for level, actions in text["priority_actions"].items()
+            }
+        )
+        # (flag mask, action) pairs; an action applies when any of its flags is set
+        self.flag_priority_actions: Tuple[Tuple[int, str], ...] = tuple(
+            (_flag_mask_for(key), action)
+            for key, action in text["flag_priority_actions"].items()
+            if action
+        )
+        self.urgent_actions: Tuple[str, ...] = tuple(text["urgent_actions"])
+        self.disclaimer: str = text["disclaimer"]
+        self.red_flags: str = text["red_flags"]
+        self.credits: Tuple = tuple(text.get("credits", []))
+        self._factor_memo: Dict[int, Tuple[str, ...]] = {}
+        self._priority_memo: Dict[Tuple[str, int], Tuple[str, ...]] = {}
+
+    def headline_for(self, risk_level: str) -> str:
+        return self.headline.format(level=self.level_names.get(risk_level, risk_level))
+
+    def factor_tips_for(self, flag_mask: int) -> Tuple[str, ...]:
+        """Up to 2 distinct factor-specific tips, in flag order."""
+        tips = self._factor_memo.get(flag_mask)
+        if tips is None:
+            selected: List[str] = []
+            for bit, tip in enumerate(self.factor_tips_by_bit):
+                if tip and flag_mask >> bit & 1 and tip not in selected:
+                    selected.append(tip)
+                    if len(selected) >= 2:  # Limit to 2 factor tips
+                        break
+            tips = self._factor_memo[flag_mask] = tuple(selected)
+        return tips
+
+    def priority_actions_for(self, risk_level: str, flag_mask: int) -> Tuple[str, ...]:
+        """Priority actions for the risk level plus any flag-specific actions."""
+        key = (risk_level, flag_mask)
+        actions = self._priority_memo.get(key)
+        if actions is None:
+            base = self.priority_actions.get(risk_level, self.priority_actions["Low"])
+            actions = base + tuple(
+                action
+                for bits, action in self.flag_priority_actions
+                if flag_mask & bits
+            )
+            if len(self._priority_memo) < 4096:
+                self._priority_memo[key] = actions
+        return actions
+
+    def warm(self) -> None:
+        """Precompute factor tips for every flag mask (e.g. before forking workers)."""
+        for flag_mask in range(1 << len(self.factor_tips_by_bit)):
+            self.factor_tips_for(flag_mask)
+
+
+def _flags_matching(word: str) -> int:
+    """Mask of every known flag whose name contains `word`."""
+    return encode_flags([flag for flag in FLAG_NAMES if word in flag])
+
+
+class GuidelineCatalog:
+    """
+    Guideline indexes per language.
+
+    guideline_snippets.json is the English catalog; siblings named
+    guideline_snippets.<lang>.json (e.g. ``.es``, ``.pt``, ``.pt-BR``) may
+    override any of its keys, and anything they omit falls back along the
+    language chain (pt-BR -> pt -> en).
+    """
+
+    __slots__ = ("indexes", "default", "sha256", "version", "mtimes", "_resolved")
+
+    def __init__(
+        self, indexes: Dict[str, GuidelineIndex], sha256: str, mtimes: Dict[str, float]
+    ):
+        self.indexes = indexes
+        self.default = indexes[DEFAULT_LANG]
+        self.sha256 = sha256
+        self.version = self.default.version
+        self.mtimes = mtimes
+        self._resolved: Dict[str, GuidelineIndex] = {}
+
+    def for_lang(self, lang: Optional[str]) -> GuidelineIndex:
+        index = self._resolved.get(lang)
+        if index is None:
+            index = next(
+                self.indexes[tag] for tag in lang_chain(lang) if tag in self.indexes
+            )
+            if len(self._resolved) < 256:  # lang is client input
+                self._resolved[lang] = index
+        return index
+
+    def warm(self) -> None:
+        for index in self.indexes.values():
+            index.warm()
+
+    def describe(self) -> Dict[str, object]:
         return {
-            "base_tips": {
-                "Low": ["Maintain a healthy lifestyle."],
-                "Medium": ["Monitor your health regularly."],
-                "High": ["Consult a healthcare professional."]
-            },
-            "factor_tips": {},
-            "disclaimer": "Educational only, not medical advice.",
-            "red_flags": "If chest pain, severe breathlessness, confusion, or weakness → seek urgent care."
+            "version": self.version,
+            "sha256": self.sha256,
+            "path": str(GUIDELINES_FILE),
+            "languages": sorted(self.indexes),
+            "loaded_at": time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.default.loaded_at)
+            ),
         }
 
-TIPS_DATA = _load_tips_data()
+
+def _language_files(path: Path) -> Dict[str, Path]:
+    """Language catalogs next to the English snippets file, keyed by normalized tag."""
+    prefix, suffix = path.stem + ".", path.suffix
+    return {
+        normalize_lang(sibling.name[len(prefix) : -len(suffix)]): sibling
+        for sibling in path.parent.glob(f"{prefix}*{suffix}")
+    }
+
+
+def _scan_mtimes(path: Path) -> Dict[str, float]:
+    files = [path, *_language_files(path).values()]
+    return {str(f): os.stat(f).st_mtime for f in files}
+
+
+def load_guideline_index(path: Path = GUIDELINES_FILE) -> GuidelineIndex:
+    """Read and compile a guideline snippets file. Raises on a missing or invalid file."""
+    mtime = os.stat(path).st_mtime
+    raw = Path(path).read_bytes()
+    return GuidelineIndex(json.loads(raw), hashlib.sha256(raw).hexdigest(), mtime)
+
+
+def load_guideline_catalog(path: Path = GUIDELINES_FILE) -> GuidelineCatalog:
+    """Read the English snippets file and its language siblings. Raises on a missing or invalid file."""
+    path = Path(path)
+    english_raw = path.read_bytes()
+    english_sha = hashlib.sha256(english_raw).hexdigest()
+    mtimes = {str(path): os.stat(path).st_mtime}
+    catalogs: Dict[str, Dict] = {}
+    digest = hashlib.sha256(english_sha.encode())
+    for lang, sibling in sorted(_language_files(path).items()):
+        raw = sibling.read_bytes()
+        catalogs[lang] = json.loads(raw)
+        mtimes[str(sibling)] = os.stat(sibling).st_mtime
+        digest.update(f"\n{lang}:{hashlib.sha256(raw).hexdigest()}".encode())
+    # English-only catalogs keep the English file's hash as their version
+    sha256 = digest.hexdigest() if catalogs else english_sha
+
+    english = json.loads(english_raw)
+    indexes = {
+        DEFAULT_LANG: GuidelineIndex(
+            english, english_sha, mtimes[str(path)], version=sha256[:16]
+        )
+    }
+    for lang in catalogs:
+        data = english
+        for tag in reversed(lang_chain(lang)[:-1]):  # broadest first: en <- pt <- pt-br
+            if tag in catalogs:
+                data = _merge(data, catalogs[tag])
+        indexes[lang] = GuidelineIndex(
+            data, english_sha, mtimes[str(path)], lang=lang, version=sha256[:16]
+        )
+    return GuidelineCatalog(indexes, sha256, mtimes)
+
+
+def _load_initial_catalog() -> GuidelineCatalog:
+    try:
+        return load_guideline_catalog(GUIDELINES_FILE)
+    except FileNotFoundError:
+        return GuidelineCatalog(
+            {DEFAULT_LANG: GuidelineIndex(_DEFAULT_TIPS_DATA)}, "", {}
+        )
+
+
+_catalog = _load_initial_catalog()
+_index = _catalog.default
+# Raw English snippets of the current catalog (kept for existing importers; swapped on reload)
+TIPS_DATA = _index.data
+
+
+def current_index() -> GuidelineIndex:
+    """The English guideline index serving requests right now (its version covers every language)."""
+    return _index
+
+
+def index_for(lang: Optional[str]) -> GuidelineIndex:
+    """The guideline index for a request language, following the fallback chain to English."""
+    return _catalog.for_lang(lang)
+
+
+def is_localized(lang: Optional[str]) -> bool:
+    """True if `lang` resolves to a local non-English catalog (so no translation is needed)."""
+    return _catalog.for_lang(lang).lang != DEFAULT_LANG
+
+
+def warm_guidelines() -> None:
+    _catalog.warm()
+
+
+def describe_guidelines() -> Dict[str, object]:
+    return _catalog.describe()
+
+
+def reload_guidelines(force: bool = False) -> bool:
+    """
+    Recompile the snippets files if they changed and swap the catalog in.
+
+    Changes are detected by mtime, including language files being added or
+    removed (or always checked with force=True); content that hashes the
+    same is not swapped. Returns True when a new catalog was installed. A
+    missing or invalid file raises and leaves the current catalog serving.
+    """
+    global _catalog, _index, TIPS_DATA
+    if (
+        not force
+        and _catalog.mtimes
+        and _scan_mtimes(GUIDELINES_FILE) == _catalog.mtimes
+    ):
+        return False
+    catalog = load_guideline_catalog(GUIDELINES_FILE)
+    if catalog.sha256 == _catalog.sha256:
+        _catalog.mtimes = catalog.mtimes
+        return False
+    _catalog, _index, TIPS_DATA = catalog, catalog.default, catalog.default.data
+    logger.info(
+        "Reloaded guideline snippets from %s (version %s, languages %s)",
+        GUIDELINES_FILE,
+        catalog.version,
+        ", ".join(sorted(catalog.indexes)),
+    )
+    return True
 
 
 def generate_health_recommendations(
-    risk_level: str, 
-    flags: List[str], 
-    risk_score: int
+    risk_level: str,
+    flags: List[str],
+    risk_score: int,
+    flag_mask: Optional[int] = None,
+    lang: str = DEFAULT_LANG,
 ) -> Dict[str, any]:
     """
     Generate personalized health recommendations based on risk assessment.
-    
+
     Args:
         risk_level: The risk level (Low, Medium, High)
         flags: List of risk factor flags
         risk_score: Numerical risk score (0-100)
-        
+        flag_mask: Bitmask of `flags` if the caller already has it
+        lang: Language for the text (falls back to English if no catalog matches)
+
     Returns:
         Dictionary containing personalized recommendations
     """
-    # Take first 2-3 base tips for the risk level (deterministic)
-    base_tips = TIPS_DATA["base_tips"].get(risk_level, [])
-    selected_base = base_tips[:3] if len(base_tips) >= 3 else base_tips
-
-    # Add up to 2 factor-specific tips based on risk flags (deterministic, no duplicates)
-    factor_tips = []
-    seen_tips = set()
-    
-    for flag in flags:
-        if len(factor_tips) >= 2:  # Limit to 2 factor tips
-            break
-        tip = TIPS_DATA["factor_tips"].get(flag)
-        if tip and tip not in seen_tips:
-            factor_tips.append(tip)
-            seen_tips.add(tip)
+    if flag_mask is None:
+        flag_mask = encode_flags(flags)
+    index = index_for(lang)
 
     # Build comprehensive recommendations
     recommendations = {
-        "headline": f"Personalized recommendations for {risk_level} risk level",
+        "headline": index.headline_for(risk_level),
         "risk_summary": {
             "level": risk_level,
             "score": risk_score,
-            "risk_factors": flags
+            "risk_factors": flags,
         },
         "recommendations": {
-            "lifestyle": selected_base,
-            "specific_actions": factor_tips
+            "lifestyle": list(index.base_tips.get(risk_level, ())),
+            "specific_actions": list(index.factor_tips_for(flag_mask)),
         },
-        "priority_actions": _get_priority_actions(risk_level, flags),
-        "disclaimer": TIPS_DATA["disclaimer"],
-        "credits": TIPS_DATA.get("credits", [])
+        "priority_actions": list(index.priority_actions_for(risk_level, flag_mask)),
+        "disclaimer": index.disclaimer,
+        "credits": list(index.credits),
     }
-    
+
     # Add red flags for high-risk patients
     if risk_level == "High":
-        recommendations["red_flags"] = TIPS_DATA["red_flags"]
-        recommendations["urgent_actions"] = [
-            "Schedule an appointment with your healthcare provider",
-            "Begin monitoring blood glucose levels",
-            "Start lifestyle modifications immediately"
-        ]
-    
+        recommendations["red_flags"] = index.red_flags
+        recommendations["urgent_actions"] = list(index.urgent_actions)
+
     return recommendations
 
 
-def _get_priority_actions(risk_level: str, flags: List[str]) -> List[str]:
-    """Get priority actions based on risk level and flags."""
-    priority_actions = []
-    
-    if risk_level == "High":
-        priority_actions.extend([
-            "Schedule medical consultation within 1 week",
-            "Start blood glucose monitoring",
-            "Begin lifestyle modifications immediately"
-        ])
-    elif risk_level == "Medium":
-        priority_actions.extend([
-            "Schedule check-up within 1 month",
-            "Start diet and exercise plan",
-            "Monitor blood pressure regularly"
-        ])
-    else:  # Low risk
-        priority_actions.extend([
-            "Continue healthy lifestyle habits",
-            "Annual health check-up",
-            "Stay informed about diabetes prevention"
-        ])
-    
-    # Add specific actions based on flags
-    if "bmi_high" in flags:
-        priority_actions.append("Focus on weight management")
-    if "bp_high" in flags:
-        priority_actions.append("Monitor blood pressure closely")
-    if "low_physical_activity" in flags:
-        priority_actions.append("Increase physical activity to 150+ minutes/week")
-    if any("smoking" in flag for flag in flags):
-        priority_actions.append("Consider smoking cessation programs")
-    if any("alcohol" in flag for flag in flags):
-        priority_actions.append("Reduce alcohol consumption")
-    
-    return priority_actions
+def pick_tips_for_mask(level: str, flag_mask: int, lang: str = DEFAULT_LANG) -> Dict:
+    """Pick appropriate tips for a risk level and flag bitmask, in `lang` when a catalog exists."""
+    index = index_for(lang)
+    tips_block = {
+        "headline": index.headline_for(level),
+        "actions": list(
+            index.base_tips.get(level, ()) + index.factor_tips_for(flag_mask)
+        ),
+        "disclaimer": index.disclaimer,
+    }
+
+    # Add red_flags only for High risk
+    if level == "High":
+        tips_block["red_flags"] = index.red_flags
+
+    return tips_block
+
+
+def pick_tips(level: str, flags: List[str], lang: str = DEFAULT_LANG) -> Dict:
+    """Pick appropriate tips based on risk level and flags."""
+    return pick_tips_for_mask(level, encode_flags(flags), lang)
 
 
 def get_recommendation_summary(risk_level: str, risk_score: int) -> str:
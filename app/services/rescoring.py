@@ -0,0 +1,254 @@
+"""
+Bulk re-scoring of exported questionnaires.
+
+Rows are read lazily from CSV or JSONL, grouped into chunks and validated,
+scored and serialized in worker processes. Results are written in input
+order as NDJSON or CSV, and rows that fail RiskInput validation go to a
+rejects file. Only a small window of chunks is in flight at any time, so
+memory stays flat whatever the size of the input.
+"""
+
+import csv
+import io
+import json
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from pydantic import ValidationError
+
+from .codec import dumps, validate_risk_row
+from .recommendations import generate_health_recommendations, warm_guidelines
+from .risk_scoring import decode_flag_mask, score_risk
+
+INPUT_FORMATS = ("csv", "jsonl")
+OUTPUT_FORMATS = ("ndjson", "csv")
+
+# Column order for CSV output; NDJSON uses the same keys
+OUTPUT_FIELDS = (
+    "row",
+    "id",
+    "user_id",
+    "name",
+    "bmi",
+    "risk_score",
+    "risk_level",
+    "flags",
+    "recommendations",
+)
+
+
+class Row(NamedTuple):
+    """One input row: 1-based data row number, parsed values (or None) and a parse error (or None)."""
+
+    number: int
+    values: Optional[Dict[str, object]]
+    error: Optional[str]
+
+
+class ChunkResult(NamedTuple):
+    output: str
+    rejects: str
+    ok: int
+    rejected: int
+
+
+def detect_format(path: str, explicit: Optional[str] = None) -> str:
+    """Input format from --input-format or the file extension (.csv, .jsonl/.ndjson)."""
+    if explicit:
+        return explicit
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(
+        f"Can't tell the format of {path!r}; pass --input-format ({'/'.join(INPUT_FORMATS)})"
+    )
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Row]:
+    """Yield rows one at a time. Empty CSV cells are dropped so model defaults (e.g. derived BMI) apply."""
+    if fmt == "csv":
+        for number, record in enumerate(csv.DictReader(stream), 1):
+            yield Row(
+                number,
+                {
+                    k: v
+                    for k, v in record.items()
+                    if k is not None and v not in ("", None)
+                },
+                None,
+            )
+        return
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            values = json.loads(line)
+        except ValueError as e:
+            yield Row(number, None, f"Invalid JSON: {e}")
+            continue
+        if isinstance(values, dict):
+            yield Row(number, values, None)
+        else:
+            yield Row(number, None, "Row must be a JSON object")
+
+
+def chunked(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(OUTPUT_FIELDS)
+    return buffer.getvalue()
+
+
+def _reject(row: Row, errors) -> str:
+    document = {"row": row.number, "errors": errors, "input": row.values}
+    return json.dumps(document, ensure_ascii=False, default=str) + "\n"
+
+
+def score_chunk(
+    chunk: List[Row],
+    output_format: str,
+    strict: bool,
+    with_recommendations: bool,
+    id_column: Optional[str],
+) -> ChunkResult:
+    """Validate, score and serialize one chunk (runs in a worker process)."""
+    output: List[str] = []
+    rejects: List[str] = []
+    buffer = io.StringIO()
+    csv_out = csv.writer(buffer) if output_format == "csv" else None
+    for row in chunk:
+        if row.error is not None:
+            rejects.append(_reject(row, row.error))
+            continue
+        try:
+            patient = validate_risk_row(row.values, strict=strict)
+        except ValidationError as e:
+            rejects.append(_reject(row, e.errors(include_url=False)))
+            continue
+
+        risk_score, risk_level, flag_mask = score_risk(patient)
+        flags = decode_flag_mask(flag_mask)
+        result = {
+            "row": row.number,
+            "id": row.values.get(id_column) if id_column else None,
+            "user_id": patient.user_id,
+            "name": patient.name,
+            "bmi": patient.bmi,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "flags": flags,
+        }
+        if with_recommendations:
+            result["recommendations"] = generate_health_recommendations(
+                risk_level, flags, risk_score, flag_mask, lang=patient.lang or "en"
+            )
+
+        if csv_out is not None:
+            result["flags"] = ";".join(flags)
+            if with_recommendations:
+                result["recommendations"] = dumps(result["recommendations"]).decode(
+                    "utf-8"
+                )
+            csv_out.writerow([result.get(field) for field in OUTPUT_FIELDS])
+        else:
+            output.append(dumps(result).decode("utf-8") + "\n")
+
+    text = buffer.getvalue() if csv_out is not None else "".join(output)
+    return ChunkResult(text, "".join(rejects), len(chunk) - len(rejects), len(rejects))
+
+
+class _InlineExecutor(Executor):
+    """Runs chunks in this process (workers=1) behind the Executor interface."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def _warm_worker() -> None:
+    warm_guidelines()
+
+
+def rescore(
+    rows: Iterable[Row],
+    write_output: Callable[[str], object],
+    write_rejects: Callable[[str], object],
+    workers: int = 1,
+    chunk_size: int = 2000,
+    output_format: str = "ndjson",
+    strict: bool = True,
+    with_recommendations: bool = False,
+    id_column: Optional[str] = None,
+    on_progress: Optional[Callable[[int, int], object]] = None,
+) -> Tuple[int, int]:
+    """
+    Score `rows` across `workers` processes, writing results in input order.
+
+    At most 2 * workers chunks are read ahead, so memory is bounded by
+    chunk_size rather than by the input. Returns (ok, rejected).
+    """
+    executor: Executor = (
+        ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        if workers > 1
+        else _InlineExecutor()
+    )
+    window = max(1, 2 * workers)
+    pending: deque = deque()
+    ok = rejected = 0
+
+    def drain_one() -> None:
+        nonlocal ok, rejected
+        result: ChunkResult = pending.popleft().result()
+        if result.output:
+            write_output(result.output)
+        if result.rejects:
+            write_rejects(result.rejects)
+        ok += result.ok
+        rejected += result.rejected
+        if on_progress is not None:
+            on_progress(ok, rejected)
+
+    try:
+        for chunk in chunked(rows, max(1, chunk_size)):
+            pending.append(
+                executor.submit(
+                    score_chunk,
+                    chunk,
+                    output_format,
+                    strict,
+                    with_recommendations,
+                    id_column,
+                )
+            )
+            while len(pending) >= window:
+                drain_one()
+        while pending:
+            drain_one()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return ok, rejected
@@ -0,0 +1,192 @@
+"""
+Rewrite cache for Granite output.
+
+Granite runs with greedy decoding, so the same (actions, lang) pair always
+produces the same rewrite. This module keeps those rewrites in a bounded
+in-process LRU/TTL cache with an optional SQLite tier that survives restarts,
+and collapses concurrent misses for the same key into one upstream call.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .granite_batcher import micro_batcher
+
+try:
+    from .. import config  # our local config file
+except ImportError:
+    config = None
+
+CacheKey = Tuple[str, Tuple[str, ...]]
+RewriteFn = Callable[[List[str], str], Awaitable[Optional[List[str]]]]
+
+
+class _DiskTier:
+    """Small SQLite key/value store used as the persistent cache tier."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rewrites ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, ttl: float) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM rewrites WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rewrites (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RewriteCache:
+    """Bounded LRU/TTL cache with single-flight loading and an optional disk tier."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[str]]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self._disk: Optional[_DiskTier] = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def open_disk_tier(self, path: Optional[str]) -> None:
+        """Attach the persistent tier. A falsy path leaves the cache memory-only."""
+        if path and self._disk is None:
+            self._disk = _DiskTier(path)
+
+    def close_disk_tier(self) -> None:
+        if self._disk is not None:
+            disk, self._disk = self._disk, None
+            disk.close()
+
+    @staticmethod
+    def make_key(actions: List[str], lang: str) -> CacheKey:
+        return (lang, tuple(actions))
+
+    @staticmethod
+    def _disk_key(key: CacheKey) -> str:
+        model_id = getattr(config, "IBM_WX_MODEL_ID", "")
+        raw = json.dumps([model_id, key[0], list(key[1])], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: CacheKey) -> Optional[List[str]]:
+        """Return a fresh in-memory entry (and mark it recently used), or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: CacheKey, value: List[str]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(
+        self, actions: List[str], lang: str, loader: RewriteFn
+    ) -> Optional[List[str]]:
+        """
+        Return the cached rewrite for (actions, lang), calling loader on a miss.
+
+        Concurrent misses for the same key share one loader call. Failed
+        rewrites (None) are not cached so the next request retries upstream.
+        """
+        key = self.make_key(actions, lang)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # Shield so a cancelled caller doesn't cancel the shared upstream call
+        return await asyncio.shield(task)
+
+    async def _load(self, key: CacheKey, loader: RewriteFn) -> Optional[List[str]]:
+        if self._disk is not None:
+            value = await asyncio.to_thread(
+                self._disk.get, self._disk_key(key), self.ttl_seconds
+            )
+            if value is not None:
+                self.disk_hits += 1
+                self.put(key, value)
+                return value
+
+        value = await loader(list(key[1]), key[0])
+        if value:
+            self.put(key, value)
+            if self._disk is not None:
+                await asyncio.to_thread(self._disk.put, self._disk_key(key), value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "in_flight": len(self._inflight),
+            "disk_tier": self._disk is not None,
+        }
+
+
+rewrite_cache = RewriteCache(
+    max_entries=getattr(config, "REWRITE_CACHE_MAX_ENTRIES", 2048),
+    ttl_seconds=getattr(config, "REWRITE_CACHE_TTL_SECONDS", 86400.0),
+)
+
+
+async def rewrite_tips_cached(
+    actions: List[str], lang: str = "en"
+) -> Optional[List[str]]:
+    """Cached front for Granite rewrites; misses go through the micro-batcher."""
+    return await rewrite_cache.get_or_load(actions, lang, micro_batcher.rewrite)
@@ -1,78 +1,298 @@
-from typing import Tuple, List
-from ..models import RiskInput
+"""
+Diabetes risk scoring.
+
+Scoring rules (thresholds, weights and risk levels) are declared in
+data/scoring_rules.json and compiled into a rule table at import time.
+Flags are tracked internally as an int bitmask over FLAG_NAMES; the string
+flags list is only produced for the public API.
+"""
+
+import json
+import operator
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from ..models import AlcoholStatus, FamilyHistoryDiabetes, RiskInput, SmokingStatus
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for calculate_risk_batch
+    np = None
+
+SCORING_RULES_FILE = Path(__file__).parent.parent / "data" / "scoring_rules.json"
+
+# Integer encodings for the enum columns accepted by calculate_risk_batch
+FAMILY_HISTORY_CODES = {
+    member.value: i for i, member in enumerate(FamilyHistoryDiabetes)
+}
+SMOKING_CODES = {member.value: i for i, member in enumerate(SmokingStatus)}
+ALCOHOL_CODES = {member.value: i for i, member in enumerate(AlcoholStatus)}
+_ENUM_CODES = {
+    "family_history_diabetes": FAMILY_HISTORY_CODES,
+    "smoking_status": SMOKING_CODES,
+    "alcohol_status": ALCOHOL_CODES,
+}
+
+_SCALAR_OPS = {"ge": ">=", "gt": ">", "le": "<=", "lt": "<", "eq": "==", "in": "in"}
+
+
+class Condition(NamedTuple):
+    field: str
+    op: str
+    value: object
+
+
+class Rule(NamedTuple):
+    """One compiled scoring rule: adds `weight` and sets `bit` when any condition matches."""
+
+    flag: str
+    bit: int
+    weight: int
+    conditions: Tuple[Condition, ...]
+
+
+def _parse_rules(
+    spec: Dict,
+) -> Tuple[Tuple[Rule, ...], Tuple[Tuple[int, str], ...], int]:
+    rules = []
+    for i, raw_rule in enumerate(spec["rules"]):
+        conditions = []
+        for raw in raw_rule["any"]:
+            field, op, value = raw["field"], raw["op"], raw["value"]
+            if field not in RiskInput.model_fields:
+                raise ValueError(f"Unknown field in scoring rule: {field}")
+            if op not in _SCALAR_OPS:
+                raise ValueError(f"Unknown operator in scoring rule: {op}")
+            conditions.append(
+                Condition(field, op, tuple(value) if op == "in" else value)
+            )
+        rules.append(
+            Rule(raw_rule["flag"], 1 << i, int(raw_rule["weight"]), tuple(conditions))
+        )
+    levels = tuple(
+        (int(level["max_score"]), level["level"]) for level in spec["levels"]
+    )
+    return tuple(rules), levels, int(spec["max_score"])
+
+
+def _compile_scorer(
+    rules: Tuple[Rule, ...], levels: Tuple[Tuple[int, str], ...], max_score: int
+) -> Callable[[object], Tuple[int, str, int]]:
+    """
+    Compile the rule table into one straight-line function returning (score, level, mask).
+
+    Generating a single function keeps per-request cost to one call with plain
+    attribute reads and comparisons, instead of a closure call per condition.
+    Rule values are passed in as bound constants, never spliced into the source.
+    """
+    namespace: Dict[str, object] = {}
+    lines = ["def _score(patient):", "    score = 0", "    mask = 0"]
+    for r, rule in enumerate(rules):
+        tests = []
+        for c, condition in enumerate(rule.conditions):
+            const = f"_v{r}_{c}"
+            namespace[const] = condition.value
+            test = f"patient.{condition.field} {_SCALAR_OPS[condition.op]} {const}"
+            if (
+                condition.op in ("ge", "gt", "le", "lt")
+                and not RiskInput.model_fields[condition.field].is_required()
+            ):
+                # Optional numeric fields (bmi) never match when missing
+                test = f"(patient.{condition.field} is not None and {test})"
+            tests.append(test)
+        lines.append(f"    if {' or '.join(tests)}:")
+        lines.append(f"        score += {rule.weight}")
+        lines.append(f"        mask |= {rule.bit}")
+    lines.append(f"    if score > {max_score}:")
+    lines.append(f"        score = {max_score}")
+    for i, (level_max, level) in enumerate(levels[:-1]):
+        namespace[f"_level{i}"] = level
+        lines.append(f"    if score <= {level_max}:")
+        lines.append(f"        return score, _level{i}, mask")
+    namespace["_level_top"] = levels[-1][1]
+    lines.append("    return score, _level_top, mask")
+    exec(compile("\n".join(lines), "<scoring_rules>", "exec"), namespace)
+    return namespace["_score"]
+
+
+def _load_rules() -> Dict:
+    """Load the scoring rule declarations from JSON."""
+    with open(SCORING_RULES_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+RULE_TABLE, LEVEL_THRESHOLDS, MAX_SCORE = _parse_rules(_load_rules())
+_score_patient = _compile_scorer(RULE_TABLE, LEVEL_THRESHOLDS, MAX_SCORE)
+
+# Flag names in rule order; bit i of a flag mask is FLAG_NAMES[i]
+FLAG_NAMES = tuple(rule.flag for rule in RULE_TABLE)
+FLAG_BITS = {rule.flag: rule.bit for rule in RULE_TABLE}
+
+# Level codes returned by calculate_risk_batch index into RISK_LEVELS
+RISK_LEVELS = tuple(level for _, level in LEVEL_THRESHOLDS)
+
+
+@lru_cache(maxsize=None)
+def flag_names_for_mask(mask: int) -> Tuple[str, ...]:
+    """Flag names set in a bitmask, in rule order."""
+    return tuple(rule.flag for rule in RULE_TABLE if mask & rule.bit)
+
+
+def decode_flag_mask(mask: int) -> List[str]:
+    """Expand a flag bitmask into the flags list calculate_risk would return."""
+    return list(flag_names_for_mask(mask))
+
+
+def encode_flags(flags: List[str]) -> int:
+    """Pack a list of flag names into a bitmask. Unknown flags are ignored."""
+    mask = 0
+    for flag in flags:
+        mask |= FLAG_BITS.get(flag, 0)
+    return mask
+
+
+def score_risk(patient_data: RiskInput) -> Tuple[int, str, int]:
+    """
+    Run the rule table over one patient.
+
+    Returns:
+        Tuple of (risk_score, risk_level, flag_mask)
+    """
+    return _score_patient(patient_data)
 
 
 def calculate_risk(patient_data: RiskInput) -> Tuple[int, str, List[str]]:
     """
     Calculate diabetes risk score based on patient questionnaire data.
-    
+
     Args:
         patient_data: RiskInput object containing patient information
-        
+
     Returns:
         Tuple of (risk_score, risk_level, flags)
     """
-    score = 0
-    flags = []
-    
-    # Age scoring
-    if patient_data.age >= 45:
-        score += 10
-        flags.append("age_high")
-    
-    # BMI scoring
-    if patient_data.bmi is not None and patient_data.bmi >= 30:
-        score += 15
-        flags.append("bmi_high")
-    
-    # History of high glucose
-    if patient_data.history_high_glucose:
-        score += 20
-        flags.append("high_glucose_history")
-    
-    # Blood pressure scoring (≥ 140/90)
-    if patient_data.bp_sys >= 140 or patient_data.bp_dia >= 90:
-        score += 25
-        flags.append("bp_high")
-    
-    # Physical activity scoring (< 4 hours per week)
-    if patient_data.physical_activity_hours_per_week < 4:
-        score += 10
-        flags.append("low_physical_activity")
-    
-    # Family history scoring
-    if patient_data.family_history_diabetes == "second_degree":
-        score += 10
-        flags.append("family_history_second_degree")
-    elif patient_data.family_history_diabetes == "first_degree":
-        score += 20
-        flags.append("family_history_first_degree")
-    
-    # Smoking status scoring
-    if patient_data.smoking_status in ["former", "moderate"]:
-        score += 5
-        flags.append("smoking_risk")
-    elif patient_data.smoking_status in ["current", "heavy"]:
-        score += 15
-        flags.append("smoking_high_risk")
-    
-    # Alcohol status scoring
-    if patient_data.alcohol_status == "moderate":
-        score += 5
-        flags.append("alcohol_risk")
-    elif patient_data.alcohol_status in ["current", "heavy"]:
-        score += 15
-        flags.append("alcohol_high_risk")
-    
-    # Cap score at 100
-    score = min(score, 100)
-    
-    # Determine risk level
-    if score <= 30:
-        risk_level = "Low"
-    elif score <= 60:
-        risk_level = "Medium"
+    score, risk_level, mask = _score_patient(patient_data)
+    return score, risk_level, list(flag_names_for_mask(mask))
+
+
+class RiskBatchResult(NamedTuple):
+    """Columnar output of calculate_risk_batch."""
+
+    scores: "np.ndarray"  # int64 risk scores (0-100)
+    level_codes: "np.ndarray"  # int8 indexes into RISK_LEVELS
+    flag_masks: "np.ndarray"  # int32 bitmasks over FLAG_NAMES
+    bmi: "np.ndarray"  # float64 BMI used for scoring
+
+
+def _round_bmi(raw: "np.ndarray") -> "np.ndarray":
+    """Round BMI to 1 decimal exactly like the RiskInput validator's round()."""
+    bmi = np.round(raw, 1)
+    # np.round scales by 10 first, which can land on the other side of a .x5
+    # boundary than Python's correctly-rounded round(); redo those few in Python.
+    scaled = raw * 10
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        idx = np.nonzero(near_half)[0]
+        bmi[idx] = [round(float(v), 1) for v in raw[idx]]
+    return bmi
+
+
+def _vector_condition(
+    condition: Condition, columns: Dict[str, "np.ndarray"]
+) -> "np.ndarray":
+    column = columns[condition.field]
+    if condition.op == "in":
+        codes = _ENUM_CODES.get(condition.field)
+        targets = (
+            [codes[v] for v in condition.value] if codes else list(condition.value)
+        )
+        return np.isin(column, targets)
+    if condition.op == "eq":
+        return column == condition.value
+    # NaN compares False, matching the scalar `value is not None and ...` guard
+    return {"ge": operator.ge, "gt": operator.gt, "le": operator.le, "lt": operator.lt}[
+        condition.op
+    ](column, condition.value)
+
+
+def calculate_risk_batch(
+    age,
+    bp_sys,
+    bp_dia,
+    history_high_glucose,
+    physical_activity_hours_per_week,
+    family_history_diabetes,
+    smoking_status,
+    alcohol_status,
+    bmi=None,
+    height=None,
+    weight=None,
+) -> RiskBatchResult:
+    """
+    Vectorized calculate_risk over columns of patient data.
+
+    Args:
+        age, bp_sys, bp_dia, physical_activity_hours_per_week: numeric arrays
+        history_high_glucose: boolean array
+        family_history_diabetes, smoking_status, alcohol_status: integer codes
+            from FAMILY_HISTORY_CODES, SMOKING_CODES and ALCOHOL_CODES
+        bmi: optional BMI array; NaN entries (or a missing array) are derived
+            from height (cm) and weight (kg) the same way RiskInput does
+        height, weight: arrays required wherever bmi is not provided
+
+    Returns:
+        RiskBatchResult of scores, level codes, flag bitmasks and BMI, giving
+        the same results as calculate_risk row by row
+    """
+    if np is None:
+        raise ImportError("calculate_risk_batch requires numpy (pip install numpy)")
+
+    age = np.asarray(age)
+    n = age.shape[0]
+
+    if bmi is None:
+        bmi = np.full(n, np.nan)
     else:
-        risk_level = "High"
-    
-    return score, risk_level, flags
+        bmi = np.array(bmi, dtype=np.float64)
+    missing = np.isnan(bmi)
+    if missing.any():
+        if height is None or weight is None:
+            raise ValueError("height and weight are required where bmi is not provided")
+        height_m = np.asarray(height, dtype=np.float64)[missing] / 100
+        bmi[missing] = _round_bmi(
+            np.asarray(weight, dtype=np.float64)[missing] / (height_m**2)
+        )
+
+    columns = {
+        "age": age,
+        "bmi": bmi,
+        "bp_sys": np.asarray(bp_sys),
+        "bp_dia": np.asarray(bp_dia),
+        "history_high_glucose": np.asarray(history_high_glucose, dtype=bool),
+        "physical_activity_hours_per_week": np.asarray(
+            physical_activity_hours_per_week
+        ),
+        "family_history_diabetes": np.asarray(family_history_diabetes),
+        "smoking_status": np.asarray(smoking_status),
+        "alcohol_status": np.asarray(alcohol_status),
+    }
+
+    scores = np.zeros(n, dtype=np.int64)
+    masks = np.zeros(n, dtype=np.int32)
+    for rule in RULE_TABLE:
+        hit = np.zeros(n, dtype=bool)
+        for condition in rule.conditions:
+            hit |= _vector_condition(condition, columns)
+        scores += hit * rule.weight
+        masks |= hit * rule.bit
+
+    scores = np.minimum(scores, MAX_SCORE)
+    thresholds = np.array([max_score for max_score, _ in LEVEL_THRESHOLDS])
+    level_codes = np.minimum(
+        np.searchsorted(thresholds, scores, side="left"), len(thresholds) - 1
+    ).astype(np.int8)
+
+    return RiskBatchResult(
+        scores=scores, level_codes=level_codes, flag_masks=masks, bmi=bmi
+    )
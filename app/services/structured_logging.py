@@ -0,0 +1,199 @@
+"""
+Non-blocking structured logging.
+
+Log calls on the event loop only build a LogRecord and put it on an
+in-memory queue; a QueueListener thread formats (lazily, so %-args are only
+rendered off the loop) and writes them. Records can carry structured fields
+via ``extra={"fields": {...}}``. Per-request records go through log_request(),
+which samples per endpoint before a record is even built. Configured fields
+(the patient name by default) are redacted before anything is written, and
+a full queue drops records instead of blocking.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, Optional
+
+REDACTED = "[redacted]"
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, endpoint, fields and exc."""
+
+    def __init__(self, redact: Iterable[str] = ()):
+        super().__init__()
+        self.redact = frozenset(redact)
+
+    def _fields(self, record: logging.LogRecord) -> Dict[str, object]:
+        fields = dict(getattr(record, "fields", None) or {})
+        for key in self.redact.intersection(fields):
+            fields[key] = REDACTED
+        return fields
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        endpoint = getattr(record, "endpoint", None)
+        if endpoint:
+            document["endpoint"] = endpoint
+        fields = self._fields(record)
+        if fields:
+            document["fields"] = fields
+        if record.exc_info:
+            document["exc"] = self.formatException(record.exc_info)
+        return json.dumps(document, ensure_ascii=False, default=str)
+
+
+class TextFormatter(JSONFormatter):
+    """The classic ``LEVEL:logger:message`` line, with redacted fields appended as key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{record.levelname}:{record.name}:{record.getMessage()}"
+        fields = self._fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class Sampler:
+    """Keep a fraction of per-request records per endpoint; unknown endpoints use `default_rate`."""
+
+    def __init__(
+        self, rates: Optional[Dict[str, float]] = None, default_rate: float = 1.0
+    ):
+        self.rates = rates or {}
+        self.default_rate = default_rate
+
+    def keep(self, endpoint: str) -> bool:
+        rate = self.rates.get(endpoint, self.default_rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that defers formatting to the listener and drops records when the queue is full."""
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # In-process queue: no need to pre-render the message or pickle args
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "path=rate,path=rate" (e.g. "/risk/submit=0.1") into a dict."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        path, _, rate = item.rpartition("=")
+        if path:
+            rates[path.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_queue_size = 10000
+_sampler = Sampler()
+
+
+def log_request(
+    logger: logging.Logger, endpoint: str, msg: str, fields: Dict[str, object]
+) -> None:
+    """Log an INFO record for a handled request, subject to the endpoint's sample rate."""
+    if _sampler.keep(endpoint) and logger.isEnabledFor(logging.INFO):
+        logger.info(msg, extra={"endpoint": endpoint, "fields": fields})
+
+
+def _start_listener() -> None:
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_handler.formatter)
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    redact: Iterable[str] = ("name",),
+    sample_rates: Optional[Dict[str, float]] = None,
+    default_sample_rate: float = 1.0,
+    queue_size: int = 10000,
+    skip_source_location: bool = False,
+    force: bool = False,
+) -> None:
+    """
+    Route the root logger through a bounded queue and a background writer.
+
+    Like logging.basicConfig, does nothing if the root logger already has
+    handlers unless `force` is set. `skip_source_location` turns off the
+    stdlib's per-record stack walk for the whole process, so it also leaves
+    funcName/lineno empty for any other handler; only use it when nothing
+    logs source locations.
+    """
+    global _handler, _queue_size, _sampler
+    _sampler = Sampler(sample_rates, default_sample_rate)
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    stop_logging()
+
+    _queue_size = max(1, queue_size)
+    formatter = (TextFormatter if fmt == "text" else JSONFormatter)(redact)
+    _handler = NonBlockingQueueHandler(queue.Queue(_queue_size))
+    _handler.setFormatter(formatter)
+    root.addHandler(_handler)
+    if skip_source_location:
+        logging._srcfile = None
+    root.setLevel(level.upper())
+    _start_listener()
+
+
+def _restart_in_child() -> None:
+    # The listener thread doesn't survive fork (e.g. gunicorn preload_app)
+    if _handler is not None:
+        _handler.queue = queue.Queue(_queue_size)  # drop the parent's backlog
+        _start_listener()
+
+
+if hasattr(os, "register_at_fork"):  # not on Windows
+    os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(stop_logging)
+
+
+def stats() -> Dict[str, object]:
+    return {
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0,
+    }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the WatsonX text generation API.
+
+Serves /ml/v1/text/generation and /ml/v1/text/generation_stream with
+configurable latency, error rate and timeouts, so load tests can show how
+upstream behaviour affects the API's tail latency without calling IBM.
+
+Point the API at it with:
+    IBM_WX_URL=http://127.0.0.1:9100 IBM_WX_API_KEY=fake IBM_WX_PROJECT_ID=fake
+
+Examples:
+    python benchmarks/fake_granite.py --latency-ms 800 --jitter-ms 200
+    python benchmarks/fake_granite.py --error-rate 0.1 --timeout-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+settings = {
+    "latency_ms": 500.0,
+    "jitter_ms": 100.0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "timeout_rate": 0.0,
+    "timeout_s": 60.0,
+}
+stats = {"requests": 0, "errors": 0, "timeouts": 0}
+
+app = FastAPI(title="Fake WatsonX Granite")
+
+
+def _rewrite(user_prompt: str) -> str:
+    """Echo the tips back as bullets, keeping '### n' item headers for multi-item prompts."""
+    out = []
+    for line in user_prompt.splitlines():
+        if re.match(r"^\s*###\s*\d+", line):
+            out.append(line.strip())
+        elif line.startswith("- "):
+            out.append(f"- {line[2:].strip()} (simplified)")
+    return "\n".join(out)
+
+
+async def _upstream_delay() -> Response | None:
+    """Sleep like a real model call. Returns an error response when one is injected."""
+    stats["requests"] += 1
+    roll = random.random()
+    if roll < settings["timeout_rate"]:
+        stats["timeouts"] += 1
+        await asyncio.sleep(settings["timeout_s"])
+    delay = max(0.0, random.gauss(settings["latency_ms"], settings["jitter_ms"])) / 1000
+    await asyncio.sleep(delay)
+    if roll < settings["timeout_rate"] + settings["error_rate"]:
+        stats["errors"] += 1
+        return Response(status_code=settings["error_status"], content=b'{"errors":[{"code":"injected"}]}',
+                        media_type="application/json")
+    return None
+
+
+@app.post("/ml/v1/text/generation")
+async def generation(request: Request):
+    body = await request.json()
+    error = await _upstream_delay()
+    if error is not None:
+        return error
+    return {"results": [{"generated_text": _rewrite(body["input"][-1]["content"])}]}
+
+
+@app.post("/ml/v1/text/generation_stream")
+async def generation_stream(request: Request):
+    body = await request.json()
+    error = await _upstream_delay()
+    if error is not None:
+        return error
+    text = _rewrite(body["input"][-1]["content"])
+
+    async def events():
+        for i, start in enumerate(range(0, len(text), 24)):
+            chunk = {"results": [{"generated_text": text[start:start + 24]}]}
+            yield f"id: {i}\nevent: message\ndata: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(0.01)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def get_stats():
+    return {"settings": settings, **stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"], help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=settings["jitter_ms"], help="Latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for injected errors")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--timeout-s", type=float, default=60.0, help="How long a hanging request hangs")
+    args = parser.parse_args()
+
+    settings.update(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, timeout_rate=args.timeout_rate, timeout_s=args.timeout_s,
+    )
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+End-to-end load harness for the DiaWell API.
+
+Replays JSONL payloads (one RiskInput per line, like the batch endpoint
+accepts) against /risk/submit and/or /recommendations/generate at a fixed
+concurrency and reports throughput and p50/p95/p99 latency as JSON.
+
+With --spawn it starts the local fake Granite server and the API itself,
+so upstream latency, error rate and timeouts can be varied per run.
+
+Examples:
+    python benchmarks/load.py --spawn --granite-latency-ms 800 --concurrency 64 --duration 30
+    python benchmarks/load.py --base-url http://localhost:8000 --payloads payloads.jsonl \\
+        --endpoint mixed --requests 20000 --output bench_results/load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add the Backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models import RiskInput  # noqa: E402
+from app.services.risk_scoring import calculate_risk  # noqa: E402
+
+ENDPOINTS = {
+    "submit": "/risk/submit",
+    "recommendations": "/recommendations/generate",
+}
+
+
+def synth_payloads(count: int, seed: int) -> list[dict]:
+    """Random but valid questionnaires covering all risk levels."""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        payloads.append({
+            "name": f"Load Test {i}",
+            "age": rng.randint(18, 85),
+            "gender": rng.choice(["female", "male", "other"]),
+            "height": round(rng.uniform(150, 195), 1),
+            "weight": round(rng.uniform(45, 130), 1),
+            "bp_sys": rng.randint(95, 180),
+            "bp_dia": rng.randint(60, 110),
+            "history_high_glucose": rng.random() < 0.25,
+            "physical_activity_hours_per_week": round(rng.uniform(0, 10), 1),
+            "family_history_diabetes": rng.choice(["none", "second_degree", "first_degree"]),
+            "smoking_status": rng.choice(["never", "former", "moderate", "current", "heavy"]),
+            "alcohol_status": rng.choice(["never", "former", "moderate", "current", "heavy"]),
+            "lang": rng.choice(["en", "en", "en", "hi"]),
+        })
+    return payloads
+
+
+def load_payloads(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def to_reco_payload(payload: dict) -> dict:
+    """Turn a questionnaire into the /recommendations/generate body it would lead to."""
+    risk_score, risk_level, flags = calculate_risk(RiskInput(**payload))
+    return {"risk_level": risk_level, "risk_score": risk_score, "flags": flags}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], statuses: dict, errors: int, elapsed: float) -> dict:
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(latencies) + errors,
+        "ok": statuses.get("200", 0),
+        "statuses": statuses,
+        "transport_errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "min": round(ms[0], 2) if ms else 0.0,
+            "mean": round(sum(ms) / len(ms), 2) if ms else 0.0,
+            "p50": round(percentile(ms, 50), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "max": round(ms[-1], 2) if ms else 0.0,
+        },
+    }
+
+
+async def run_load(base_url: str, jobs: list[tuple[str, dict]], concurrency: int,
+                   total: int | None, duration: float | None, timeout: float) -> dict:
+    results = {name: {"latencies": [], "statuses": {}, "errors": 0} for name in ENDPOINTS}
+    counter = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+
+        async def worker():
+            nonlocal counter
+            while True:
+                if total is not None and counter >= total:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                name, body = jobs[counter % len(jobs)]
+                counter += 1
+                bucket = results[name]
+                start = time.perf_counter()
+                try:
+                    response = await client.post(ENDPOINTS[name], json=body)
+                except httpx.HTTPError:
+                    bucket["errors"] += 1
+                    continue
+                bucket["latencies"].append(time.perf_counter() - start)
+                key = str(response.status_code)
+                bucket["statuses"][key] = bucket["statuses"].get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        name: summarize(bucket["latencies"], bucket["statuses"], bucket["errors"], elapsed)
+        for name, bucket in results.items()
+        if bucket["latencies"] or bucket["errors"]
+    }
+    all_latencies = [v for bucket in results.values() for v in bucket["latencies"]]
+    all_statuses: dict = {}
+    for bucket in results.values():
+        for key, count in bucket["statuses"].items():
+            all_statuses[key] = all_statuses.get(key, 0) + count
+    report["total"] = summarize(all_latencies, all_statuses, sum(b["errors"] for b in results.values()), elapsed)
+    report["elapsed_s"] = round(elapsed, 3)
+    return report
+
+
+def _wait_until_up(url: str, timeout: float = 20.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn_servers(args) -> list[subprocess.Popen]:
+    """Start the fake Granite server and the API (pointed at it) as subprocesses."""
+    fake = subprocess.Popen([
+        sys.executable, str(backend_dir / "benchmarks" / "fake_granite.py"),
+        "--port", str(args.granite_port),
+        "--latency-ms", str(args.granite_latency_ms),
+        "--jitter-ms", str(args.granite_jitter_ms),
+        "--error-rate", str(args.granite_error_rate),
+        "--timeout-rate", str(args.granite_timeout_rate),
+    ])
+    env = dict(os.environ,
+               IBM_WX_URL=f"http://127.0.0.1:{args.granite_port}",
+               IBM_WX_API_KEY="fake-key",
+               IBM_WX_PROJECT_ID="fake-project")
+    api = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.api_port), "--log-level", "warning",
+    ], cwd=str(backend_dir), env=env)
+    _wait_until_up(f"http://127.0.0.1:{args.granite_port}/stats")
+    _wait_until_up(f"http://127.0.0.1:{args.api_port}/")
+    return [api, fake]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API to load (ignored with --spawn)")
+    parser.add_argument("--payloads", help="JSONL file of RiskInput payloads (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=1000, help="Synthetic payload count (default: 1000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--endpoint", choices=["submit", "recommendations", "mixed"], default="submit")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, help="Total requests to send")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run when --requests is not set")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request (s)")
+    parser.add_argument("--output", help="Write the JSON report to this file as well as stdout")
+
+    spawn = parser.add_argument_group("spawned servers")
+    spawn.add_argument("--spawn", action="store_true", help="Start fake Granite and the API locally")
+    spawn.add_argument("--api-port", type=int, default=8765)
+    spawn.add_argument("--granite-port", type=int, default=9100)
+    spawn.add_argument("--granite-latency-ms", type=float, default=500.0)
+    spawn.add_argument("--granite-jitter-ms", type=float, default=100.0)
+    spawn.add_argument("--granite-error-rate", type=float, default=0.0)
+    spawn.add_argument("--granite-timeout-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else synth_payloads(args.synthetic, args.seed)
+    jobs: list[tuple[str, dict]] = []
+    for payload in payloads:
+        if args.endpoint in ("submit", "mixed"):
+            jobs.append(("submit", payload))
+        if args.endpoint in ("recommendations", "mixed"):
+            jobs.append(("recommendations", to_reco_payload(payload)))
+
+    processes = spawn_servers(args) if args.spawn else []
+    base_url = f"http://127.0.0.1:{args.api_port}" if args.spawn else args.base_url
+    try:
+        results = asyncio.run(run_load(
+            base_url, jobs, max(1, args.concurrency), args.requests,
+            None if args.requests else args.duration, args.timeout,
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = {
+        "suite": "load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "endpoint": args.endpoint,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration_s": None if args.requests else args.duration,
+            "payloads": args.payloads or f"synthetic:{args.synthetic}:{args.seed}",
+            "granite": {
+                "latency_ms": args.granite_latency_ms,
+                "jitter_ms": args.granite_jitter_ms,
+                "error_rate": args.granite_error_rate,
+                "timeout_rate": args.granite_timeout_rate,
+            } if args.spawn else None,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the scoring hot path.
+
+Times calculate_risk, generate_health_recommendations, pick_tips and
+RiskInput validation (pydantic and, when installed, the msgspec fast codec)
+in-process and prints (or writes) JSON results that
+can be compared between runs.
+
+Examples:
+    python benchmarks/micro.py
+    python benchmarks/micro.py --number 50000 --output bench_results/micro.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the Backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models import RiskInput  # noqa: E402
+from app.services import codec  # noqa: E402
+from app.services.recommendations import generate_health_recommendations, pick_tips  # noqa: E402
+from app.services.risk_scoring import calculate_risk  # noqa: E402
+
+SAMPLE_PAYLOAD = json.loads((backend_dir / "test_request.json").read_text(encoding="utf-8"))
+
+
+def bench(name: str, fn, number: int, repeat: int) -> dict:
+    """Run fn `number` times per round for `repeat` rounds; report per-call timings."""
+    for _ in range(min(number, 1000)):  # warm up caches and the allocator
+        fn()
+    per_call_ns = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        per_call_ns.append((time.perf_counter_ns() - start) / number)
+    best = min(per_call_ns)
+    return {
+        "name": name,
+        "number": number,
+        "repeat": repeat,
+        "best_ns": round(best, 1),
+        "median_ns": round(statistics.median(per_call_ns), 1),
+        "ops_per_sec": round(1e9 / best),
+    }
+
+
+def run(number: int, repeat: int) -> dict:
+    patient = RiskInput(**SAMPLE_PAYLOAD)
+    payload_no_bmi = {k: v for k, v in SAMPLE_PAYLOAD.items() if k != "bmi"}
+    _, level, flags = calculate_risk(patient)
+
+    body_no_bmi = json.dumps(payload_no_bmi).encode()
+
+    cases = [
+        ("RiskInput.model_validate", lambda: RiskInput.model_validate(payload_no_bmi)),
+        ("RiskInput.model_validate_json", lambda: RiskInput.model_validate_json(body_no_bmi)),
+        ("calculate_risk", lambda: calculate_risk(patient)),
+        ("pick_tips", lambda: pick_tips(level, flags)),
+        ("generate_health_recommendations", lambda: generate_health_recommendations(level, flags, 75)),
+    ]
+    if codec.FAST_CODEC:
+        decoder = codec.msgspec.json.Decoder(codec.RiskInputStruct)
+        cases.insert(2, ("RiskInputStruct decode (msgspec)", lambda: decoder.decode(body_no_bmi)))
+    return {
+        "suite": "micro",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [bench(name, fn, number, repeat) for name, fn in cases],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Calls per round (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per benchmark (default: 5)")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run(args.number, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        for row in report["results"]:
+            print(f"{row['name']:<34} {row['best_ns']:>10.1f} ns  {row['ops_per_sec']:>10} ops/s")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
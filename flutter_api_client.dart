@@ -63,6 +63,43 @@ class DiaWellApiClient {
     }
   }
   
+  // Submit risk assessment as a Server-Sent Events stream.
+  // Emits {'event': 'assessment', 'data': {...}} first (deterministic tips),
+  // then optional 'rewrite_delta' / 'rewrite' events with AI tips, then 'done'.
+  static Stream<Map<String, dynamic>> submitRiskAssessmentStream(
+      Map<String, dynamic> patientData) async* {
+    final request = http.Request('POST', Uri.parse('$baseUrl/risk/submit/stream'))
+      ..headers['Content-Type'] = 'application/json'
+      ..headers['Accept'] = 'text/event-stream'
+      ..body = json.encode(patientData);
+
+    final client = http.Client();
+    try {
+      final response = await client.send(request);
+      if (response.statusCode != 200) {
+        throw Exception('Failed to submit risk assessment: ${response.statusCode}');
+      }
+
+      String? event;
+      final data = StringBuffer();
+      await for (final line in response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter())) {
+        if (line.startsWith('event:')) {
+          event = line.substring(6).trim();
+        } else if (line.startsWith('data:')) {
+          data.write(line.substring(5).trim());
+        } else if (line.isEmpty && event != null) {
+          yield {'event': event, 'data': json.decode(data.toString())};
+          event = null;
+          data.clear();
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+  
   // Generate recommendations
   static Future<Map<String, dynamic>> generateRecommendations({
     required String riskLevel,
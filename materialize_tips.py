@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Materialize Granite rewrites for every tip set the API can produce.
+
+Walks all (risk level, flags) combinations, rewrites each distinct action
+list once per language and writes a versioned artifact that the API loads
+on startup (see MATERIALIZED_TIPS_PATH).
+
+Examples:
+    python materialize_tips.py --langs en,hi --output materialized_tips.json
+    python materialize_tips.py --stub --output materialized_tips.json
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the Backend directory to Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app import config  # noqa: E402
+from app.services.granite import close_granite_client, rewrite_tips_with_granite  # noqa: E402
+from app.services.materialized import build_artifact, enumerate_tip_space, write_artifact  # noqa: E402
+
+
+async def _stub_rewrite(actions: list[str], lang: str) -> list[str]:
+    """Local stand-in for Granite: returns the deterministic tips unchanged."""
+    return list(actions)
+
+
+async def materialize(langs: list[str], output: str, use_stub: bool, concurrency: int) -> int:
+    rewrite = _stub_rewrite if use_stub else rewrite_tips_with_granite
+    space = enumerate_tip_space()
+    jobs = [(lang, actions) for lang in langs for _, actions in space]
+    print(f"🧮 {len(space)} distinct tip sets × {len(langs)} language(s) = {len(jobs)} rewrites")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def run(lang: str, actions: tuple):
+        nonlocal done
+        async with semaphore:
+            rewritten = await rewrite(list(actions), lang)
+        done += 1
+        if done % 50 == 0 or done == len(jobs):
+            print(f"   {done}/{len(jobs)}")
+        return lang, actions, rewritten
+
+    try:
+        results = await asyncio.gather(*(run(lang, actions) for lang, actions in jobs))
+    finally:
+        await close_granite_client()
+
+    entries = [(lang, actions, rewritten) for lang, actions, rewritten in results if rewritten]
+    document = build_artifact(
+        entries,
+        langs=langs,
+        generator="stub" if use_stub else "granite",
+        model_id=None if use_stub else config.IBM_WX_MODEL_ID,
+    )
+    write_artifact(document, output)
+
+    missing = len(jobs) - len(entries)
+    print(f"✅ Wrote {len(entries)} tip sets to {output}")
+    if missing:
+        print(f"⚠️  {missing} rewrite(s) failed and will be served by Granite at request time")
+    return 0 if entries else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--langs", default="en", help="Comma-separated language codes (default: en)")
+    parser.add_argument("--output", default="materialized_tips.json", help="Artifact path to write")
+    parser.add_argument("--stub", action="store_true", help="Use a local stub instead of calling Granite")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel Granite calls (default: 4)")
+    args = parser.parse_args()
+
+    langs = [lang.strip() for lang in args.langs.split(",") if lang.strip()]
+    sys.exit(asyncio.run(materialize(langs, args.output, args.stub, max(1, args.concurrency))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Re-score exported questionnaires (CSV or JSONL) with the current rules.
+
+Rows are validated against the RiskInput rules and scored in parallel
+worker processes; results are written in input order as NDJSON or CSV.
+Rows that fail validation go to a rejects file (NDJSON with the row number,
+errors and input). Memory stays constant regardless of file size.
+
+Examples:
+    python rescore.py screenings.csv --output rescored.ndjson
+    python rescore.py export.jsonl --output rescored.csv --output-format csv --recommendations
+    cat export.jsonl | python rescore.py - --input-format jsonl --output - > rescored.ndjson
+"""
+
+import argparse
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+# Add the Backend directory to Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.config import available_cpus  # noqa: E402
+from app.services.recommendations import current_index  # noqa: E402
+from app.services.rescoring import (  # noqa: E402
+    INPUT_FORMATS, OUTPUT_FORMATS, csv_header, detect_format, read_rows, rescore,
+)
+
+
+def _open(stack: ExitStack, path: str, mode: str, std):
+    if path == "-":
+        return std
+    return stack.enter_context(open(path, mode, encoding="utf-8", newline=""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or JSONL file ('-' for stdin)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, help="Default: from the file extension")
+    parser.add_argument("--output", required=True, help="Output file ('-' for stdout)")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="ndjson")
+    parser.add_argument("--rejects", help="Rejected rows file (default: <output>.rejects.ndjson, or stderr for '-')")
+    parser.add_argument("--recommendations", action="store_true",
+                        help="Attach generate_health_recommendations output to each row")
+    parser.add_argument("--id-column", help="Input column copied to the output 'id' field (e.g. a screening id)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per available CPU)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Rows per work unit (default: 2000)")
+    args = parser.parse_args()
+
+    try:
+        input_format = detect_format(args.input, args.input_format)
+    except ValueError as e:
+        parser.error(str(e))
+    workers = args.workers if args.workers > 0 else available_cpus()
+    rejects_path = args.rejects or ("-" if args.output == "-" else f"{args.output}.rejects.ndjson")
+
+    # Status goes to stderr so --output - can be piped
+    log = sys.stderr
+    print(f"🧮 Re-scoring {args.input} ({input_format}) with guidelines {current_index().version}", file=log)
+    print(f"👷 Workers: {workers}, chunk size: {args.chunk_size}", file=log)
+
+    started = time.perf_counter()
+    last_report = started
+
+    def progress(ok: int, rejected: int) -> None:
+        nonlocal last_report
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            print(f"   {ok + rejected} rows ({(ok + rejected) / (now - started):.0f} rows/s)", file=log)
+
+    with ExitStack() as stack:
+        source = _open(stack, args.input, "r", sys.stdin)
+        output = _open(stack, args.output, "w", sys.stdout)
+        rejects = _open(stack, rejects_path, "w", sys.stderr)
+        if args.output_format == "csv":
+            output.write(csv_header())
+        ok, rejected = rescore(
+            read_rows(source, input_format),
+            output.write,
+            rejects.write,
+            workers=workers,
+            chunk_size=args.chunk_size,
+            output_format=args.output_format,
+            strict=input_format != "csv",
+            with_recommendations=args.recommendations,
+            id_column=args.id_column,
+            on_progress=progress,
+        )
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {ok} rows in {elapsed:.1f}s ({(ok + rejected) / elapsed:.0f} rows/s)", file=log)
+    if rejected:
+        print(f"⚠️  {rejected} row(s) rejected, see {rejects_path}", file=log)
+    sys.exit(0 if ok or not rejected else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the Diabetes Risk Assessment API.
+
+Runs gunicorn with uvicorn workers (uvloop + httptools when installed),
+one worker per available CPU by default, graceful shutdown and worker
+recycling after a configurable number of requests. The app, guideline
+index and materialized tips are loaded once in the parent before fork and
+frozen out of the garbage collector, so workers share those pages
+copy-on-write instead of each parsing and holding its own copy.
+
+Without gunicorn (e.g. on Windows) it falls back to uvicorn's own
+multi-process mode, where each worker loads its own copy.
+
+Examples:
+    python serve.py
+    python serve.py --workers 8 --port 8080 --max-requests 20000
+"""
+
+import argparse
+import gc
+import sys
+from pathlib import Path
+
+# Add the Backend directory to Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app import config  # noqa: E402
+
+
+def _fastest(module: str, choice: str) -> str:
+    try:
+        __import__(module)
+        return choice
+    except ImportError:
+        return "auto"
+
+
+LOOP = _fastest("uvloop", "uvloop")
+HTTP = _fastest("httptools", "httptools")
+
+
+def preload():
+    """Import the app and load shared read-only state in the parent process."""
+    from app.main import app
+    from app.services.materialized import materialized_tips, warm_tip_space
+    from app.services.recommendations import warm_guidelines
+
+    warm_guidelines()
+    if not materialized_tips.loaded and materialized_tips.load(config.MATERIALIZED_TIPS_PATH):
+        warm_tip_space()  # used by /ready coverage
+
+    # Move everything loaded so far into the permanent generation so the
+    # workers' collectors never touch (and copy) these pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def run_gunicorn(args) -> None:
+    from gunicorn.app.base import BaseApplication
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": LOOP, "http": HTTP, "lifespan": "on"}
+
+    class Server(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": Worker,
+        "preload_app": True,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter if args.max_requests else 0,
+        "graceful_timeout": args.graceful_timeout,
+        "keepalive": args.keepalive,
+        "loglevel": args.log_level,
+        "accesslog": "-" if args.access_log else None,
+    }
+    Server(preload(), options).run()
+
+
+def run_uvicorn(args) -> None:
+    import uvicorn
+
+    print("⚠️  gunicorn is not installed: using uvicorn workers (no copy-on-write sharing)")
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=LOOP,
+        http=HTTP,
+        limit_max_requests=args.max_requests or None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        timeout_keep_alive=args.keepalive,
+        log_level=args.log_level,
+        access_log=args.access_log,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS,
+                        help="Worker processes (default: one per available CPU)")
+    parser.add_argument("--max-requests", type=int, default=config.SERVER_MAX_REQUESTS,
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=config.SERVER_MAX_REQUESTS_JITTER,
+                        help="Random extra requests per worker so they don't all recycle at once")
+    parser.add_argument("--graceful-timeout", type=int, default=config.SERVER_GRACEFUL_TIMEOUT,
+                        help="Seconds to finish in-flight requests on shutdown or recycle")
+    parser.add_argument("--keepalive", type=int, default=config.SERVER_KEEPALIVE,
+                        help="Seconds to keep idle client connections open")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true", help="Log every request")
+    args = parser.parse_args()
+    args.workers = args.workers if args.workers > 0 else config.available_cpus()
+
+    try:
+        import gunicorn  # noqa: F401
+        use_gunicorn = True
+    except ImportError:
+        use_gunicorn = False
+
+    print("🚀 Starting Diabetes Risk Assessment API (production)...")
+    print(f"📍 Listening on http://{args.host}:{args.port}")
+    print(f"👷 Workers: {args.workers} ({'gunicorn' if use_gunicorn else 'uvicorn'}, loop={LOOP}, http={HTTP})")
+    if args.max_requests:
+        print(f"♻️  Recycling workers after {args.max_requests}±{args.max_requests_jitter} requests")
+    print("-" * 50)
+
+    if use_gunicorn:
+        run_gunicorn(args)
+    else:
+        run_uvicorn(args)
+
+
+if __name__ == "__main__":
+    main()
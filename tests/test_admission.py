@@ -0,0 +1,105 @@
+"""Priority admission control for upstream Granite calls."""
+
+import asyncio
+
+from app.services.admission import (
+    AdmissionController,
+    current_priority,
+    priority_for,
+    risk_priority,
+)
+
+HIGH, MEDIUM, LOW = (priority_for(level) for level in ("High", "Medium", "Low"))
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_priorities_follow_risk_level():
+    assert HIGH < MEDIUM < LOW
+    assert current_priority.get() == LOW
+    with risk_priority("High"):
+        assert current_priority.get() == HIGH
+    assert current_priority.get() == LOW
+
+
+def test_disabled_controller_admits_everything():
+    controller = AdmissionController(max_concurrent=0)
+    assert asyncio.run(controller.acquire()) is True
+    assert controller.stats()["active"] == 0
+
+
+def test_waiters_are_served_by_priority():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, queue_size=3)
+        assert await controller.acquire(HIGH)
+        order = []
+
+        async def call(priority, name):
+            if await controller.acquire(priority):
+                order.append(name)
+                controller.release()
+
+        tasks = [
+            asyncio.ensure_future(call(priority, name))
+            for priority, name in ((LOW, "low"), (HIGH, "high"), (MEDIUM, "medium"))
+        ]
+        await _settle()
+        assert controller.stats()["queue_depth"] == 3
+        controller.release()
+        await asyncio.gather(*tasks)
+        return controller, order
+
+    controller, order = asyncio.run(run())
+    assert order == ["high", "medium", "low"]
+    assert controller.stats()["active"] == 0
+
+
+def test_full_queue_sheds_and_displaces():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, queue_size=2)
+        assert await controller.acquire(HIGH)
+        low = [asyncio.ensure_future(controller.acquire(LOW)) for _ in range(2)]
+        await _settle()
+
+        # A Low arrival to a full queue of Low waiters is shed straight away
+        assert await controller.acquire(LOW) is False
+
+        # A High arrival displaces the newest Low waiter
+        high = asyncio.ensure_future(controller.acquire(HIGH))
+        await _settle()
+        assert low[1].done() and low[1].result() is False
+        assert not low[0].done()
+
+        controller.release()
+        assert await high is True
+        controller.release()
+        assert await low[0] is True
+        controller.release()
+        return controller
+
+    controller = asyncio.run(run())
+    stats = controller.stats()
+    assert stats["shed"] == {"High": 0, "Medium": 0, "Low": 2}
+    assert stats["displaced"] == 1
+    assert stats["admitted"] == 3 and stats["queued"] == 3
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, queue_size=2)
+        assert await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire(LOW))
+        await _settle()
+        waiter.cancel()
+        await _settle()
+        depth = controller.stats()["queue_depth"]
+        controller.release()
+        return controller, depth
+
+    controller, depth = asyncio.run(run())
+    assert depth == 0
+    assert controller.stats()["active"] == 0
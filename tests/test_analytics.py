@@ -0,0 +1,77 @@
+"""Population analytics keep unflushed counts when the snapshot file fails."""
+
+import asyncio
+import sqlite3
+
+from app.services.analytics import PopulationAnalytics, run_flusher
+
+
+class FlakyDB:
+    """Stands in for the SQLite snapshot store, failing the first `failures` merges."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.merged = {}
+
+    def merge(self, delta, cutoffs):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        for key, value in delta.items():
+            self.merged[key] = self.merged.get(key, 0) + value
+
+    def read(self):
+        return dict(self.merged)
+
+
+def _analytics(db):
+    analytics = PopulationAnalytics()
+    analytics._db = db
+    return analytics
+
+
+def test_failed_flush_keeps_pending_counts():
+    db = FlakyDB(failures=1)
+    analytics = _analytics(db)
+    analytics.record(50, "female", 70, "High", 0)
+
+    async def flush_twice():
+        try:
+            await analytics.flush()
+        except sqlite3.OperationalError:
+            pass
+        assert db.merged == {}
+        analytics.record(30, "male", 10, "Low", 0)
+        await analytics.flush()
+        return await analytics.snapshot()
+
+    snapshot = asyncio.run(flush_twice())
+    assert snapshot["total"] == 2
+    assert snapshot["risk_levels"] == {"Low": 1, "Medium": 0, "High": 1}
+    assert analytics._pending == {}
+
+
+def test_flusher_survives_errors():
+    db = FlakyDB(failures=2)
+    analytics = _analytics(db)
+    analytics.record(50, "female", 70, "High", 0)
+
+    async def run():
+        flusher = asyncio.create_task(run_flusher(analytics, 0.01))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if db.merged:
+                break
+        assert not flusher.done()  # still running after the failed flushes
+        flusher.cancel()
+
+    asyncio.run(run())
+    assert db.failures == 0
+    assert (
+        sum(
+            v
+            for (scope, _, name), v in db.merged.items()
+            if (scope, name) == ("all", "n")
+        )
+        == 1
+    )
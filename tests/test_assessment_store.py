@@ -0,0 +1,142 @@
+"""Assessment history: group commits, cursor pagination and what is stored."""
+
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+from app.models import RiskInput
+from app.services.assessment_store import (
+    AssessmentRecord,
+    GroupCommitWriter,
+    SQLiteAssessmentStore,
+    assessment_writer,
+    decode_cursor,
+    open_store,
+    page,
+)
+
+PATIENT = {
+    "name": "Jane Secret",
+    "age": 50,
+    "gender": "female",
+    "height": 170,
+    "weight": 100,
+    "bp_sys": 150,
+    "bp_dia": 80,
+    "history_high_glucose": True,
+    "physical_activity_hours_per_week": 1,
+    "family_history_diabetes": "none",
+    "smoking_status": "never",
+    "alcohol_status": "never",
+}
+
+
+def _record(user_id, score=50, patient=None):
+    patient = patient or RiskInput(**PATIENT)
+    return AssessmentRecord(user_id, time.time(), score, "Medium", 0, "en", patient)
+
+
+def _pages(store, user_id, limit):
+    ids, before = [], None
+    while True:
+        items, cursor = page(store.history(user_id, limit + 1, before), limit)
+        ids.extend(item["id"] for item in items)
+        if cursor is None:
+            return ids
+        before = decode_cursor(cursor)
+
+
+def test_cursor_pagination_has_no_gaps_or_duplicates(tmp_path):
+    store = SQLiteAssessmentStore(str(tmp_path / "history.sqlite"))
+    records = [_record("u1" if i % 3 else "u2", score=i) for i in range(20)]
+    store.write_many(records)
+    mine = [i + 1 for i, r in enumerate(records) if r.user_id == "u1"]
+    for limit in (1, 3, len(mine), len(mine) + 5):
+        assert _pages(store, "u1", limit) == sorted(mine, reverse=True)
+    assert _pages(store, "nobody", 3) == []
+    store.close()
+
+
+def test_page_cursor_is_the_last_row_id():
+    items = [{"id": 9}, {"id": 7}, {"id": 4}]
+    assert page(items, 2) == (items[:2], "7")
+    assert page(items, 3) == (items, None)
+
+
+@pytest.mark.parametrize("cursor", ["abc", "0", "-3", ""])
+def test_invalid_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_close_flushes_the_pending_batch(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    writer = GroupCommitWriter(batch_size=1000, max_delay_ms=60_000)
+    writer.open(open_store("sqlite", path))
+    for _ in range(5):
+        assert writer.submit(_record("u1"))
+    writer.close()
+    assert writer.stats()["written"] == 5 and writer.batches == 1
+    assert not writer.submit(_record("u1"))
+    store = SQLiteAssessmentStore(path)
+    assert len(store.history("u1", 10)) == 5
+    store.close()
+
+
+def test_batches_are_capped(tmp_path):
+    writer = GroupCommitWriter(batch_size=2, max_delay_ms=60_000)
+    writer.open(open_store("sqlite", str(tmp_path / "history.sqlite")))
+    for _ in range(5):
+        writer.submit(_record("u1"))
+    writer.close()
+    assert (writer.written, writer.batches) == (5, 3)
+
+
+def test_patient_name_is_not_stored(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    store = SQLiteAssessmentStore(path)
+    store.write_many([_record("u1")])
+    (item,) = store.history("u1", 10)
+    assert "name" not in item["inputs"]
+    assert item["inputs"]["smoking_status"] == "never"
+    store.close()
+    with sqlite3.connect(path) as conn:
+        for row in conn.execute("SELECT * FROM assessments"):
+            assert not any("Jane" in str(value) for value in row)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        open_store("postgres", "unused")
+
+
+def test_history_endpoint_pages_through_submissions(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ASSESSMENT_STORE_PATH", str(tmp_path / "h.sqlite"))
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    with TestClient(app) as client:
+        written = assessment_writer.written
+        for age in range(40, 47):
+            body = {**PATIENT, "age": age, "user_id": "u1"}
+            assert client.post("/risk/submit", json=body).status_code == 200
+        deadline = time.monotonic() + 5
+        while assessment_writer.written < written + 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        ages, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/risk/history/u1", params=params, headers=headers)
+            assert response.status_code == 200
+            body = response.json()
+            ages.extend(item["inputs"]["age"] for item in body["items"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        bad = client.get("/risk/history/u1", params={"cursor": "x"}, headers=headers)
+    assert ages == list(range(46, 39, -1))
+    assert bad.status_code == 400
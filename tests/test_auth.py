@@ -0,0 +1,68 @@
+"""Admin endpoints are closed without the configured token."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+from app.services.auth import token_matches
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_token_matches():
+    assert token_matches("secret", "secret")
+    assert not token_matches("wrong", "secret")
+    assert not token_matches(None, "secret")
+    assert not token_matches("", "")
+
+
+def test_guideline_reload_is_disabled_without_admin_token(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    assert client.post("/admin/guidelines/reload").status_code == 404
+    assert (
+        client.post(
+            "/admin/guidelines/reload", headers={"X-Admin-Token": ""}
+        ).status_code
+        == 404
+    )
+
+
+def test_guideline_reload_needs_matching_token(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    assert client.post("/admin/guidelines/reload").status_code == 404
+    assert (
+        client.post(
+            "/admin/guidelines/reload", headers={"X-Admin-Token": "wrong"}
+        ).status_code
+        == 404
+    )
+    response = client.post(
+        "/admin/guidelines/reload", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert "guidelines" in response.json()
+
+
+def test_risk_history_needs_admin_token(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    assert client.get("/risk/history/user-1").status_code == 404
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    assert client.get("/risk/history/user-1").status_code == 404
+    assert (
+        client.get(
+            "/risk/history/user-1", headers={"X-Admin-Token": "wrong"}
+        ).status_code
+        == 404
+    )
+    # Authorized; the store isn't configured in tests
+    assert (
+        client.get(
+            "/risk/history/user-1", headers={"X-Admin-Token": "secret"}
+        ).status_code
+        == 503
+    )
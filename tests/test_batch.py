@@ -0,0 +1,100 @@
+"""Incremental JSON array / NDJSON row parsing for bulk submission."""
+
+import asyncio
+
+import pytest
+
+from app.services.batch import RowError, iter_json_rows
+
+
+def _rows(*chunks, max_row_bytes=65536):
+    async def body():
+        for chunk in chunks:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+    async def collect():
+        return [row async for row in iter_json_rows(body(), max_row_bytes)]
+
+    return asyncio.run(collect())
+
+
+def _errors(rows):
+    return [str(row) for row in rows if isinstance(row, RowError)]
+
+
+def test_array_rows():
+    assert _rows('  [{"a": 1}, {"a": 2} ,\n{"a": 3}]') == [{"a": 1}, {"a": 2}, {"a": 3}]
+    assert _rows("[]") == []
+    assert _rows("") == []
+
+
+def test_ndjson_rows():
+    assert _rows('{"a": 1}\n\n  {"a": 2}  \r\n{"a": 3}') == [
+        {"a": 1},
+        {"a": 2},
+        {"a": 3},
+    ]
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        (("[12", "3, 4", "5]"), [123, 45]),
+        (("[1.5", "e2]"), [150.0]),
+        (("[tr", "ue, fal", "se]"), [True, False]),
+        (("[1", " ", "]"), [1]),
+        (('[{"a": ', '1}, {"a"', ": 2}]"), [{"a": 1}, {"a": 2}]),
+        (('["x', 'y"]'), ["xy"]),
+    ],
+)
+def test_array_rows_split_across_chunks(chunks, expected):
+    assert _rows(*chunks) == expected
+
+
+def test_each_byte_in_its_own_chunk():
+    body = '[{"name": "Zoë", "age": 50}, 7, null]'.encode("utf-8")
+    chunks = [body[i : i + 1] for i in range(len(body))]
+    assert _rows(*chunks) == [{"name": "Zoë", "age": 50}, 7, None]
+
+
+def test_ndjson_row_split_across_chunks():
+    assert _rows('{"a": ', '1}\n{"a"', ": 2}\n", '{"a": 3', "}") == [
+        {"a": 1},
+        {"a": 2},
+        {"a": 3},
+    ]
+
+
+def test_ndjson_invalid_lines_are_reported_per_row():
+    rows = _rows('{"a": 1}\nnot json\n{"a": 2}\n')
+    assert rows[0] == {"a": 1} and rows[2] == {"a": 2}
+    assert len(_errors(rows)) == 1 and _errors(rows)[0].startswith("Invalid JSON")
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ('[{"a": 1}, {"a": ', "Invalid JSON"),
+        ("[1, 2", "Unexpected end of JSON array"),
+        ("[1 2]", "Invalid JSON: expected ',' or ']' after a row"),
+        ("[1, }]", "Invalid JSON"),
+    ],
+)
+def test_array_syntax_errors_stop_the_batch(body, message):
+    rows = _rows(body)
+    assert isinstance(rows[-1], RowError) and str(rows[-1]).startswith(message)
+    assert len(_errors(rows)) == 1
+
+
+def test_max_row_bytes_array():
+    body = '[{"pad": "' + "x" * 100 + '"}]'
+    chunks = [body[i : i + 20] for i in range(0, len(body), 20)]
+    rows = _rows(*chunks, max_row_bytes=64)
+    assert _errors(rows) == ["Row exceeds 64 bytes"]
+    assert _rows(*chunks, max_row_bytes=1024) == [{"pad": "x" * 100}]
+
+
+def test_max_row_bytes_ndjson():
+    rows = _rows('{"a": 1}\n', '{"pad": "' + "x" * 40, "x" * 60, max_row_bytes=64)
+    assert rows[0] == {"a": 1}
+    assert _errors(rows) == ["Row exceeds 64 bytes"]
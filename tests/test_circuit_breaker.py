@@ -0,0 +1,134 @@
+"""Circuit breaker state machine and the Granite latency budget."""
+
+import asyncio
+
+import pytest
+
+from app import config, main
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.services.granite_batcher import micro_batcher
+from app.services.metrics import REWRITE_SOURCE
+from app.services.rewrite_cache import rewrite_cache
+
+ACTIONS = ["Walk 30 minutes a day"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 1
+    assert breaker.snapshot()["times_opened"] == 1
+
+
+def test_full_cycle(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    _trip(breaker)
+    assert breaker.state == OPEN
+    clock[0] += 29
+    assert not breaker.allow()
+    assert breaker.snapshot()["retry_in_seconds"] == 1.0
+    clock[0] += 1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    _trip(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow()  # the timeout starts again
+    clock[0] += 30
+    assert breaker.allow()
+
+
+def test_half_open_probe_limit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_probes=2)
+    _trip(breaker)
+    clock[0] += 30
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert breaker.rejected == 1
+
+
+def test_cancelled_probe_frees_its_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    _trip(breaker)
+    clock[0] += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_cancelled()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # Cancelling while closed changes nothing
+    breaker.record_success()
+    breaker.record_cancelled()
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+
+
+@pytest.fixture
+def slow_upstream(monkeypatch):
+    calls = []
+
+    async def rewrite(actions, lang):
+        calls.append(actions)
+        await asyncio.sleep(0.2)
+        return ["Rewritten"]
+
+    monkeypatch.setattr(micro_batcher, "rewrite", rewrite)
+    rewrite_cache.clear()
+    yield calls
+    rewrite_cache.clear()
+
+
+def test_latency_budget_falls_back_and_keeps_loading(monkeypatch, slow_upstream):
+    monkeypatch.setattr(config, "GRANITE_LATENCY_BUDGET_MS", 20)
+
+    async def run():
+        first = await main._rewrite_actions(ACTIONS, "en")
+        await asyncio.sleep(0.3)  # the abandoned upstream call still completes
+        second = await main._rewrite_actions(ACTIONS, "en")
+        return first, second
+
+    fallbacks = REWRITE_SOURCE.value("fallback")
+    rewritten = REWRITE_SOURCE.value("rewritten")
+    first, second = asyncio.run(run())
+    assert first is None
+    assert second == ["Rewritten"]
+    assert len(slow_upstream) == 1
+    assert REWRITE_SOURCE.value("fallback") == fallbacks + 1
+    assert REWRITE_SOURCE.value("rewritten") == rewritten + 1
+
+
+def test_zero_budget_waits_for_the_rewrite(monkeypatch, slow_upstream):
+    monkeypatch.setattr(config, "GRANITE_LATENCY_BUDGET_MS", 0)
+    assert asyncio.run(main._rewrite_actions(ACTIONS, "en")) == ["Rewritten"]
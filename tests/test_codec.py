@@ -0,0 +1,150 @@
+"""The msgspec fast path decodes exactly what pydantic would accept."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.models import RecoInput, RiskInput
+from app.services import codec
+from app.services.codec import FastCodecRoute, validate_risk_row
+
+msgspec = pytest.importorskip("msgspec")
+pytestmark = pytest.mark.skipif(
+    not codec.FAST_CODEC, reason="msgspec fast codec is off"
+)
+
+PATIENT = {
+    "name": "Test",
+    "age": 50,
+    "gender": "male",
+    "height": 170,
+    "weight": 100,
+    "bp_sys": 150,
+    "bp_dia": 80,
+    "history_high_glucose": True,
+    "physical_activity_hours_per_week": 1.5,
+    "family_history_diabetes": "first_degree",
+    "smoking_status": "never",
+    "alcohol_status": "moderate",
+}
+
+VALID = [
+    PATIENT,
+    {**PATIENT, "bmi": 31.2, "lang": "pt-BR", "user_id": "u-1"},
+    {**PATIENT, "age": 10, "height": 50, "weight": 300, "bp_sys": 250, "bp_dia": 40},
+    {**PATIENT, "physical_activity_hours_per_week": 0},
+]
+
+INVALID = [
+    {**PATIENT, "age": 9},
+    {**PATIENT, "age": "fifty"},
+    {**PATIENT, "smoking_status": "sometimes"},
+    {**PATIENT, "user_id": ""},
+    {k: v for k, v in PATIENT.items() if k != "bp_sys"},
+]
+
+
+def _fields(value):
+    if isinstance(value, RiskInput):
+        return value.model_dump(mode="json")
+    return msgspec.to_builtins(value)
+
+
+def _app(route_class):
+    app = FastAPI()
+    app.router.route_class = route_class
+
+    @app.post("/risk")
+    async def risk(patient: RiskInput):
+        return JSONResponse(
+            _fields(patient), headers={"X-Decoded-As": type(patient).__name__}
+        )
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def clients():
+    with TestClient(_app(FastCodecRoute)) as fast, TestClient(_app(APIRoute)) as plain:
+        yield fast, plain
+
+
+@pytest.mark.parametrize("body", VALID)
+def test_valid_bodies_decode_like_pydantic(body):
+    struct = msgspec.json.decode(msgspec.json.encode(body), type=codec.RiskInputStruct)
+    assert msgspec.to_builtins(struct) == RiskInput.model_validate(body).model_dump(
+        mode="json"
+    )
+
+
+def test_reco_input_decodes_like_pydantic():
+    body = {"risk_level": "High", "risk_score": 80, "flags": ["bp_high"]}
+    struct = msgspec.json.decode(msgspec.json.encode(body), type=codec.RecoInputStruct)
+    assert msgspec.to_builtins(struct) == RecoInput.model_validate(body).model_dump()
+
+
+@pytest.mark.parametrize(
+    "body",
+    VALID + [{**PATIENT, "age": "50"}, {**PATIENT, "history_high_glucose": "true"}],
+)
+def test_endpoint_responses_match(clients, body):
+    fast, plain = clients
+    fast_response, plain_response = fast.post("/risk", json=body), plain.post(
+        "/risk", json=body
+    )
+    assert fast_response.status_code == plain_response.status_code == 200
+    assert fast_response.json() == plain_response.json()
+
+
+def test_lax_coercion_is_left_to_pydantic(clients):
+    fast, _ = clients
+    strict = fast.post("/risk", json=PATIENT)
+    lax = fast.post("/risk", json={**PATIENT, "age": "50"})
+    assert strict.headers["X-Decoded-As"] == "RiskInputStruct"
+    assert lax.headers["X-Decoded-As"] == "RiskInput"
+    assert lax.json() == strict.json()
+
+
+@pytest.mark.parametrize("body", INVALID)
+def test_invalid_bodies_keep_fastapis_422(clients, body):
+    fast, plain = clients
+    fast_response, plain_response = fast.post("/risk", json=body), plain.post(
+        "/risk", json=body
+    )
+    assert fast_response.status_code == plain_response.status_code == 422
+    assert fast_response.json() == plain_response.json()
+    assert fast_response.json()["detail"][0]["loc"][0] == "body"
+
+
+@pytest.mark.parametrize("content", [b"{not json", b"", b"[]"])
+def test_malformed_json_keeps_fastapis_error(clients, content):
+    fast, plain = clients
+    headers = {"Content-Type": "application/json"}
+    fast_response = fast.post("/risk", content=content, headers=headers)
+    plain_response = plain.post("/risk", content=content, headers=headers)
+    assert fast_response.status_code == plain_response.status_code
+    assert fast_response.json() == plain_response.json()
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        {key: str(value).lower() for key, value in PATIENT.items()},
+        {**PATIENT, "age": "50"},
+    ],
+)
+def test_string_rows_convert_when_not_strict(row):
+    fast = validate_risk_row(row, strict=False)
+    assert isinstance(fast, codec.RiskInputStruct)
+    assert msgspec.to_builtins(fast) == RiskInput.model_validate(row).model_dump(
+        mode="json"
+    )
+
+
+@pytest.mark.parametrize("row", INVALID)
+def test_invalid_rows_raise_pydantic_errors(row):
+    with pytest.raises(ValidationError):
+        validate_risk_row(row)
@@ -0,0 +1,72 @@
+"""Cached response fragments render the same bytes as serializing the model."""
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models import RiskResponse
+from app.services.codec import dumps
+from app.services.fragments import (
+    Fragment,
+    recommendations_fragment,
+    risk_response_fragment,
+)
+from app.services.recommendations import (
+    generate_health_recommendations,
+    pick_tips_for_mask,
+)
+from app.services.risk_scoring import FLAG_BITS, decode_flag_mask, encode_flags
+
+CASES = [
+    ("Low", (), "en"),
+    ("Medium", ("bmi_high",), "en"),
+    ("High", ("bp_high", "bmi_high", "family_history_first_degree"), "en"),
+    ("High", ("bp_high",), "pt-BR"),
+    ("Medium", tuple(sorted(FLAG_BITS))[:4], "es"),
+]
+SCORES = [0, 7, 55, 100]
+
+
+def _model_bytes(risk_score, risk_level, flag_mask, lang, actions=None):
+    tips = pick_tips_for_mask(risk_level, flag_mask, lang)
+    if actions:
+        tips["actions"] = list(actions)
+    model = RiskResponse(
+        risk_score=risk_score,
+        risk_level=risk_level,
+        flags=decode_flag_mask(flag_mask),
+        guideline=tips["headline"],
+        tips=tips,
+    )
+    return dumps(model.model_dump()), JSONResponse(jsonable_encoder(model)).body
+
+
+@pytest.mark.parametrize("risk_level, flags, lang", CASES)
+@pytest.mark.parametrize("score", SCORES)
+def test_risk_response_fragment_matches_the_model(risk_level, flags, lang, score):
+    mask = encode_flags(flags)
+    rendered = risk_response_fragment(risk_level, mask, lang).render(score)
+    assert (rendered, rendered) == _model_bytes(score, risk_level, mask, lang)
+
+
+def test_risk_response_fragment_with_rewritten_actions():
+    mask = encode_flags(("bp_high",))
+    actions = ("Walk after dinner", 'Say "no" to soda', "Café ☕ less often")
+    rendered = risk_response_fragment("High", mask, "en", actions).render(88)
+    assert (rendered, rendered) == _model_bytes(88, "High", mask, "en", actions)
+
+
+@pytest.mark.parametrize("risk_level, flags, lang", CASES)
+@pytest.mark.parametrize("score", SCORES)
+def test_recommendations_fragment_matches_dumps(risk_level, flags, lang, score):
+    rendered = recommendations_fragment(risk_level, flags, lang).render(score)
+    expected = generate_health_recommendations(
+        risk_level, list(flags), score, encode_flags(flags), lang=lang
+    )
+    assert rendered == dumps(expected)
+    assert rendered == JSONResponse(expected).body
+
+
+def test_split_requires_the_marker():
+    with pytest.raises(ValueError):
+        Fragment.split(b'{"risk_score":1}', b"risk_score")
@@ -0,0 +1,146 @@
+"""Multi-item answer parsing and Granite micro-batching."""
+
+import asyncio
+
+import pytest
+
+from app.services import granite_batcher
+from app.services.admission import current_priority, priority_for
+from app.services.granite import parse_multi_bullets
+from app.services.granite_batcher import GraniteMicroBatcher
+
+
+def test_parse_multi_bullets():
+    text = "### 1\n- Walk daily\n- Drink water\n\n### 2\n- Sleep well\n"
+    assert parse_multi_bullets(text, 2) == [
+        ["Walk daily", "Drink water"],
+        ["Sleep well"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        # Missing section: only that item falls back
+        ("### 1\n- a\n### 3\n- c\n", [["a"], None, ["c"]]),
+        # Empty section
+        ("### 1\n\n### 2\n- b\n### 3\n- c", [None, ["b"], ["c"]]),
+        # Header variants
+        ("## Item 1:\n- a\n# 2\n- b\n###3\n- c", [["a"], ["b"], ["c"]]),
+        # Out-of-range and repeated headers are ignored
+        ("### 1\n- a\n### 1\n- again\n### 9\n- x\n### 0\n- y", [["a"], None, None]),
+        # No headers at all
+        ("- a\n- b\n", [None, None, None]),
+    ],
+)
+def test_parse_multi_bullets_falls_back_per_item(text, expected):
+    assert parse_multi_bullets(text, 3) == expected
+
+
+class FakeGranite:
+    """Stands in for the WatsonX calls; item 2 (index 1) never parses."""
+
+    def __init__(self, monkeypatch):
+        self.many = []
+        self.single = []
+        self.priorities = []
+        self.running = 0
+        self.max_running = 0
+        monkeypatch.setattr(granite_batcher, "is_configured", lambda: True)
+        monkeypatch.setattr(
+            granite_batcher, "rewrite_many_with_granite", self.rewrite_many
+        )
+        monkeypatch.setattr(
+            granite_batcher, "rewrite_tips_with_granite", self.rewrite_one
+        )
+
+    @staticmethod
+    def _result(actions):
+        return None if actions == ["tip 1"] else [a.upper() for a in actions]
+
+    async def rewrite_many(self, items):
+        self.many.append(items)
+        self.priorities.append(current_priority.get())
+        return [self._result(actions) for actions, _ in items]
+
+    async def rewrite_one(self, actions, lang):
+        self.single.append((actions, lang))
+        self.priorities.append(current_priority.get())
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return self._result(actions)
+
+
+def _rewrite_concurrently(batcher, count, levels=None):
+    levels = levels or ["Low"] * count
+
+    async def one(index):
+        current_priority.set(priority_for(levels[index]))
+        return await batcher.rewrite([f"tip {index}"], "en")
+
+    async def run():
+        return await asyncio.gather(*(one(i) for i in range(count)))
+
+    return asyncio.run(run())
+
+
+def test_combined_mode_sends_one_request(monkeypatch):
+    fake = FakeGranite(monkeypatch)
+    batcher = GraniteMicroBatcher(window_ms=20, max_batch=8, mode="combined")
+    results = _rewrite_concurrently(batcher, 3, ["Low", "High", "Medium"])
+    assert results == [["TIP 0"], None, ["TIP 2"]]
+    assert len(fake.many) == 1 and fake.single == []
+    assert [actions for actions, _ in fake.many[0]] == [["tip 0"], ["tip 1"], ["tip 2"]]
+    # Admitted at the priority of the most urgent item
+    assert fake.priorities == [priority_for("High")]
+    stats = batcher.stats()
+    assert (stats["batches"], stats["items"], stats["fallbacks"]) == (1, 3, 1)
+
+
+def test_parallel_mode_bounds_concurrency(monkeypatch):
+    fake = FakeGranite(monkeypatch)
+    batcher = GraniteMicroBatcher(
+        window_ms=20, max_batch=8, mode="parallel", max_parallel=2
+    )
+    results = _rewrite_concurrently(batcher, 5)
+    assert results == [["TIP 0"], None, ["TIP 2"], ["TIP 3"], ["TIP 4"]]
+    assert fake.many == [] and len(fake.single) == 5
+    assert fake.max_running == 2
+    assert batcher.stats()["batches"] == 1
+
+
+def test_full_batch_flushes_before_the_window(monkeypatch):
+    fake = FakeGranite(monkeypatch)
+    batcher = GraniteMicroBatcher(window_ms=10_000, max_batch=2, mode="combined")
+    results = _rewrite_concurrently(batcher, 2)
+    assert results == [["TIP 0"], None]
+    assert len(fake.many) == 1
+
+
+def test_single_item_batch_uses_the_plain_call(monkeypatch):
+    fake = FakeGranite(monkeypatch)
+    batcher = GraniteMicroBatcher(window_ms=5, max_batch=8, mode="combined")
+    assert _rewrite_concurrently(batcher, 1) == [["TIP 0"]]
+    assert fake.many == [] and fake.single == [(["tip 0"], "en")]
+
+
+def test_batch_errors_fall_back_for_every_item(monkeypatch):
+    FakeGranite(monkeypatch)
+
+    async def broken(items):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(granite_batcher, "rewrite_many_with_granite", broken)
+    batcher = GraniteMicroBatcher(window_ms=20, max_batch=8, mode="combined")
+    assert _rewrite_concurrently(batcher, 3) == [None, None, None]
+    assert batcher.stats()["fallbacks"] == 3
+
+
+def test_disabled_batcher_calls_through(monkeypatch):
+    fake = FakeGranite(monkeypatch)
+    batcher = GraniteMicroBatcher(window_ms=0)
+    assert not batcher.enabled
+    assert _rewrite_concurrently(batcher, 2) == [["TIP 0"], None]
+    assert len(fake.single) == 2 and batcher.stats()["batches"] == 0
@@ -0,0 +1,122 @@
+"""Canonical URLs, ETags and revalidation for GET /recommendations."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+from app.services.http_cache import (
+    cache_control,
+    canonical_flags,
+    canonical_query,
+    if_none_match,
+    strong_etag,
+)
+from app.services.recommendations import current_index
+
+CANONICAL = "/recommendations?risk_level=High&risk_score=80&flags=bmi_high,bp_high"
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_canonical_flags():
+    assert canonical_flags(["bp_high,bmi_high", "bp_high", " ,age_45_plus"]) == (
+        "age_45_plus",
+        "bmi_high",
+        "bp_high",
+    )
+    assert canonical_flags([]) == ()
+
+
+def test_canonical_query():
+    flags = ("bmi_high", "bp_high")
+    assert canonical_query("High", 80, flags, "en") == (
+        "risk_level=High&risk_score=80&flags=bmi_high,bp_high"
+    )
+    assert (
+        canonical_query("Low", 5, (), "pt_BR")
+        == "risk_level=Low&risk_score=5&lang=pt-br"
+    )
+
+
+def test_etag_is_stable_across_flag_order():
+    orders = [
+        ["bp_high", "bmi_high"],
+        ["bmi_high,bp_high"],
+        ["bp_high,bmi_high", "bp_high"],
+    ]
+    etags = {
+        strong_etag("v1", canonical_query("High", 80, canonical_flags(flags), "en"))
+        for flags in orders
+    }
+    assert len(etags) == 1
+    etag = etags.pop()
+    assert etag.startswith('"v1-') and etag.endswith('"')
+    assert (
+        strong_etag("v2", canonical_query("High", 80, ("bmi_high", "bp_high"), "en"))
+        != etag
+    )
+
+
+@pytest.mark.parametrize(
+    "header, matches",
+    [
+        ('"v1-abc"', True),
+        ('W/"v1-abc"', True),
+        ('"other", W/"v1-abc"', True),
+        ("*", True),
+        ('"v1-abcd"', False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_if_none_match(header, matches):
+    assert if_none_match(header, '"v1-abc"') is matches
+
+
+def test_cache_control():
+    assert cache_control(0) == "no-cache"
+    assert cache_control(300) == "public, max-age=300"
+    assert cache_control(300, 60) == "public, max-age=300, stale-while-revalidate=60"
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/recommendations?risk_level=High&risk_score=80&flags=bp_high&flags=bmi_high",
+        "/recommendations?flags=bp_high,bmi_high&risk_score=80&risk_level=High",
+        "/recommendations?risk_level=High&risk_score=80&flags=bmi_high,bp_high&lang=en",
+    ],
+)
+def test_other_spellings_redirect_to_the_canonical_url(client, url):
+    response = client.get(url, follow_redirects=False)
+    assert response.status_code == 308
+    assert response.headers["location"] == CANONICAL
+    assert response.headers["cache-control"] == cache_control(
+        config.RECOMMENDATIONS_REDIRECT_MAX_AGE_SECONDS
+    )
+
+
+def test_canonical_url_is_served_with_a_strong_etag(client):
+    response = client.get(CANONICAL, follow_redirects=False)
+    assert response.status_code == 200
+    assert response.headers["etag"] == strong_etag(
+        current_index().version, CANONICAL.split("?", 1)[1]
+    )
+    assert response.headers["cache-control"].startswith("public")
+    assert response.json()["headline"] == current_index().headline_for("High")
+
+
+def test_revalidation_returns_304(client):
+    etag = client.get(CANONICAL).headers["etag"]
+    for header in (etag, f"W/{etag}"):
+        response = client.get(CANONICAL, headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    stale = client.get(CANONICAL, headers={"If-None-Match": '"old-version"'})
+    assert stale.status_code == 200
@@ -0,0 +1,130 @@
+"""The materialized tip space is derived from the scoring rule table."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app import main
+from app.models import RiskInput
+from app.services import materialized
+from app.services.materialized import (
+    _reachable_masks,
+    enumerate_tip_space,
+    materialized_tips,
+    warm_tip_space,
+)
+from app.services.recommendations import pick_tips
+from app.services.risk_scoring import FLAG_BITS, RULE_TABLE, calculate_risk
+
+
+def test_every_rule_flag_is_reachable():
+    masks = _reachable_masks()
+    for rule in RULE_TABLE:
+        assert any(mask & rule.bit for mask in masks), rule.flag
+
+
+def test_tip_space_contains_scored_patients():
+    space = set(enumerate_tip_space())
+    patients = [
+        RiskInput(
+            name="Test",
+            age=60,
+            gender="male",
+            height=170.0,
+            weight=95.0,
+            bp_sys=150,
+            bp_dia=95,
+            history_high_glucose=True,
+            physical_activity_hours_per_week=1.0,
+            family_history_diabetes="first_degree",
+            smoking_status="heavy",
+            alcohol_status="moderate",
+        ),
+        RiskInput(
+            name="Test",
+            age=25,
+            gender="female",
+            height=165.0,
+            weight=55.0,
+            bp_sys=110,
+            bp_dia=70,
+            history_high_glucose=False,
+            physical_activity_hours_per_week=6.0,
+            family_history_diabetes="none",
+            smoking_status="never",
+            alcohol_status="never",
+        ),
+    ]
+    for patient in patients:
+        _, level, flags = calculate_risk(patient)
+        assert (level, tuple(pick_tips(level, flags)["actions"])) in space
+
+
+def test_mutually_exclusive_flags_never_combine():
+    first, second = (
+        FLAG_BITS["family_history_first_degree"],
+        FLAG_BITS["family_history_second_degree"],
+    )
+    assert not any(mask & first and mask & second for mask in _reachable_masks())
+
+
+def _count_enumerations(monkeypatch):
+    calls = []
+    original = materialized.enumerate_tip_space
+
+    def counting():
+        calls.append(threading.get_ident())
+        return original()
+
+    monkeypatch.setattr(materialized, "enumerate_tip_space", counting)
+    monkeypatch.setattr(materialized, "_tip_space", (None, frozenset()))
+    return calls
+
+
+def test_coverage_reuses_the_warmed_tip_space(monkeypatch):
+    calls = _count_enumerations(monkeypatch)
+    space = warm_tip_space()
+    assert len(calls) == 1
+    assert materialized_tips.coverage()["space_size"] == len(space)
+    assert warm_tip_space() is space
+    assert len(calls) == 1
+
+
+def test_coverage_never_enumerates_after_a_reload(monkeypatch):
+    calls = _count_enumerations(monkeypatch)
+    current = materialized.current_index()
+    old_version = current.version
+    warm_tip_space()
+    reloaded = SimpleNamespace(version="next", sha256=current.sha256)
+    monkeypatch.setattr(materialized, "current_index", lambda: reloaded)
+    # Until the rewarm is done, /ready reports the previous version's space
+    assert materialized_tips.coverage()["space_version"] == old_version
+    assert len(calls) == 1
+    warm_tip_space()
+    assert materialized_tips.coverage()["space_version"] == "next"
+    assert len(calls) == 2
+
+
+def test_guideline_watcher_reloads_off_the_event_loop(monkeypatch):
+    threads = {}
+
+    def reload_guidelines():
+        threads["reload"] = threading.get_ident()
+        return True
+
+    def warm():
+        threads["warm"] = threading.get_ident()
+
+    monkeypatch.setattr(main, "reload_guidelines", reload_guidelines)
+    monkeypatch.setattr(main, "warm_tip_space", warm)
+
+    async def run():
+        watcher = asyncio.create_task(main._watch_guidelines(0))
+        while len(threads) < 2:
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert threads["reload"] != loop_thread
+    assert threads["warm"] != loop_thread
@@ -0,0 +1,82 @@
+"""Prometheus text exposition and per-route request metrics."""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metrics import (
+    IN_FLIGHT,
+    REQUEST_SECONDS,
+    REQUESTS_TOTAL,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+)
+
+
+def test_exposition_format():
+    registry = Registry()
+    counter = registry.register(Counter("c_total", "A counter", ["path", "status"]))
+    gauge = registry.register(Gauge("g", "A gauge"))
+    counter.inc("/b", "200")
+    counter.inc("/a", "200", amount=2)
+    counter.inc('quote"back\\slash\nline', "500")
+    gauge.set(3.5)
+    assert registry.render() == (
+        "# HELP c_total A counter\n"
+        "# TYPE c_total counter\n"
+        'c_total{path="/a",status="200"} 2.0\n'
+        'c_total{path="/b",status="200"} 1.0\n'
+        'c_total{path="quote\\"back\\\\slash\\nline",status="500"} 1.0\n'
+        "# HELP g A gauge\n"
+        "# TYPE g gauge\n"
+        "g 3.5\n"
+    )
+
+
+def test_gauge_callback():
+    gauge = Gauge("q", "Queue", ["stat"], callback=lambda: {("depth",): 4.0})
+    assert gauge.samples() == ['q{stat="depth"} 4.0']
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram("h", "A histogram", ["stage"], buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.5, 2.0):
+        histogram.observe(value, "score")
+    assert histogram.samples() == [
+        'h_bucket{stage="score",le="0.1"} 2',
+        'h_bucket{stage="score",le="0.5"} 4',
+        'h_bucket{stage="score",le="1.0"} 4',
+        'h_bucket{stage="score",le="+Inf"} 5',
+        'h_sum{stage="score"} 2.95',
+        'h_count{stage="score"} 5',
+    ]
+    assert histogram.header() == ["# HELP h A histogram", "# TYPE h histogram"]
+
+
+def test_labels_resolve_route_templates():
+    middleware = MetricsMiddleware(
+        None, paths=lambda: ["/ready", "/risk/history/{user_id}"]
+    )
+    assert middleware._label("/ready") == "/ready"
+    assert middleware._label("/risk/history/user-1") == "/risk/history/{user_id}"
+    assert middleware._label("/risk/history/user-1/extra") == "other"
+    assert middleware._label("/nope") == "other"
+
+
+def test_requests_are_labelled_by_matched_route():
+    template = "/risk/history/{user_id}"
+    before = REQUESTS_TOTAL.value(template, "404")
+    other = REQUESTS_TOTAL.value("other", "404")
+    with TestClient(app) as client:
+        assert client.get("/risk/history/user-1").status_code == 404
+        assert client.get("/risk/history/user-2").status_code == 404
+        assert client.get("/does-not-exist").status_code == 404
+        text = client.get("/metrics").text
+    assert REQUESTS_TOTAL.value(template, "404") == before + 2
+    assert REQUESTS_TOTAL.value("other", "404") == other + 1
+    assert "user-1" not in text and "user-2" not in text
+    assert f'diawell_http_requests_total{{path="{template}",status="404"}}' in text
+    assert f'path="{template}",le="+Inf"' in "\n".join(REQUEST_SECONDS.samples())
+    assert IN_FLIGHT._values[(template,)] == 0
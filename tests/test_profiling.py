@@ -0,0 +1,124 @@
+"""Opt-in request profiling: token auth, rate limiting and collected stacks."""
+
+import asyncio
+
+import httpx
+
+from app.services.profiling import Profiler, ProfilingMiddleware, span
+
+TOKEN = {"X-Profile-Token": "secret"}
+
+
+async def endpoint(scope, receive, send):
+    with span("granite"):
+        await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _profiler(**overrides):
+    options = dict(
+        enabled=True,
+        token="secret",
+        paths=["/risk/submit"],
+        interval_ms=1.0,
+        max_per_minute=10,
+    )
+    options.update(overrides)
+    return Profiler(**options)
+
+
+def _post(profiler, *header_sets):
+    """POST /risk/submit once per header set, concurrently; returns the responses."""
+    app = ProfilingMiddleware(endpoint, profiler=profiler)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    client.post("/risk/submit", headers=headers)
+                    for headers in header_sets
+                )
+            )
+
+    return asyncio.run(run())
+
+
+def test_disabled_without_token():
+    profiler = Profiler(enabled=True, token="", paths=["/risk/submit"])
+    assert not profiler.enabled
+    (response,) = _post(profiler, TOKEN)
+    assert "x-profile-id" not in response.headers
+    assert profiler.profiled == 0
+
+
+def test_requests_without_a_valid_token_pass_through():
+    profiler = _profiler()
+    missing, wrong = _post(profiler, {}, {"X-Profile-Token": "nope"})
+    for response in (missing, wrong):
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert "x-profile-skipped" not in response.headers
+    assert profiler.unauthorized == 1
+    assert profiler.profiled == 0
+
+
+def test_profiled_request_records_granite_wait():
+    profiler = _profiler()
+    (response,) = _post(profiler, TOKEN)
+    profile = profiler.get(response.headers["x-profile-id"])
+    assert profile is not None and profile.status == 200
+    assert profile.span_seconds["granite"] >= 0.04
+    assert "[wait: granite]" in profile.collapsed()
+    for line in profile.collapsed().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("POST /risk/submit") and int(count) > 0
+
+
+def test_deterministic_mode_per_request():
+    profiler = _profiler()
+    (response,) = _post(profiler, {**TOKEN, "X-Profile-Mode": "deterministic"})
+    profile = profiler.get(response.headers["x-profile-id"])
+    assert profile.mode == "deterministic"
+    assert "[wait: granite]" in profile.collapsed()
+
+
+def test_rate_limited_requests_are_served_with_skipped_header():
+    profiler = _profiler(max_per_minute=1)
+    (first,) = _post(profiler, TOKEN)
+    (second,) = _post(profiler, TOKEN)
+    assert "x-profile-id" in first.headers
+    assert second.status_code == 200
+    assert second.headers["x-profile-skipped"] == "rate_limited"
+    assert profiler.rate_limited == 1
+
+
+def test_rate_below_one_per_minute_still_profiles():
+    profiler = _profiler(max_per_minute=0.5)
+    first, second = _post(profiler, TOKEN), _post(profiler, TOKEN)
+    assert "x-profile-id" in first[0].headers
+    assert second[0].headers["x-profile-skipped"] == "rate_limited"
+
+
+def test_zero_rate_never_profiles():
+    profiler = _profiler(max_per_minute=0)
+    (response,) = _post(profiler, TOKEN)
+    assert response.headers["x-profile-skipped"] == "rate_limited"
+
+
+def test_one_profile_at_a_time():
+    profiler = _profiler()
+    responses = _post(profiler, TOKEN, TOKEN)
+    skipped = [r.headers.get("x-profile-skipped") for r in responses]
+    assert skipped.count("busy") == 1 and skipped.count(None) == 1
+    assert profiler.busy == 1
+
+
+def test_other_paths_are_not_profiled():
+    profiler = _profiler(paths=["/recommendations/generate"])
+    (response,) = _post(profiler, TOKEN)
+    assert "x-profile-id" not in response.headers
+    assert "x-profile-skipped" not in response.headers
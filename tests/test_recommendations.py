@@ -0,0 +1,95 @@
+"""Language tags, catalog fallback and localized tips."""
+
+import json
+
+import pytest
+
+from app.services.recommendations import (
+    DEFAULT_LANG,
+    generate_health_recommendations,
+    index_for,
+    is_localized,
+    lang_chain,
+    normalize_lang,
+)
+from app.services.rescoring import Row, score_chunk
+
+PATIENT = {
+    "name": "Test",
+    "age": 50,
+    "gender": "male",
+    "height": 170,
+    "weight": 100,
+    "bp_sys": 150,
+    "bp_dia": 80,
+    "history_high_glucose": True,
+    "physical_activity_hours_per_week": 1,
+    "family_history_diabetes": "none",
+    "smoking_status": "never",
+    "alcohol_status": "never",
+}
+
+
+@pytest.mark.parametrize(
+    "tag, expected",
+    [
+        ("pt_BR", "pt-br"),
+        (" PT-br ", "pt-br"),
+        ("en", "en"),
+        ("", DEFAULT_LANG),
+        (None, DEFAULT_LANG),
+        ("   ", DEFAULT_LANG),
+    ],
+)
+def test_normalize_lang(tag, expected):
+    assert normalize_lang(tag) == expected
+
+
+@pytest.mark.parametrize(
+    "tag, expected",
+    [
+        ("pt-BR", ("pt-br", "pt", "en")),
+        ("pt", ("pt", "en")),
+        ("zh-Hant-TW", ("zh-hant-tw", "zh-hant", "zh", "en")),
+        ("en-GB", ("en-gb", "en")),
+        ("en", ("en",)),
+        (None, ("en",)),
+    ],
+)
+def test_lang_chain(tag, expected):
+    assert lang_chain(tag) == expected
+
+
+def test_regional_tag_falls_back_to_base_language_catalog():
+    assert index_for("pt-BR").lang == "pt"
+    assert index_for("pt_br").lang == "pt"
+    assert is_localized("pt-BR")
+
+
+def test_unknown_language_falls_back_to_english():
+    assert index_for("de-AT").lang == DEFAULT_LANG
+    assert not is_localized("de")
+    assert not is_localized("en-GB")
+
+
+def test_localized_recommendations():
+    english = generate_health_recommendations("High", ["bp_high"], 80)
+    portuguese = generate_health_recommendations("High", ["bp_high"], 80, lang="pt-BR")
+    assert portuguese["headline"] != english["headline"]
+    assert portuguese["headline"] == index_for("pt").headline_for("High")
+
+
+def test_rescoring_honours_row_language():
+    rows = [Row(1, {**PATIENT, "lang": "pt-BR"}, None), Row(2, PATIENT, None)]
+    result = score_chunk(rows, "ndjson", True, True, None)
+    localized, default = (json.loads(line) for line in result.output.splitlines())
+    assert localized["recommendations"] == generate_health_recommendations(
+        localized["risk_level"], localized["flags"], localized["risk_score"], lang="pt"
+    )
+    assert default["recommendations"]["headline"] == index_for("en").headline_for(
+        default["risk_level"]
+    )
+    assert (
+        localized["recommendations"]["headline"]
+        != default["recommendations"]["headline"]
+    )
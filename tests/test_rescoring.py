@@ -0,0 +1,158 @@
+"""Bulk re-scoring: input order, rejects and output formats."""
+
+import csv
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import rescoring
+from app.services.rescoring import (
+    OUTPUT_FIELDS,
+    Row,
+    csv_header,
+    detect_format,
+    read_rows,
+    rescore,
+)
+
+PATIENT = {
+    "name": "Test",
+    "age": 50,
+    "gender": "male",
+    "height": 170,
+    "weight": 100,
+    "bp_sys": 150,
+    "bp_dia": 80,
+    "history_high_glucose": True,
+    "physical_activity_hours_per_week": 1,
+    "family_history_diabetes": "none",
+    "smoking_status": "never",
+    "alcohol_status": "never",
+}
+
+
+def _run(rows, **options):
+    output, rejects = [], []
+    counts = rescore(rows, output.append, rejects.append, **options)
+    return counts, "".join(output), "".join(rejects)
+
+
+def _jsonl(*rows):
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def test_detect_format():
+    assert detect_format("export.CSV") == "csv"
+    assert detect_format("export.ndjson") == "jsonl"
+    assert detect_format("export.txt", "jsonl") == "jsonl"
+    with pytest.raises(ValueError):
+        detect_format("export.txt")
+
+
+def test_read_rows_reports_bad_jsonl_lines():
+    stream = io.StringIO('{"age": 50}\n\nnot json\n[1, 2]\n')
+    rows = list(read_rows(stream, "jsonl"))
+    assert [row.number for row in rows] == [1, 2, 3]
+    assert rows[0].values == {"age": 50}
+    assert rows[1].error.startswith("Invalid JSON")
+    assert rows[2].error == "Row must be a JSON object"
+
+
+def test_read_rows_drops_empty_csv_cells():
+    stream = io.StringIO("name,age,bmi\nTest,50,\n")
+    assert list(read_rows(stream, "csv")) == [
+        Row(1, {"name": "Test", "age": "50"}, None)
+    ]
+
+
+def test_invalid_rows_go_to_rejects():
+    rows = read_rows(
+        _jsonl(PATIENT, {**PATIENT, "age": 5}, {**PATIENT, "id": "p-3"}), "jsonl"
+    )
+    rows = [*rows, Row(4, None, "Invalid JSON: boom")]
+    (ok, rejected), output, rejects = _run(rows, id_column="id")
+    assert (ok, rejected) == (2, 2)
+    results = [json.loads(line) for line in output.splitlines()]
+    assert [result["row"] for result in results] == [1, 3]
+    assert results[1]["id"] == "p-3"
+    assert results[0]["risk_level"] == "High"
+    reports = [json.loads(line) for line in rejects.splitlines()]
+    assert [report["row"] for report in reports] == [2, 4]
+    assert reports[0]["errors"][0]["loc"] == ["age"]
+    assert reports[0]["input"]["age"] == 5
+    assert reports[1] == {"row": 4, "errors": "Invalid JSON: boom", "input": None}
+
+
+def test_csv_and_ndjson_outputs_agree():
+    rows = list(
+        read_rows(_jsonl(PATIENT, {**PATIENT, "age": 30, "weight": 60}), "jsonl")
+    )
+    _, ndjson, _ = _run(rows, with_recommendations=True)
+    _, csv_text, _ = _run(rows, output_format="csv", with_recommendations=True)
+    from_csv = list(csv.DictReader(io.StringIO(csv_header() + csv_text)))
+    from_ndjson = [json.loads(line) for line in ndjson.splitlines()]
+    assert len(from_csv) == len(from_ndjson) == 2
+    for csv_row, result in zip(from_csv, from_ndjson):
+        assert list(csv_row) == list(OUTPUT_FIELDS)
+        assert int(csv_row["risk_score"]) == result["risk_score"]
+        assert csv_row["risk_level"] == result["risk_level"]
+        assert csv_row["flags"] == ";".join(result["flags"])
+        assert json.loads(csv_row["recommendations"]) == result["recommendations"]
+
+
+def test_lax_csv_rows_are_coerced():
+    stream = io.StringIO(
+        ",".join(PATIENT)
+        + "\n"
+        + ",".join(str(v).lower() for v in PATIENT.values())
+        + "\n"
+    )
+    (ok, rejected), output, _ = _run(read_rows(stream, "csv"), strict=False)
+    assert (ok, rejected) == (1, 0)
+    assert json.loads(output)["risk_level"] == "High"
+
+
+def test_output_keeps_input_order_within_the_read_ahead_window(monkeypatch):
+    workers, chunk_size, chunks = 2, 3, 8
+    monkeypatch.setattr(rescoring, "ProcessPoolExecutor", ThreadPoolExecutor)
+    score_chunk = rescoring.score_chunk
+
+    def slow_first(chunk, *args):
+        # Earlier chunks finish last, so completion order is reversed within the window
+        time.sleep(0.01 * (chunks - chunk[0].number // chunk_size))
+        return score_chunk(chunk, *args)
+
+    monkeypatch.setattr(rescoring, "score_chunk", slow_first)
+
+    lock = threading.Lock()
+    consumed = [0]
+    consumed_at_write = []
+    output = []
+
+    def rows():
+        for number in range(1, chunks * chunk_size + 1):
+            with lock:
+                consumed[0] += 1
+            yield Row(number, {**PATIENT, "id": number}, None)
+
+    def write(text):
+        consumed_at_write.append(consumed[0])
+        output.append(text)
+
+    ok, rejected = rescore(
+        rows(),
+        write,
+        lambda _: None,
+        workers=workers,
+        chunk_size=chunk_size,
+        id_column="id",
+    )
+    assert (ok, rejected) == (chunks * chunk_size, 0)
+    ids = [json.loads(line)["id"] for line in "".join(output).splitlines()]
+    assert ids == list(range(1, chunks * chunk_size + 1))
+    # No more than 2 * workers chunks are read before the first one is written
+    assert consumed_at_write[0] <= 2 * workers * chunk_size
@@ -0,0 +1,136 @@
+"""Rewrite cache: single-flight loads, LRU/TTL bounds and the SQLite tier."""
+
+import asyncio
+
+import pytest
+
+from app import config
+from app.services import rewrite_cache as rewrite_cache_module
+from app.services.rewrite_cache import RewriteCache
+
+ACTIONS = ["Walk 30 minutes a day", "Cut down on sugary drinks"]
+
+
+class Loader:
+    """Fake upstream rewrite that counts calls and can be held open."""
+
+    def __init__(self, result=("Rewritten",)):
+        self.result = None if result is None else list(result)
+        self.calls = []
+        self.release = asyncio.Event()
+        self.hold = False
+
+    async def __call__(self, actions, lang):
+        self.calls.append((tuple(actions), lang))
+        if self.hold:
+            await self.release.wait()
+        return self.result
+
+
+def test_concurrent_misses_share_one_load():
+    async def run():
+        cache, loader = RewriteCache(), Loader()
+        loader.hold = True
+        waiters = [
+            asyncio.ensure_future(cache.get_or_load(ACTIONS, "en", loader))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        assert cache.stats()["in_flight"] == 1
+        loader.release.set()
+        results = await asyncio.gather(*waiters)
+        return cache, loader, results
+
+    cache, loader, results = asyncio.run(run())
+    assert results == [["Rewritten"]] * 5
+    assert len(loader.calls) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_cancelled_caller_does_not_poison_the_entry():
+    async def run():
+        cache, loader = RewriteCache(), Loader()
+        loader.hold = True
+        first = asyncio.ensure_future(cache.get_or_load(ACTIONS, "en", loader))
+        second = asyncio.ensure_future(cache.get_or_load(ACTIONS, "en", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        value = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        again = await cache.get_or_load(ACTIONS, "en", loader)
+        return cache, loader, value, again
+
+    cache, loader, value, again = asyncio.run(run())
+    assert value == again == ["Rewritten"]
+    assert len(loader.calls) == 1
+    assert cache.hits == 1
+
+
+def test_failed_rewrites_are_not_cached():
+    async def run():
+        cache, loader = RewriteCache(), Loader(result=None)
+        first = await cache.get_or_load(ACTIONS, "en", loader)
+        second = await cache.get_or_load(ACTIONS, "en", loader)
+        return cache, loader, first, second
+
+    cache, loader, first, second = asyncio.run(run())
+    assert first is None and second is None
+    assert len(loader.calls) == 2
+    assert cache.stats()["size"] == 0
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rewrite_cache_module.time, "monotonic", lambda: now[0])
+    cache = RewriteCache(ttl_seconds=60)
+    key = cache.make_key(ACTIONS, "en")
+    cache.put(key, ["Rewritten"])
+    now[0] += 59
+    assert cache.get(key) == ["Rewritten"]
+    now[0] += 2
+    assert cache.get(key) is None
+    assert cache.expirations == 1 and cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RewriteCache(max_entries=2)
+    a, b, c = (cache.make_key([tip], "en") for tip in ("a", "b", "c"))
+    cache.put(a, ["A"])
+    cache.put(b, ["B"])
+    assert cache.get(a) == ["A"]  # a is now more recent than b
+    cache.put(c, ["C"])
+    assert cache.get(b) is None
+    assert cache.get(a) == ["A"] and cache.get(c) == ["C"]
+    assert cache.evictions == 1
+
+
+def test_disk_tier_round_trip(tmp_path, monkeypatch):
+    path = str(tmp_path / "rewrites.sqlite")
+    monkeypatch.setattr(config, "IBM_WX_MODEL_ID", "model-a")
+
+    async def load(cache, loader, actions=ACTIONS, lang="en"):
+        return await cache.get_or_load(actions, lang, loader)
+
+    writer, loader = RewriteCache(), Loader()
+    writer.open_disk_tier(path)
+    assert asyncio.run(load(writer, loader)) == ["Rewritten"]
+    writer.close_disk_tier()
+
+    # A fresh process: memory is empty, the disk tier answers
+    reader, upstream = RewriteCache(), Loader(result=("Other",))
+    reader.open_disk_tier(path)
+    assert asyncio.run(load(reader, upstream)) == ["Rewritten"]
+    assert reader.disk_hits == 1 and upstream.calls == []
+
+    # Different language, actions or model are different keys
+    assert asyncio.run(load(reader, upstream, lang="es")) == ["Other"]
+    assert asyncio.run(load(reader, upstream, actions=ACTIONS[:1])) == ["Other"]
+    monkeypatch.setattr(config, "IBM_WX_MODEL_ID", "model-b")
+    reader.clear()
+    assert asyncio.run(load(reader, upstream)) == ["Other"]
+    assert len(upstream.calls) == 3
+    reader.close_disk_tier()
@@ -0,0 +1,159 @@
+"""Parity between the scalar and vectorized risk scorers."""
+
+import itertools
+import random
+
+import pytest
+
+from app.models import AlcoholStatus, FamilyHistoryDiabetes, RiskInput, SmokingStatus
+from app.services.risk_scoring import (
+    ALCOHOL_CODES,
+    FAMILY_HISTORY_CODES,
+    RISK_LEVELS,
+    SMOKING_CODES,
+    calculate_risk,
+    calculate_risk_batch,
+    decode_flag_mask,
+)
+
+np = pytest.importorskip("numpy")
+
+BASE_ROW = {
+    "name": "Test",
+    "age": 30,
+    "gender": "female",
+    "height": 170.0,
+    "weight": 65.0,
+    "bmi": None,
+    "bp_sys": 120,
+    "bp_dia": 80,
+    "history_high_glucose": False,
+    "physical_activity_hours_per_week": 5.0,
+    "family_history_diabetes": "none",
+    "smoking_status": "never",
+    "alcohol_status": "never",
+}
+
+
+def _row(**overrides):
+    return {**BASE_ROW, **overrides}
+
+
+def _assert_parity(rows):
+    """Score rows one by one and as a batch, and check every output agrees."""
+    bmi = [np.nan if row["bmi"] is None else row["bmi"] for row in rows]
+    result = calculate_risk_batch(
+        age=[row["age"] for row in rows],
+        bp_sys=[row["bp_sys"] for row in rows],
+        bp_dia=[row["bp_dia"] for row in rows],
+        history_high_glucose=[row["history_high_glucose"] for row in rows],
+        physical_activity_hours_per_week=[
+            row["physical_activity_hours_per_week"] for row in rows
+        ],
+        family_history_diabetes=[
+            FAMILY_HISTORY_CODES[row["family_history_diabetes"]] for row in rows
+        ],
+        smoking_status=[SMOKING_CODES[row["smoking_status"]] for row in rows],
+        alcohol_status=[ALCOHOL_CODES[row["alcohol_status"]] for row in rows],
+        bmi=bmi,
+        height=[row["height"] for row in rows],
+        weight=[row["weight"] for row in rows],
+    )
+    for i, row in enumerate(rows):
+        patient = RiskInput(**row)
+        score, level, flags = calculate_risk(patient)
+        context = f"row {i}: {row}"
+        assert result.bmi[i] == patient.bmi, context
+        assert int(result.scores[i]) == score, context
+        assert RISK_LEVELS[result.level_codes[i]] == level, context
+        assert decode_flag_mask(int(result.flag_masks[i])) == flags, context
+    return result
+
+
+def test_batch_matches_scalar_on_random_rows():
+    rng = random.Random(20240521)
+    rows = []
+    for _ in range(2000):
+        height = round(rng.uniform(140, 200), rng.choice([0, 1, 2]))
+        weight = round(rng.uniform(40, 150), rng.choice([0, 1, 2]))
+        rows.append(
+            _row(
+                age=rng.randint(10, 120),
+                height=height,
+                weight=weight,
+                # Most rows derive bmi from height/weight, as the API usually does
+                bmi=round(rng.uniform(15, 45), 1) if rng.random() < 0.3 else None,
+                bp_sys=rng.randint(60, 250),
+                bp_dia=rng.randint(40, 150),
+                history_high_glucose=rng.random() < 0.5,
+                physical_activity_hours_per_week=round(
+                    rng.uniform(0, 12), rng.choice([0, 1, 2])
+                ),
+                family_history_diabetes=rng.choice(list(FamilyHistoryDiabetes)).value,
+                smoking_status=rng.choice(list(SmokingStatus)).value,
+                alcohol_status=rng.choice(list(AlcoholStatus)).value,
+            )
+        )
+    _assert_parity(rows)
+
+
+def test_batch_matches_scalar_on_rule_thresholds():
+    rows = [
+        _row(
+            age=age,
+            bp_sys=bp_sys,
+            bp_dia=bp_dia,
+            physical_activity_hours_per_week=activity,
+            bmi=bmi,
+        )
+        for age, bp_sys, bp_dia, activity, bmi in itertools.product(
+            (44, 45, 46),
+            (139, 140, 141),
+            (89, 90),
+            (3.99, 4.0, 4.01),
+            (29.9, 30.0, 30.1),
+        )
+    ]
+    _assert_parity(rows)
+
+
+def test_batch_matches_scalar_on_level_thresholds():
+    # Scores exactly on and just past the Low/Medium (30) and Medium/High (60) limits
+    rows = [
+        _row(history_high_glucose=True, family_history_diabetes="second_degree"),  # 30
+        _row(
+            history_high_glucose=True,
+            family_history_diabetes="second_degree",
+            smoking_status="former",
+        ),  # 35
+        _row(history_high_glucose=True, bp_sys=150, bmi=31.0),  # 60
+        _row(
+            history_high_glucose=True, bp_sys=150, bmi=31.0, alcohol_status="moderate"
+        ),  # 65
+    ]
+    result = _assert_parity(rows)
+    assert list(result.scores) == [30, 35, 60, 65]
+    assert [RISK_LEVELS[code] for code in result.level_codes] == [
+        "Low",
+        "Medium",
+        "Medium",
+        "High",
+    ]
+
+
+def test_batch_matches_scalar_on_derived_bmi_rounding_edges():
+    # Raw BMIs at (or a float's width from) a .x5 boundary, where np.round and
+    # round() can disagree; the 29.95 cases also decide the bmi_high flag.
+    rows = []
+    for height in (150.0, 163.0, 170.0, 175.5, 180.0, 188.0, 199.0):
+        height_m2 = (height / 100) ** 2
+        for target in (24.95, 29.85, 29.95, 30.05, 35.45):
+            for weight in (
+                target * height_m2,
+                round(target * height_m2, 2),
+                round(target * height_m2, 3),
+            ):
+                if 10 <= weight <= 300:
+                    rows.append(_row(height=height, weight=weight, bmi=None))
+    result = _assert_parity(rows)
+    assert {29.9, 30.0} <= set(result.bmi.tolist())
@@ -0,0 +1,108 @@
+"""Server-sent events from /risk/submit/stream."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.admission import current_priority, priority_for
+from app.services.rewrite_cache import rewrite_cache
+
+PATIENT = {
+    "name": "Test",
+    "age": 50,
+    "gender": "male",
+    "height": 170,
+    "weight": 100,
+    "bp_sys": 150,
+    "bp_dia": 80,
+    "history_high_glucose": True,
+    "physical_activity_hours_per_week": 1,
+    "family_history_diabetes": "none",
+    "smoking_status": "never",
+    "alcohol_status": "never",
+}
+
+
+def _events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+    return events
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake Granite stream; records the admission priority of every call."""
+    calls = []
+
+    async def stream_tips_with_granite(actions, lang):
+        calls.append(current_priority.get())
+        for chunk in ("- Walk daily\n", "- Eat more fibre\n"):
+            yield chunk
+
+    monkeypatch.setattr(main, "stream_tips_with_granite", stream_tips_with_granite)
+    monkeypatch.setattr(main.materialized_tips, "lookup", lambda actions, lang: None)
+    rewrite_cache.clear()
+    yield calls
+    rewrite_cache.clear()
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_event_order(client, upstream):
+    events = _events(client.post("/risk/submit/stream", json=PATIENT))
+    assert [name for name, _ in events] == [
+        "assessment",
+        "rewrite_delta",
+        "rewrite_delta",
+        "rewrite",
+        "done",
+    ]
+    assessment = events[0][1]
+    assert assessment["risk_level"] == "High"
+    assert [data["text"] for _, data in events[1:3]] == [
+        "- Walk daily\n",
+        "- Eat more fibre\n",
+    ]
+    assert events[3][1] == {"actions": ["Walk daily", "Eat more fibre"]}
+    assert events[4][1] == {"rewritten": True}
+    # The upstream call ran at the patient's risk priority
+    assert upstream == [priority_for("High")]
+
+
+def test_cached_rewrite_skips_upstream(client, upstream):
+    client.post("/risk/submit/stream", json=PATIENT)
+    hits = rewrite_cache.hits
+    events = _events(client.post("/risk/submit/stream", json=PATIENT))
+    assert [name for name, _ in events] == ["assessment", "rewrite", "done"]
+    assert events[1][1] == {"actions": ["Walk daily", "Eat more fibre"]}
+    assert rewrite_cache.hits == hits + 1
+    assert len(upstream) == 1
+
+
+def test_localized_language_needs_no_rewrite(client, upstream):
+    events = _events(
+        client.post("/risk/submit/stream", json={**PATIENT, "lang": "pt-BR"})
+    )
+    assert [name for name, _ in events] == ["assessment", "done"]
+    assert events[1][1] == {"rewritten": False}
+    assert upstream == []
+
+
+def test_failed_rewrite_is_not_cached(client, monkeypatch, upstream):
+    async def empty_stream(actions, lang):
+        return
+        yield
+
+    monkeypatch.setattr(main, "stream_tips_with_granite", empty_stream)
+    events = _events(client.post("/risk/submit/stream", json=PATIENT))
+    assert [name for name, _ in events] == ["assessment", "done"]
+    assert events[1][1] == {"rewritten": False}
+    assert rewrite_cache.stats()["size"] == 0
@@ -0,0 +1,108 @@
+"""Redaction, per-endpoint sampling and the non-blocking queue handler."""
+
+import json
+import logging
+import queue
+
+import pytest
+
+from app.services import structured_logging
+from app.services.structured_logging import (
+    REDACTED,
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    Sampler,
+    TextFormatter,
+    parse_sample_rates,
+)
+
+
+def _record(msg="assessment %s", *args, fields=None, endpoint=None):
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, msg, args, None)
+    if fields is not None:
+        record.fields = fields
+    if endpoint is not None:
+        record.endpoint = endpoint
+    return record
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    structured_logging.stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_json_formatter_redacts_configured_fields():
+    record = _record(
+        "assessment %s", "done", fields={"name": "Jane", "risk": 42}, endpoint="/x"
+    )
+    document = json.loads(JSONFormatter(redact=["name"]).format(record))
+    assert document["msg"] == "assessment done"
+    assert document["endpoint"] == "/x"
+    assert document["fields"] == {"name": REDACTED, "risk": 42}
+    # The record itself is left untouched for other handlers
+    assert record.fields["name"] == "Jane"
+
+
+def test_text_formatter_redacts_configured_fields():
+    record = _record(fields={"name": "Jane", "risk": 42})
+    line = TextFormatter(redact=["name"]).format(record)
+    assert line.startswith("INFO:app:")
+    assert f"name={REDACTED}" in line and "risk=42" in line
+    assert "Jane" not in line
+
+
+def test_formatter_without_fields():
+    document = json.loads(JSONFormatter().format(_record("plain")))
+    assert "fields" not in document and "endpoint" not in document
+
+
+def test_sampler_rates(monkeypatch):
+    sampler = Sampler({"/never": 0.0, "/always": 1.0, "/half": 0.5}, default_rate=0.0)
+    monkeypatch.setattr(structured_logging.random, "random", lambda: 0.4)
+    assert sampler.keep("/always")
+    assert not sampler.keep("/never")
+    assert sampler.keep("/half")
+    assert not sampler.keep("/unknown")
+    monkeypatch.setattr(structured_logging.random, "random", lambda: 0.6)
+    assert not sampler.keep("/half")
+
+
+def test_sampler_keeps_everything_by_default():
+    sampler = Sampler()
+    assert all(sampler.keep("/risk/submit") for _ in range(100))
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates(" /risk/submit=0.1, /health=2,/x=-1,,bogus ") == {
+        "/risk/submit": 0.1,
+        "/health": 1.0,
+        "/x": 0.0,
+    }
+    assert parse_sample_rates("") == {}
+
+
+def test_queue_handler_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    first, second = _record("first"), _record("second")
+    handler.handle(first)
+    handler.handle(second)
+    assert handler.dropped == 1
+    # Formatting is left to the listener: the queued record is the original one
+    assert handler.queue.get_nowait() is first
+
+
+def test_setup_logging_leaves_source_locations_alone(root_logger, monkeypatch):
+    sentinel = object()
+    monkeypatch.setattr(logging, "_srcfile", sentinel)
+    structured_logging.setup_logging(force=True)
+    assert logging._srcfile is sentinel
+    structured_logging.setup_logging(skip_source_location=True, force=True)
+    assert logging._srcfile is None